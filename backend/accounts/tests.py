@@ -1,3 +1,54 @@
-from django.test import TestCase
+from django.test import tag
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 
-# Create your tests here.
+from bookmarket.perf import SEED_PASSWORD, EndpointBudgetMixin, seed_catalog
+
+
+@tag("perf")
+class AccountEndpointBudgetTest(EndpointBudgetMixin, APITestCase):
+    """
+    accounts 엔드포인트 쿼리 수 / 응답 시간 예산 (bookmarket/perf.py)
+    - 회원가입 / 로그인은 비밀번호 해시 계산 시간이 대부분
+    """
+    report_title = "accounts"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.catalog = seed_catalog(books=0, trades=0, ratings=0, bookmarks=0, users=20000)
+        cls.user = cls.catalog["users"][1]
+
+    def authenticate(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+
+    def test_signup(self):
+        data = {"username": "new_reader", "password": "pw12345!", "passwordConfirm": "pw12345!", "nickname": "새독자"}
+        self.measure("POST accounts/signup/", self.client.post, "/api/accounts/signup/", data, format="json",
+                     max_queries=4, max_ms=3000, expected_status=201)
+
+    def test_login(self):
+        data = {"username": self.user.username, "password": SEED_PASSWORD}
+        self.measure("POST accounts/login/", self.client.post, "/api/accounts/login/", data, format="json",
+                     max_queries=2, max_ms=3000)
+
+    def test_logout(self):
+        self.authenticate()
+        refresh = str(RefreshToken.for_user(self.user))
+        # simplejwt 블랙리스트 등록 (이미 블랙리스트인지 확인 + outstanding 토큰 조회 + INSERT)
+        self.measure("POST accounts/logout/", self.client.post, "/api/accounts/logout/", {"refresh": refresh},
+                     format="json", max_queries=8, max_ms=150, expected_status=205)
+
+    def test_token_refresh(self):
+        refresh = str(RefreshToken.for_user(self.user))
+        self.measure("POST accounts/token/refresh/", self.client.post, "/api/accounts/token/refresh/",
+                     {"refresh": refresh}, format="json", max_queries=2, max_ms=150)
+
+    def test_profile(self):
+        self.authenticate()
+        self.measure("GET accounts/profile/", self.client.get, "/api/accounts/profile/", max_queries=2, max_ms=150)
+
+    def test_profile_update(self):
+        self.authenticate()
+        # 닉네임 중복 확인이 모델 unique 검증 + validate_nickname 으로 2번
+        self.measure("PATCH accounts/profile/update/", self.client.patch, "/api/accounts/profile/update/",
+                     {"nickname": "바뀐닉네임", "age": 31}, format="json", max_queries=5, max_ms=150)
@@ -5,6 +5,10 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+비동기 도서 추천(/api/books/recommend/async/)은 ASGI 서버로 실행해야
+AI 응답을 기다리는 동안 워커를 붙잡지 않음
+    uvicorn bookmarket.asgi:application --workers 2
 """
 
 import os
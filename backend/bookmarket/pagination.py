@@ -0,0 +1,195 @@
+"""
+bookmarket/pagination.py
+
+도서 / 중고거래 목록에서 같이 쓰는 페이지네이션 도구
+
+정책 요약:
+- 기본은 기존 page 번호 방식 (BookPagination / TradePagination)
+- ?cursor= 를 붙이면 키셋(cursor) 방식
+  → 정렬 컬럼 값 (예: best_rank, id) 이후부터 LIMIT 으로 읽으므로 OFFSET 스캔 없음
+  → N번째 페이지도 첫 페이지와 같은 비용, COUNT(*) 도 기본으로 생략
+  → 응답의 next 링크를 그대로 따라가는 '다음 페이지' 전용 (이전 페이지 없음)
+- ?count=cached 를 붙이면 전체 개수를 캐시에서 재사용 (기본 60초)
+  → page 방식 / cursor 방식 모두 적용
+"""
+
+import base64
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+# 전체 개수 캐시 유지 시간 (초)
+COUNT_CACHE_TIMEOUT = getattr(settings, "PAGINATION_COUNT_CACHE_TIMEOUT", 60)
+
+COUNT_QUERY_PARAM = "count"
+
+
+# ─────────────────────────────
+# 전체 개수 캐시
+# ─────────────────────────────
+def _count_cache_key(queryset) -> str:
+    """같은 조건(SQL)이면 같은 키"""
+    sql, params = queryset.query.sql_with_params()
+    raw = f"{queryset.model._meta.label}|{sql}|{params}"
+    return "pagination:count:" + hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def cached_count(queryset) -> int:
+    """COUNT(*) 결과를 COUNT_CACHE_TIMEOUT 동안 재사용"""
+    queryset = queryset.order_by()
+    key = _count_cache_key(queryset)
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def wants_cached_count(request) -> bool:
+    return request.query_params.get(COUNT_QUERY_PARAM) == "cached"
+
+
+class CachedCountPaginator(Paginator):
+    """page 번호 방식에서 ?count=cached 일 때 쓰는 Paginator"""
+
+    @cached_property
+    def count(self):
+        return cached_count(self.object_list)
+
+
+class CachedCountPaginationMixin:
+    """
+    PageNumberPagination 에 섞어서 사용
+    - ?count=cached 면 COUNT(*) 를 캐시에서 재사용
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if wants_cached_count(request):
+            self.django_paginator_class = CachedCountPaginator
+        return super().paginate_queryset(queryset, request, view)
+
+
+# ─────────────────────────────
+# 키셋(cursor) 페이지네이션
+# ─────────────────────────────
+class KeysetPagination:
+    """
+    키셋 페이지네이션
+
+        paginator = KeysetPagination(ordering=("best_rank", "id"), page_size=50)
+        if paginator.is_requested(request):
+            page = paginator.paginate_queryset(queryset, request)
+            ...
+            return paginator.get_paginated_response(serializer.data)
+
+    - ordering 마지막 컬럼은 유일해야 함 (보통 id)
+    - 컬럼 값에 NULL 이 없어야 함 (뷰에서 미리 제외)
+    """
+    cursor_query_param = "cursor"
+    page_size_query_param = "size"
+    max_page_size = 100
+
+    def __init__(self, ordering, page_size=25):
+        self.ordering = tuple(ordering)
+        self.page_size = page_size
+
+    def is_requested(self, request) -> bool:
+        """?cursor= 가 있으면 (값이 비어 있어도) 키셋 방식"""
+        return self.cursor_query_param in request.query_params
+
+    # 커서 인코딩 ─────────────────
+    @staticmethod
+    def encode_cursor(values) -> str:
+        raw = json.dumps(values, separators=(",", ":"), default=str)
+        return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+    def decode_cursor(self, cursor: str, model):
+        """커서 → 정렬 컬럼별 파이썬 값 (형식이 틀리면 404)"""
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            return [
+                model._meta.get_field(name.lstrip("-")).to_python(value)
+                for name, value in zip(self.ordering, values)
+            ]
+        except Exception:
+            raise NotFound("잘못된 cursor 값입니다.")
+
+    def _after(self, values) -> Q:
+        """
+        (a, b, c) > (x, y, z) 를 Q 로 풀어서 작성
+        → a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z)
+        (내림차순 컬럼은 < 사용)
+        """
+        condition = Q()
+        equal = {}
+        for name, value in zip(self.ordering, values):
+            field = name.lstrip("-")
+            lookup = "lt" if name.startswith("-") else "gt"
+            condition |= Q(**equal, **{f"{field}__{lookup}": value})
+            equal[field] = value
+        return condition
+
+    def get_page_size(self, request) -> int:
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+            if size > 0:
+                return min(size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    # 페이지 조회 ─────────────────
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        size = self.get_page_size(request)
+
+        # 전체 개수는 요청했을 때만 (cursor 조건을 걸기 전 기준)
+        self.count = cached_count(queryset) if wants_cached_count(request) else None
+        self.total_pages = -(-self.count // size) if self.count is not None else None
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self._after(self.decode_cursor(cursor, queryset.model)))
+
+        # 1개 더 읽어서 다음 페이지 존재 여부 확인
+        rows = list(queryset.order_by(*self.ordering)[:size + 1])
+        self.has_next = len(rows) > size
+        page = rows[:size]
+
+        self.next_cursor = None
+        if self.has_next:
+            last = page[-1]
+            self.next_cursor = self.encode_cursor([
+                getattr(last, name.lstrip("-")) for name in self.ordering
+            ])
+        return page
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, "page")
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        # page 방식 응답과 같은 키 (count / total_pages 는 ?count=cached 일 때만 값이 있음)
+        return Response({
+            'count': self.count,
+            'next': self.get_next_link(),
+            'previous': None,
+            'total_pages': self.total_pages,
+            'next_cursor': self.next_cursor,
+            'results': data
+        })
@@ -0,0 +1,244 @@
+"""
+bookmarket/perf.py
+
+엔드포인트별 쿼리 수 / 응답 시간 예산 테스트 도구
+(books / trades / accounts 의 tests.py 에서 같이 사용)
+
+정책 요약:
+- seed_catalog() : 실제 서비스와 비슷한 규모의 가짜 데이터를 bulk_create 로 적재
+  (기본: 도서 2만 / 중고거래 1만 / 평점 3만 / 북마크 5천 / 사용자 300)
+- EndpointBudgetMixin.measure() : 요청 1번의 쿼리 수 / 소요 시간 / 응답 바이트 측정
+  → 쿼리 수 예산을 넘으면 테스트 실패 (N+1 회귀 방지, 항상 검사)
+  → 응답 시간(ms) 예산은 PERF_ASSERT_LATENCY=True 일 때만 검사 (장비 / 부하에 따라 흔들리므로)
+- 테스트 클래스가 끝나면 엔드포인트별 측정 결과를 표로 출력 (ms 는 검사하지 않아도 출력)
+- 예산 테스트 클래스는 @tag("perf") → 성능 측정만 따로 돌릴 때
+  PERF_ASSERT_LATENCY=True python manage.py test --tag perf
+
+환경변수:
+- PERF_SCALE          : 데이터 규모 배율 (기본 1.0, 빠르게 돌릴 땐 0.1 등)
+- PERF_ASSERT_LATENCY : True 면 응답 시간 예산도 검사 (기본 False)
+- PERF_LATENCY_FACTOR : 응답 시간 예산 배율 (느린 CI 장비용, 기본 1.0)
+"""
+
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+PERF_SCALE = float(os.getenv("PERF_SCALE", "1.0"))
+PERF_ASSERT_LATENCY = os.getenv("PERF_ASSERT_LATENCY", "False") == "True"
+PERF_LATENCY_FACTOR = float(os.getenv("PERF_LATENCY_FACTOR", "1.0"))
+
+# 테스트 사용자 공통 비밀번호 (해시는 한 번만 계산해서 재사용)
+SEED_PASSWORD = "perf-pass-1234"
+
+_WORDS = [
+    "해리", "포터", "마법사", "돌", "비밀", "방", "바다", "여행", "고양이", "도시",
+    "역사", "경제", "심리학", "우주", "시간", "사랑", "전쟁", "평화", "철학", "요리",
+    "Python", "Django", "데이터", "AI", "소년", "소녀", "작은", "위대한", "마지막", "첫",
+]
+_REGIONS = ["seoul", "busan", "daegu", "incheon", "gyeonggi", "jeju", "gangwon", "all"]
+_STATUSES = ["available", "available", "available", "reserved", "sold"]
+
+
+def scaled(count: int) -> int:
+    return max(int(count * PERF_SCALE), 1) if count else 0
+
+
+# ─────────────────────────────
+# 가짜 카탈로그 적재
+# ─────────────────────────────
+def seed_catalog(books=20000, trades=10000, ratings=30000, bookmarks=5000, users=300, seed=0) -> dict:
+    """
+    가짜 카탈로그 적재 (개수는 PERF_SCALE 배율 적용)
+    - bulk_create 는 시그널을 타지 않으므로 final_score / 평점 집계는 직접 계산
+    :return: {'categories', 'users', 'books', ...} 적재된 객체 / 개수
+    """
+    from accounts.models import BookMBTI
+    from books.models import Book, BookRating, Bookmark, Category
+    from books.services.bookmarks import bookmark_count_update
+    from books.services.rating_stats import rating_aggregate_updates
+    from books.services.recommand import compute_final_score
+    from trades.models import Trade
+
+    rng = random.Random(seed)
+    User = get_user_model()
+    books, trades, ratings, bookmarks, users = map(scaled, (books, trades, ratings, bookmarks, users))
+
+    mbti = BookMBTI.objects.create(code="SRDC", info="이야기 중심, 현실 배경, 깊고 묵직한 책을 좋아함")
+    categories = Category.objects.bulk_create(
+        [Category(name=f"카테고리 {i}") for i in range(20)]
+    )
+
+    password = make_password(SEED_PASSWORD)
+    user_objs = User.objects.bulk_create([
+        User(
+            username=f"perf_user_{i}", password=password, nickname=f"독자{i}",
+            age=rng.choice([None, 15, 25, 40]), book_mbti=mbti if i % 2 else None,
+        )
+        for i in range(users)
+    ], batch_size=1000)
+
+    book_objs = []
+    for i in range(books):
+        best_rank = i + 1 if i < 1000 else None
+        sales_point = rng.randint(0, 200000)
+        review_rank = rng.randint(0, 10)
+        book_objs.append(Book(
+            category=categories[i % len(categories)],
+            isbn=f"979{i:010d}",
+            title=" ".join(rng.choices(_WORDS, k=rng.randint(2, 5))) + f" {i}",
+            cover=f"https://image.example.com/cover/{i}.jpg",
+            price_standard=rng.randint(8, 40) * 1000,
+            publisher=f"출판사 {i % 500}",
+            author=f"저자 {i % 3000}",
+            description=" ".join(rng.choices(_WORDS, k=60)),
+            pub_date=date(2000, 1, 1) + timedelta(days=i % 9000),
+            adult=i % 50 == 0,
+            best_rank=best_rank,
+            customer_review_rank=review_rank,
+            sales_point=sales_point,
+            final_score=compute_final_score(sales_point, best_rank, review_rank),
+        ))
+    book_objs = Book.objects.bulk_create(book_objs, batch_size=2000)
+
+    Trade.objects.bulk_create([
+        Trade(
+            user=rng.choice(user_objs), book=rng.choice(book_objs),
+            title=f"{rng.choice(_WORDS)} 팝니다 {i}", content=" ".join(rng.choices(_WORDS, k=30)),
+            sale_type="free" if i % 10 == 0 else "sale", price=rng.randint(1, 30) * 1000,
+            region=rng.choice(_REGIONS), status=rng.choice(_STATUSES),
+        )
+        for i in range(trades)
+    ], batch_size=2000)
+
+    # (user, book) 중복 없이
+    pairs = set()
+    while len(pairs) < ratings + bookmarks:
+        pairs.add((rng.randrange(users), rng.randrange(books)))
+    pairs = list(pairs)
+    BookRating.objects.bulk_create([
+        BookRating(user=user_objs[u], book=book_objs[b], score=rng.choice(["3.0", "3.5", "4.0", "4.5", "5.0"]))
+        for u, b in pairs[:ratings]
+    ], batch_size=2000)
+    Bookmark.objects.bulk_create([
+        Bookmark(user=user_objs[u], book=book_objs[b]) for u, b in pairs[ratings:]
+    ], batch_size=2000)
+
+    # 평점 집계 / 북마크 수 (signals.py / services 가 하던 일을 한 번에)
+    Book.objects.update(**rating_aggregate_updates(BookRating), **bookmark_count_update(Bookmark))
+
+    return {
+        "mbti": mbti,
+        "categories": categories,
+        "users": user_objs,
+        "books": book_objs,
+        "counts": {
+            "books": books, "trades": trades, "ratings": ratings,
+            "bookmarks": bookmarks, "users": users,
+        },
+    }
+
+
+# ─────────────────────────────
+# 측정
+# ─────────────────────────────
+@dataclass
+class EndpointMeasurement:
+    name: str
+    status: int
+    queries: int
+    max_queries: int
+    ms: float
+    max_ms: float
+    bytes: int
+
+
+def _response_bytes(response) -> int:
+    if getattr(response, "streaming", False):
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+def format_report(title: str, rows) -> str:
+    """측정 결과 표"""
+    header = f"{'endpoint':<40} {'status':>6} {'queries':>11} {'ms':>17} {'bytes':>10}"
+    lines = [f"\n[{title}]", header, "-" * len(header)]
+    for row in rows:
+        lines.append(
+            f"{row.name:<40} {row.status:>6} "
+            f"{f'{row.queries}/{row.max_queries}':>11} "
+            f"{f'{row.ms:.1f}/{row.max_ms:.0f}':>17} "
+            f"{row.bytes:>10,}"
+        )
+    return "\n".join(lines)
+
+
+class EndpointBudgetMixin:
+    """
+    TestCase 에 섞어서 사용
+
+        @tag("perf")
+        class BookEndpointBudgetTest(EndpointBudgetMixin, APITestCase):
+            def test_book_list(self):
+                self.measure("GET /api/books/", self.client.get, "/api/books/", max_queries=1, max_ms=200)
+    """
+    report_title = "endpoint budget"
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.measurements = []
+
+    def setUp(self):
+        super().setUp()
+        # 다른 테스트의 응답 / 개수 캐시가 측정에 섞이지 않도록
+        cache.clear()
+        # 측정 중에 검색 조합 집계 반영(주기 flush) 쿼리가 끼어들지 않도록
+        from trades.services.query_shapes import trade_query_shapes
+        trade_query_shapes.discard()
+        # 다른 테스트 데이터로 적재된 검색 비트맵 인덱스가 남지 않도록 (다음 사용 때 다시 적재)
+        from trades.services.bitmap_index import trade_bitmap_index
+        trade_bitmap_index.clear()
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.measurements:
+            rows = sorted(cls.measurements, key=lambda row: row.name)
+            sys.stdout.write(format_report(cls.report_title, rows) + "\n")
+        super().tearDownClass()
+
+    def measure(self, name, call, *args, max_queries, max_ms, expected_status=200, **kwargs):
+        """
+        call(*args, **kwargs) 실행 → 쿼리 수 / 시간 / 바이트 측정 + 예산 검사
+        (스트리밍 응답은 끝까지 읽은 시간까지 포함)
+        """
+        max_ms = max_ms * PERF_LATENCY_FACTOR
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            response = call(*args, **kwargs)
+            size = _response_bytes(response)
+            elapsed = (time.perf_counter() - started) * 1000
+
+        row = EndpointMeasurement(name, response.status_code, len(ctx.captured_queries), max_queries,
+                                  elapsed, max_ms, size)
+        self.measurements.append(row)
+
+        self.assertEqual(response.status_code, expected_status, f"{name}: unexpected status")
+        self.assertLessEqual(
+            row.queries, max_queries,
+            f"{name}: {row.queries} queries > budget {max_queries}\n"
+            + "\n".join(query["sql"] for query in ctx.captured_queries),
+        )
+        if PERF_ASSERT_LATENCY:
+            self.assertLessEqual(row.ms, max_ms, f"{name}: {row.ms:.1f}ms > budget {max_ms:.0f}ms")
+        return response
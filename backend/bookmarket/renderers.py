@@ -0,0 +1,183 @@
+"""
+bookmarket/renderers.py
+
+camelCase JSON 응답 / 요청 변환 (djangorestframework_camel_case 대체)
+
+정책 요약:
+- 기존 CamelCaseJSONRenderer 는 응답마다 모든 dict 의 모든 키를 정규식으로 다시 변환
+  → 키 이름 변환 결과를 lru_cache 로 재사용 (같은 키는 한 번만 정규식 처리)
+- CamelCaseKeysMixin 을 섞은 serializer 는 클래스가 만들어질 때 키 맵(snake → camel)을 계산해 두고
+  처음부터 camelCase 키로 결과를 만듦 → 렌더러는 이 dict 의 키를 다시 보지 않음
+- JSON 직렬화는 orjson (requirements.txt), 설치되어 있지 않은 환경에서는 DRF 기본 JSONRenderer
+- 요청 본문(JSON) 파싱도 같은 방식으로 키 변환 캐시 사용 (FastCamelCaseJSONParser)
+- 변환 규칙(no_underscore_before_number 등)은 settings.JSON_CAMEL_CASE 를 그대로 따름
+  (ignore_fields / ignore_keys 를 설정하면 기존 라이브러리 변환으로 처리)
+"""
+
+import json
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from djangorestframework_camel_case.parser import CamelCaseJSONParser
+from djangorestframework_camel_case.render import CamelCaseJSONRenderer
+from djangorestframework_camel_case.settings import api_settings as camel_settings
+from djangorestframework_camel_case.util import camelize_re, underscore_to_camel, underscoreize
+from rest_framework.exceptions import ParseError
+from rest_framework.utils import encoders
+from rest_framework.utils.serializer_helpers import ReturnDict
+
+try:
+    import orjson
+except ImportError:  # orjson 이 없으면 DRF 기본 json 사용
+    orjson = None
+
+
+_OPTIONS = camel_settings.JSON_UNDERSCOREIZE
+# ignore_fields / ignore_keys 가 설정되어 있으면 빠른 변환을 쓰지 않음
+_SIMPLE_OPTIONS = not (_OPTIONS.get("ignore_fields") or _OPTIONS.get("ignore_keys"))
+
+
+# ─────────────────────────────
+# 키 이름 변환 (캐시)
+# ─────────────────────────────
+@lru_cache(maxsize=4096)
+def camel_key(key: str) -> str:
+    """snake_case → camelCase (camelize() 와 같은 규칙)"""
+    return camelize_re.sub(underscore_to_camel, key) if "_" in key else key
+
+
+@lru_cache(maxsize=4096)
+def underscore_key(key: str) -> str:
+    """camelCase → snake_case (underscoreize() 와 같은 규칙)"""
+    return next(iter(underscoreize({key: None}, **_OPTIONS)))
+
+
+class CamelizedDict(dict):
+    """키가 이미 camelCase 인 dict (렌더러가 키 변환을 건너뜀)"""
+
+
+def _is_camelized(data) -> bool:
+    if isinstance(data, CamelizedDict):
+        return True
+    # serializer.data 는 ReturnDict 로 다시 감싸지므로 serializer 로 판단
+    return isinstance(data, ReturnDict) and isinstance(data.serializer, CamelCaseKeysMixin)
+
+
+def fast_camelize(data):
+    """camelize() 와 같은 결과, 이미 변환된 dict 는 값만 확인"""
+    if isinstance(data, dict):
+        if _is_camelized(data):
+            # 키는 그대로 두고 중첩 값만 확인 (serializer 가 새로 만든 dict 라 제자리 수정)
+            for key, value in data.items():
+                if isinstance(value, (dict, list, tuple)):
+                    data[key] = fast_camelize(value)
+            return data
+        result = {}
+        for key, value in data.items():
+            if isinstance(key, Promise):
+                key = force_str(key)
+            if isinstance(key, str):
+                key = camel_key(key)
+            result[key] = fast_camelize(value)
+        return result
+    if isinstance(data, (list, tuple)):
+        return [fast_camelize(item) for item in data]
+    if isinstance(data, Promise):
+        return force_str(data)
+    return data
+
+
+def fast_underscoreize(data):
+    """JSON 요청 본문용 underscoreize() (dict / list / 값만 존재)"""
+    if isinstance(data, dict):
+        return {
+            (underscore_key(key) if isinstance(key, str) else key): fast_underscoreize(value)
+            for key, value in data.items()
+        }
+    if isinstance(data, list):
+        return [fast_underscoreize(item) for item in data]
+    return data
+
+
+# ─────────────────────────────
+# serializer 용 mixin
+# ─────────────────────────────
+class CamelCaseKeysMixin:
+    """
+    serializer 결과를 처음부터 camelCase 키로 생성
+
+        class BookPreviewSerializer(CamelCaseKeysMixin, serializers.ModelSerializer):
+            ...
+
+    - Meta.fields 기준 키 맵은 클래스 생성 시 한 번만 계산
+    - camelize_keys = False 로 끄면 기존처럼 snake_case (벤치마크 비교용)
+    """
+    camelize_keys = True
+    _camel_key_map = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        meta = getattr(cls, "Meta", None)
+        fields = getattr(meta, "fields", None)
+        names = fields if isinstance(fields, (list, tuple)) else ()
+        cls._camel_key_map = {name: camel_key(name) for name in names}
+
+    def to_representation(self, instance):
+        ret = super().to_representation(instance)
+        if not self.camelize_keys or not _SIMPLE_OPTIONS:
+            return ret
+        key_map = self._camel_key_map
+        return CamelizedDict(
+            (key_map.get(key) or camel_key(key), value) for key, value in ret.items()
+        )
+
+
+# ─────────────────────────────
+# 렌더러 / 파서
+# ─────────────────────────────
+class FastCamelCaseJSONRenderer(CamelCaseJSONRenderer):
+    """CamelCaseJSONRenderer 와 같은 응답, 키 변환 캐시 + orjson"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not _SIMPLE_OPTIONS:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b""
+
+        data = fast_camelize(data)
+        # 들여쓰기 요청(indent=)이 있거나 orjson 이 없으면 DRF JSONRenderer 로 출력
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super(CamelCaseJSONRenderer, self).render(data, accepted_media_type, renderer_context)
+        ret = orjson.dumps(data, default=_encoder.default, option=orjson.OPT_NON_STR_KEYS)
+        # JSONRenderer 와 같이 U+2028 / U+2029 는 이스케이프 (JavaScript 호환)
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
+
+
+class FastCamelCaseJSONParser(CamelCaseJSONParser):
+    """CamelCaseJSONParser 와 같은 결과, 키 변환 캐시 + orjson"""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if not _SIMPLE_OPTIONS:
+            return super().parse(stream, media_type, parser_context)
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+
+        try:
+            raw = stream.read().decode(encoding)
+            data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+            return fast_underscoreize(data)
+        except ValueError as exc:
+            raise ParseError("JSON parse error - %s" % str(exc))
+
+
+def render_camel_json(data) -> bytes:
+    """Response(data) 와 같은 camelCase JSON bytes (응답 캐시 등 뷰 밖에서 사용)"""
+    return FastCamelCaseJSONRenderer().render(data)
+
+
+# orjson 이 직접 못 다루는 값(Decimal, lazy 문자열 등)은 DRF 인코더로 변환
+_encoder = encoders.JSONEncoder()
@@ -11,19 +11,34 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
+import atexit
 import os
+import shutil
+import sys
+import tempfile
 from pathlib import Path
 from dotenv import load_dotenv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# manage.py test 실행 중이면 캐시 파일을 작업 트리 / 공용 캐시 대신 임시 폴더에 둠
+# (테스트의 cache.clear() 가 개발 서버의 캐시를 지우지 않도록, 종료 시 삭제)
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
+if TESTING:
+    CACHE_DIR = Path(tempfile.mkdtemp(prefix='bookmarket-test-cache-'))
+    atexit.register(shutil.rmtree, CACHE_DIR, ignore_errors=True)
+else:
+    CACHE_DIR = BASE_DIR / 'cache'
+
 
 # .env 로드
 load_dotenv(BASE_DIR / ".env")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 if not OPENAI_API_KEY:
     raise RuntimeError("OPENAI_API_KEY is not set")
+# AI 호출 주소 (비워두면 GMS 프록시 사용, 로컬 스텁 서버 테스트 시 지정)
+LLM_ENDPOINT = os.getenv("LLM_ENDPOINT")
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -104,6 +119,24 @@ DATABASES = {
     }
 }
 
+# 공용 캐시 (카탈로그 버전 / 목록 응답 캐시 / 개수 캐시 / 조회수 중복 방지)
+# 워커 프로세스와 관리 커멘드(load_catalog / loaddata 등)가 같은 카탈로그 버전을 봐야 하므로
+# 프로세스마다 따로 생기는 기본 LocMem 대신 파일 캐시 (같은 서버의 모든 프로세스가 공유)
+# 서버가 여러 대면 Redis 지정 (테스트 중에는 환경변수를 무시하고 임시 폴더의 파일 캐시)
+#   예) CACHE_BACKEND=django.core.cache.backends.redis.RedisCache CACHE_LOCATION=redis://127.0.0.1:6379/1
+CACHES = {
+    'default': {
+        'BACKEND': (
+            'django.core.cache.backends.filebased.FileBasedCache' if TESTING
+            else os.getenv('CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache')
+        ),
+        'LOCATION': str(CACHE_DIR / 'default') if TESTING else os.getenv('CACHE_LOCATION', str(CACHE_DIR / 'default')),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -145,6 +178,49 @@ STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# AI 도서 추천 응답 캐시 (books/services/ai_client.py)
+# 같은 MBTI + 카테고리 + 프롬프트 + 후보 도서 조합이면 AI를 다시 호출하지 않음
+RECOMMEND_CACHE = {
+    'BACKEND': 'locmem',    # 'locmem' (프로세스 메모리) | 'file' (워커 간 공유)
+    'TTL': 600,             # 10분
+    'MAX_ENTRIES': 500,
+    'LOCATION': CACHE_DIR / 'recommend',   # file 백엔드일 때만 사용
+}
+
+# AI 추천 프롬프트 후보 목록 압축 (books/services/ai_prompt.py)
+RECOMMEND_PROMPT = {
+    'TOKEN_BUDGET': int(os.getenv('RECOMMEND_PROMPT_TOKEN_BUDGET', 6000)),   # 프롬프트 전체 추정 토큰 상한
+    'DESCRIPTION_CHARS': 160,   # 도서 1권당 소개글 최대 글자 수
+}
+
+# 중고거래 조회수 버퍼 (trades/services/view_counter.py)
+TRADE_VIEW_COUNT = {
+    'BUFFERED': True,
+    'FLUSH_INTERVAL': int(os.getenv('TRADE_VIEW_FLUSH_INTERVAL', 10)),   # 초
+    'FLUSH_THRESHOLD': 500,     # 쌓인 조회수가 이만큼이면 바로 반영
+    'DEDUPE_WINDOW': int(os.getenv('TRADE_VIEW_DEDUPE_WINDOW', 0)),      # 같은 사용자/IP 중복 조회 무시 시간 (초, 0=끔)
+    # X-Forwarded-For 를 믿을 리버스 프록시 IP (쉼표 구분, 비어 있으면 REMOTE_ADDR 만 사용)
+    'TRUSTED_PROXIES': tuple(ip.strip() for ip in os.getenv('TRADE_VIEW_TRUSTED_PROXIES', '').split(',') if ip.strip()),
+}
+
+# 중고거래 검색 필터 / 정렬 조합 집계 (trades/services/query_shapes.py, trade_query_shapes 커멘드로 확인)
+TRADE_QUERY_SHAPES = {
+    'RECORD': os.getenv('TRADE_QUERY_SHAPES_RECORD', 'True') == 'True',
+    'FLUSH_INTERVAL': int(os.getenv('TRADE_QUERY_SHAPES_FLUSH_INTERVAL', 60)),   # 초
+}
+
+# 도서 자동완성 메모리 인덱스 (books/services/autocomplete.py)
+AUTOCOMPLETE_INDEX = {
+    'BACKGROUND': os.getenv('AUTOCOMPLETE_INDEX_BACKGROUND', 'True') == 'True',   # 다시 적재를 백그라운드 스레드에서 (기존 인덱스로 응답)
+}
+
+# 중고거래 검색 enum 조건(지역 / 판매 유형 / 상태 / 성인) 메모리 비트맵 인덱스 (trades/services/bitmap_index.py)
+TRADE_BITMAP_INDEX = {
+    'ENABLED': os.getenv('TRADE_BITMAP_INDEX_ENABLED', 'True') == 'True',
+    'MAX_AGE': int(os.getenv('TRADE_BITMAP_INDEX_MAX_AGE', 300)),   # 초, 다른 워커 변경분 반영 주기 (다시 적재)
+    'BACKGROUND': os.getenv('TRADE_BITMAP_INDEX_BACKGROUND', 'True') == 'True',   # 적재를 백그라운드 스레드에서 (요청 대기 없음)
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -159,12 +235,13 @@ REST_FRAMEWORK = {
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
     # CamelCase 변환 (프론트엔드 JavaScript 컨벤션 지원)
+    # 키 변환 캐시 + orjson(설치된 경우) 사용 버전 (bookmarket/renderers.py)
     'DEFAULT_RENDERER_CLASSES': [
-        'djangorestframework_camel_case.render.CamelCaseJSONRenderer',
+        'bookmarket.renderers.FastCamelCaseJSONRenderer',
         'djangorestframework_camel_case.render.CamelCaseBrowsableAPIRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
-        'djangorestframework_camel_case.parser.CamelCaseJSONParser',
+        'bookmarket.renderers.FastCamelCaseJSONParser',
         'djangorestframework_camel_case.parser.CamelCaseFormParser',
         'djangorestframework_camel_case.parser.CamelCaseMultiPartParser',
     ],
@@ -0,0 +1,69 @@
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from books.models import Book, BookRating, Bookmark
+from books.services.bulk_sync import MAX_BULK_ITEMS, bulk_sync_bookmarks, bulk_upsert_ratings
+
+
+class Command(BaseCommand):
+    """
+    평점 / 북마크 일괄 등록 처리량 비교 커멘드
+    - 기존: 도서 1권씩 (BookRatingView / book_mark 와 같은 방식, 행마다 signal)
+    - 현재: services/bulk_sync.py (bulk_create + 집계 1번)
+    측정용 사용자 / 도서는 트랜잭션 안에서 만들고 끝나면 전부 롤백 (DB 에 남지 않음)
+    """
+    help = '평점 / 북마크 일괄 등록 처리량을 도서 1권씩 처리하는 방식과 비교하는 커멘드'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=MAX_BULK_ITEMS, help='한 번에 등록할 건수')
+
+    def handle(self, *args, **options):
+        count = options['items']
+        with transaction.atomic():
+            self._run(count)
+            transaction.set_rollback(True)
+
+    def _run(self, count):
+        User = get_user_model()
+        before_user = User.objects.create_user(username='bench_bulk_before', password='bench-pass-1234')
+        after_user = User.objects.create_user(username='bench_bulk_after', password='bench-pass-1234')
+        books = Book.objects.bulk_create([
+            Book(isbn=f'8{i:012d}', title=f'벤치마크 {i}', author='저자', publisher='출판사')
+            for i in range(count)
+        ])
+        scores = [(book.id, Decimal('4.5') if i % 2 else Decimal('3.0')) for i, book in enumerate(books)]
+
+        # 1️⃣ 평점
+        before = self._measure(lambda: [
+            BookRating.objects.update_or_create(user=before_user, book_id=book_id, defaults={'score': score})
+            for book_id, score in scores
+        ])
+        after = self._measure(lambda: bulk_upsert_ratings(after_user, scores))
+        self._report('평점', count, before, after)
+
+        # 2️⃣ 북마크
+        def one_by_one():
+            for book in books:
+                bookmark = Bookmark.objects.filter(user=before_user, book=book)
+                if not bookmark.exists():
+                    Bookmark.objects.create(user=before_user, book=book)
+
+        before = self._measure(one_by_one)
+        after = self._measure(lambda: bulk_sync_bookmarks(after_user, [(book.id, True) for book in books]))
+        self._report('북마크', count, before, after)
+
+    @staticmethod
+    def _measure(func):
+        started = time.perf_counter()
+        func()
+        return time.perf_counter() - started
+
+    def _report(self, name, count, before, after):
+        self.stdout.write(
+            f'[{name} {count}건] 1건씩 {count / before:,.0f}건/초 → 일괄 {count / after:,.0f}건/초 '
+            f'({before / after:.1f}배)'
+        )
@@ -0,0 +1,85 @@
+import io
+import json
+import time
+from datetime import date
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from djangorestframework_camel_case.parser import CamelCaseJSONParser
+from djangorestframework_camel_case.render import CamelCaseJSONRenderer
+
+from bookmarket.renderers import FastCamelCaseJSONParser, FastCamelCaseJSONRenderer, orjson
+from books.models import Book, Category
+from books.serializers import BookSearchSerializer
+
+
+class Command(BaseCommand):
+    """
+    검색 결과 페이지 직렬화 속도 비교 커멘드
+    - 기존: snake_case serializer 결과 → CamelCaseJSONRenderer (키 전체 정규식 변환 + json)
+    - 현재: CamelCaseKeysMixin (키 맵 미리 계산) → FastCamelCaseJSONRenderer (키 변환 캐시 + orjson)
+    DB 없이 메모리의 Book 객체로 측정하므로 아무 환경에서나 실행 가능
+    """
+    help = '도서 검색 페이지(기본 100권) 직렬화 / 파싱 속도를 기존 방식과 비교하는 커멘드'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100, help='페이지당 도서 수')
+        parser.add_argument('--repeat', type=int, default=200, help='반복 횟수')
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        books = self._books(rows)
+
+        # 기존 방식 재현용 (serializer 는 snake_case 키 그대로)
+        legacy_serializer = type('LegacyBookSearchSerializer', (BookSearchSerializer,), {'camelize_keys': False})
+
+        def page(serializer_class):
+            return {
+                'count': rows, 'next': None, 'previous': None, 'total_pages': 1,
+                'results': serializer_class(books, many=True).data,
+            }
+
+        before_body = CamelCaseJSONRenderer().render(page(legacy_serializer))
+        after_body = FastCamelCaseJSONRenderer().render(page(BookSearchSerializer))
+        if json.loads(before_body) != json.loads(after_body):
+            self.stderr.write(self.style.ERROR('두 방식의 응답 내용이 다릅니다!'))
+            return
+
+        self.stdout.write(f'{rows}권 / {repeat}회 반복 / 응답 {len(after_body):,} bytes / orjson: {"사용" if orjson else "없음"}')
+
+        # 1️⃣ 응답 (serializer + renderer)
+        before = self._measure(repeat, lambda: CamelCaseJSONRenderer().render(page(legacy_serializer)))
+        after = self._measure(repeat, lambda: FastCamelCaseJSONRenderer().render(page(BookSearchSerializer)))
+        self._report('응답 직렬화', repeat, before, after)
+
+        # 2️⃣ 요청 본문 파싱 (같은 JSON 을 요청으로 받는다고 가정)
+        before = self._measure(repeat, lambda: CamelCaseJSONParser().parse(io.BytesIO(after_body)))
+        after = self._measure(repeat, lambda: FastCamelCaseJSONParser().parse(io.BytesIO(after_body)))
+        self._report('요청 파싱', repeat, before, after)
+
+    @staticmethod
+    def _books(rows):
+        category = Category(id=1, name='소설')
+        return [
+            Book(
+                id=i + 1, category=category, isbn=f'979{i:010d}', title=f'벤치마크 도서 제목 {i}',
+                cover=f'https://image.example.com/cover/{i}.jpg', publisher=f'출판사 {i % 50}',
+                author=f'저자 {i % 300}', pub_date=date(2020, 1, 1), adult=False, best_rank=i + 1,
+                customer_review_rank=i % 10, rating_count=i, average_rating=Decimal('4.25'),
+            )
+            for i in range(rows)
+        ]
+
+    @staticmethod
+    def _measure(repeat, func):
+        func()  # 캐시 워밍업
+        started = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        return time.perf_counter() - started
+
+    def _report(self, name, repeat, before, after):
+        self.stdout.write(
+            f'[{name}] 기존 {repeat / before:,.0f} 페이지/초 → 현재 {repeat / after:,.0f} 페이지/초 '
+            f'({before / after:.1f}배)'
+        )
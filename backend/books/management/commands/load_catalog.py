@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand
+# 프로젝트 루트 경로 출력용 settings파일
+from bookmarket import settings
+from books.services.aladin_stream import build_cid_map, iter_json_records
+from books.services.catalog_loader import BATCH_SIZE, drop_secondary_indexes, load_books, restore_secondary_indexes
+import os
+import json
+
+
+class Command(BaseCommand):
+    """
+    django management commend 기능 사용
+    class명은 반드시 Command로 만들어줘야 함
+    django 시스템이 자동으로 Command 클래스명이 있는 코드를 찾고 실행시켜주기 때문
+
+    book_raw.json → fixture → loaddata 대신 덤프를 읽어서 Book 테이블에 바로 bulk upsert (services/catalog_loader.py)
+    → isbn 기준으로 있으면 수정, 없으면 등록 (여러 번 실행해도 중복 없음)
+    """
+    help = '알라딘 도서 덤프를 loaddata 없이 Book 테이블에 일괄 적재(upsert)하는 커멘드'
+
+    def add_arguments(self, parser):
+        data_dir = settings.BASE_DIR / 'data'
+        parser.add_argument('--input', default=os.path.join(data_dir, 'book_raw.json'),
+                            help='알라딘 도서 덤프 (JSON 배열 또는 JSON Lines)')
+        parser.add_argument('--categories', default=os.path.join(data_dir, 'categories.json'),
+                            help='대분류 → cid 목록 파일')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help='한 번에 upsert 할 도서 수 (배치마다 트랜잭션 1개)')
+        parser.add_argument('--full', action='store_true',
+                            help='전체 적재: 보조 인덱스 / 검색 트리거를 지우고 적재 후 한 번에 다시 만듦')
+
+    def handle(self, *args, **options):
+        with open(options['categories'], 'r', encoding='utf-8') as f:
+            cid_map = build_cid_map(json.load(f))
+
+        # 1️⃣ 전체 적재면 보조 인덱스 삭제 (행마다 인덱스 갱신하지 않도록)
+        if options['full']:
+            dropped = drop_secondary_indexes()
+            self.stdout.write(f'보조 인덱스 {len(dropped)}개 / 검색 트리거 삭제')
+
+        # 2️⃣ 적재 (실패해도 인덱스는 다시 만듦)
+        try:
+            with open(options['input'], 'r', encoding='utf-8') as src:
+                stats = load_books(iter_json_records(src), cid_map, options['batch_size'], progress=self._progress)
+        finally:
+            if options['full']:
+                self.stdout.write('보조 인덱스 / 검색 인덱스 재생성 중...')
+                created = restore_secondary_indexes()
+                self.stdout.write(f'보조 인덱스 {len(created)}개 재생성')
+
+        rate = stats['loaded'] / max(stats['elapsed'], 1e-9)
+        self.stdout.write(self.style.SUCCESS(
+            f"적재 완료! 읽음 {stats['read']:,}권 / 적재 {stats['loaded']:,}권 / 제외 {stats['skipped']:,}권 "
+            f"({stats['elapsed']:.1f}초, {rate:,.0f}권/초)"
+        ))
+
+    def _progress(self, stats, elapsed):
+        self.stdout.write(f"- {stats['loaded']:,}권 적재 ({stats['loaded'] / max(elapsed, 1e-9):,.0f}권/초)")
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from books.services.recommand import refresh_final_scores
+
+
+class Command(BaseCommand):
+    """
+    추천 점수(Book.final_score) 일괄 재계산 커멘드
+    도서 저장 시에는 signal이 자동으로 계산하므로
+    bulk_create / raw SQL 처럼 signal을 거치지 않고 적재했을 때만 실행하면 됨
+    """
+    help = '도서 추천 점수(final_score)를 한 번에 다시 계산하는 커멘드'
+
+    def handle(self, *args, **options):
+        updated = refresh_final_scores()
+        self.stdout.write(self.style.SUCCESS(f'추천 점수 재계산 완료! ({updated}권)'))
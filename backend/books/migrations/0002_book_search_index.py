@@ -0,0 +1,101 @@
+# 도서 검색용 전문 검색(Full-Text Search) 인덱스
+# - SQLite     : FTS5 가상 테이블 + 동기화 트리거
+# - PostgreSQL : to_tsvector 표현식 GIN 인덱스
+
+from django.db import migrations
+
+
+SQLITE_FORWARD_SQL = [
+    # book 테이블을 원본(content)으로 쓰는 외부 콘텐츠 FTS5 테이블
+    # trigram 토크나이저 → 띄어쓰기 없는 한글도 부분 문자열 검색 가능
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS book_fts USING fts5(
+        title, author,
+        content='book', content_rowid='id',
+        tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_fts_ai AFTER INSERT ON book BEGIN
+        INSERT INTO book_fts(rowid, title, author) VALUES (new.id, new.title, new.author);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_fts_ad AFTER DELETE ON book BEGIN
+        INSERT INTO book_fts(book_fts, rowid, title, author) VALUES ('delete', old.id, old.title, old.author);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_fts_au AFTER UPDATE OF title, author ON book BEGIN
+        INSERT INTO book_fts(book_fts, rowid, title, author) VALUES ('delete', old.id, old.title, old.author);
+        INSERT INTO book_fts(rowid, title, author) VALUES (new.id, new.title, new.author);
+    END
+    """,
+    # 이미 들어있는 도서 색인
+    "INSERT INTO book_fts(book_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD_SQL = [
+    "DROP TRIGGER IF EXISTS book_fts_ai",
+    "DROP TRIGGER IF EXISTS book_fts_ad",
+    "DROP TRIGGER IF EXISTS book_fts_au",
+    "DROP TABLE IF EXISTS book_fts",
+]
+
+POSTGRES_FORWARD_SQL = [
+    "CREATE INDEX IF NOT EXISTS idx_book_title_fts ON book "
+    "USING GIN (to_tsvector('simple'::regconfig, COALESCE(title, '')))",
+    "CREATE INDEX IF NOT EXISTS idx_book_author_fts ON book "
+    "USING GIN (to_tsvector('simple'::regconfig, COALESCE(author, '')))",
+]
+
+POSTGRES_BACKWARD_SQL = [
+    "DROP INDEX IF EXISTS idx_book_title_fts",
+    "DROP INDEX IF EXISTS idx_book_author_fts",
+]
+
+
+def _sqlite_supports_trigram() -> bool:
+    """FTS5 trigram 토크나이저는 SQLite 3.34.0 이상에서만 사용 가능"""
+    import sqlite3
+    return sqlite3.sqlite_version_info >= (3, 34, 0)
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "sqlite":
+        # 지원하지 않는 SQLite면 인덱스 없이 진행 (검색은 icontains로 동작)
+        if not _sqlite_supports_trigram():
+            return
+        statements = SQLITE_FORWARD_SQL
+    elif connection.vendor == "postgresql":
+        statements = POSTGRES_FORWARD_SQL
+    else:
+        return
+
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "sqlite":
+        statements = SQLITE_BACKWARD_SQL
+    elif connection.vendor == "postgresql":
+        statements = POSTGRES_BACKWARD_SQL
+    else:
+        return
+
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:08
+
+from django.db import migrations, models
+from django.db.models.functions import Log
+
+
+# 이 마이그레이션 시점의 추천 점수 공식 (books/services/recommand.py 를 고쳐도 결과가 바뀌지 않도록 복사해 둠)
+POPULARITY_LOG_BASE = 100000
+TREND_BOOSTS = [(10, 1.50), (50, 1.3), (100, 1.1)]
+REVIEW_BOOSTS = [(9, 1.30), (7, 1.10)]
+
+
+def final_score_expression():
+    popularity = models.Case(
+        models.When(sales_point__gte=0, then=Log(POPULARITY_LOG_BASE, models.F('sales_point') + 1)),
+        default=models.Value(0.0),
+        output_field=models.FloatField(),
+    )
+    trend_boost = models.Case(
+        *[models.When(best_rank__lte=rank, then=models.Value(boost)) for rank, boost in TREND_BOOSTS],
+        default=models.Value(1.00),
+        output_field=models.FloatField(),
+    )
+    review_boost = models.Case(
+        *[models.When(customer_review_rank__gte=rank, then=models.Value(boost)) for rank, boost in REVIEW_BOOSTS],
+        default=models.Value(1.00),
+        output_field=models.FloatField(),
+    )
+    return models.ExpressionWrapper(popularity * trend_boost * review_boost, output_field=models.FloatField())
+
+
+def fill_final_score(apps, schema_editor):
+    """이미 들어있는 도서의 추천 점수 채우기"""
+    Book = apps.get_model('books', 'Book')
+    Book.objects.update(final_score=final_score_expression())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0002_book_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='final_score',
+            field=models.FloatField(default=0.0, help_text='sales_point / best_rank / customer_review_rank 로 미리 계산 (services/recommand.py)', verbose_name='추천 점수'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['-final_score'], name='idx_book_final_score'),
+        ),
+        migrations.RunPython(fill_final_score, migrations.RunPython.noop),
+    ]
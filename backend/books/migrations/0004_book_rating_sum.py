@@ -0,0 +1,46 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:40
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+# 이 마이그레이션 시점의 집계 쿼리 (books/services/rating_stats.py 를 고쳐도 결과가 바뀌지 않도록 복사해 둠)
+def rating_aggregate_updates(BookRating):
+    stats = BookRating.objects.filter(book=models.OuterRef('pk')).order_by().values('book')
+    decimal = models.DecimalField(max_digits=10, decimal_places=2)
+    return {
+        'rating_sum': Coalesce(
+            models.Subquery(stats.annotate(s=models.Sum('score')).values('s'), output_field=decimal),
+            models.Value(Decimal('0')),
+        ),
+        'rating_count': Coalesce(models.Subquery(stats.annotate(c=models.Count('id')).values('c')), 0),
+        'average_rating': Coalesce(
+            models.Subquery(stats.annotate(a=models.Avg('score')).values('a'), output_field=decimal),
+            models.Value(Decimal('0')),
+        ),
+    }
+
+
+def fill_rating_stats(apps, schema_editor):
+    """이미 있는 평점으로 합계 / 개수 / 평균 채우기"""
+    Book = apps.get_model('books', 'Book')
+    BookRating = apps.get_model('books', 'BookRating')
+    Book.objects.update(**rating_aggregate_updates(BookRating))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0003_book_final_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='rating_sum',
+            field=models.DecimalField(decimal_places=1, default=0, help_text='BookRating 점수 합계 (average_rating = rating_sum / rating_count)', max_digits=10, verbose_name='평점 합계'),
+        ),
+        migrations.RunPython(fill_rating_stats, migrations.RunPython.noop),
+    ]
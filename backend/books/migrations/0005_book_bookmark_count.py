@@ -0,0 +1,36 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:20
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+# 이 마이그레이션 시점의 집계 쿼리 (books/services/bookmarks.py 를 고쳐도 결과가 바뀌지 않도록 복사해 둠)
+def bookmark_count_update(Bookmark):
+    counts = (
+        Bookmark.objects.filter(book=models.OuterRef('pk')).order_by().values('book')
+        .annotate(c=models.Count('id')).values('c')
+    )
+    return {'bookmark_count': Coalesce(models.Subquery(counts), 0)}
+
+
+def fill_bookmark_count(apps, schema_editor):
+    """이미 있는 북마크 수 채우기"""
+    Book = apps.get_model('books', 'Book')
+    Bookmark = apps.get_model('books', 'Bookmark')
+    Book.objects.update(**bookmark_count_update(Bookmark))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0004_book_rating_sum'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='bookmark_count',
+            field=models.IntegerField(default=0, help_text='Bookmark 테이블 COUNT(*) 대신 사용', verbose_name='북마크 수'),
+        ),
+        migrations.RunPython(fill_bookmark_count, migrations.RunPython.noop),
+    ]
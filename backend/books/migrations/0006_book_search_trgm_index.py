@@ -0,0 +1,45 @@
+# 도서 검색 부분 문자열(icontains) 인덱스
+# - PostgreSQL : pg_trgm GIN 인덱스 (Django icontains 의 UPPER(컬럼::text) LIKE UPPER(...) 와 같은 표현식)
+#                → 띄어쓰기 없이 붙은 한글 부분 문자열 ('포터' → '해리포터') 도 인덱스로 검색
+# - SQLite     : 0002 의 FTS5 trigram 테이블이 이미 부분 문자열을 처리하므로 할 일 없음
+
+from django.db import migrations
+
+
+POSTGRES_FORWARD_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS idx_book_title_trgm ON book "
+    "USING GIN ((UPPER(title::text)) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS idx_book_author_trgm ON book "
+    "USING GIN ((UPPER(author::text)) gin_trgm_ops)",
+]
+
+POSTGRES_BACKWARD_SQL = [
+    "DROP INDEX IF EXISTS idx_book_title_trgm",
+    "DROP INDEX IF EXISTS idx_book_author_trgm",
+]
+
+
+def create_trgm_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for sql in POSTGRES_FORWARD_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_trgm_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for sql in POSTGRES_BACKWARD_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0005_book_bookmark_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trgm_index, drop_trgm_index),
+    ]
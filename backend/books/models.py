@@ -71,6 +71,13 @@ class Book(models.Model):
         verbose_name="알라딘 판매 지수",
         help_text="알라딘 API salesPoint 값 (누적 판매/인기 지표)"
     )
+
+    # 추천 후보 정렬용 점수 (Signal로 자동 업데이트)
+    final_score = models.FloatField(
+        default=0.0,
+        verbose_name="추천 점수",
+        help_text="sales_point / best_rank / customer_review_rank 로 미리 계산 (services/recommand.py)"
+    )
     
     
     #↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑#
@@ -81,7 +88,14 @@ class Book(models.Model):
 
 
 
-    # 우리 서비스 평점 (Signal로 자동 업데이트)
+    # 우리 서비스 평점 (Signal로 자동 업데이트 - 변화량만 더함, services/rating_stats.py)
+    rating_sum = models.DecimalField(
+        max_digits=10,
+        decimal_places=1,
+        default=0,
+        verbose_name='평점 합계',
+        help_text='BookRating 점수 합계 (average_rating = rating_sum / rating_count)'
+    )
     rating_count = models.IntegerField(
         default=0,
         verbose_name='평점 개수',
@@ -97,6 +111,13 @@ class Book(models.Model):
 
 
 
+    # 북마크 수 (토글 / 일괄 등록 시 함께 증감, services/bookmarks.py)
+    bookmark_count = models.IntegerField(
+        default=0,
+        verbose_name='북마크 수',
+        help_text='Bookmark 테이블 COUNT(*) 대신 사용'
+    )
+
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='생성일')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='수정일')
 
@@ -112,6 +133,7 @@ class Book(models.Model):
             models.Index(fields=['-best_rank'], name='idx_book_best_rank'),
             models.Index(fields=['-customer_review_rank'], name='idx_book_review_rank'),
             models.Index(fields=['-sales_point'], name='idx_book_sales_point'),
+            models.Index(fields=['-final_score'], name='idx_book_final_score'),
         ]
 
     def __str__(self):
@@ -1,22 +1,73 @@
 # books/serializers.py
 from rest_framework import serializers
 from .models import Book, BookRating, Category
+from .services.user_state import get_user_state
+from .services.bulk_sync import MAX_BULK_ITEMS
+from djangorestframework_camel_case.util import camel_to_underscore
+from bookmarket.renderers import CamelCaseKeysMixin
 # accounts 앱에 이미 정의된 UserSerializer를 가져옵니다.
 from accounts.serializers import UserSerializer
 
 
 # 도서의 카테고리를 상세하게 보여주기 위한 serializer
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(CamelCaseKeysMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ['id', 'name']
 
 
+# 목록 응답용 공통 기능 - ?fields= 로 필요한 필드만 골라 받기
+class SparseFieldsetMixin:
+    """
+    ?fields=id,title,bestRank 처럼 요청하면 해당 필드만 직렬화 (camelCase / snake_case 모두 허용)
+    - 없는 필드 이름은 무시, 'id' 는 항상 포함
+    - only_fields() 로 같은 기준의 .only() 컬럼 목록을 만들어 쿼리에서도 필요한 컬럼만 조회
+    """
+    fields_query_param = 'fields'
+    # 중첩 serializer 로 내려주는 관계 필드 → .only() 에 넣을 컬럼
+    related_only = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = self.requested_fields(self.context.get('request'))
+        if requested:
+            for name in set(self.fields) - requested:
+                self.fields.pop(name)
+
+    @classmethod
+    def requested_fields(cls, request):
+        """?fields= 에서 이 serializer 에 있는 필드만 골라냄 (없거나 전부 틀리면 None → 전체)"""
+        raw = request.query_params.get(cls.fields_query_param) if request is not None else None
+        if not raw:
+            return None
+        names = {camel_to_underscore(name.strip()) for name in raw.split(',') if name.strip()}
+        requested = names & set(cls.Meta.fields)
+        return (requested | {'id'}) if requested else None
+
+    @classmethod
+    def only_fields(cls, request=None, *extra):
+        """
+        queryset.only() 에 넘길 컬럼 목록
+        :param extra: 직렬화하지 않아도 꼭 필요한 컬럼 (예: 키셋 정렬 컬럼)
+        """
+        names = cls.requested_fields(request) or cls.Meta.fields
+        columns = list(extra)
+        for name in names:
+            columns.extend(cls.related_only.get(name, (name,)))
+        return columns
+
+
+# 목록 카드(BookCard.vue)에 필요한 필드만 (description / 가격 / 생성일 등 제외)
+BOOK_CARD_FIELDS = (
+    'id', 'title', 'author', 'cover', 'adult', 'best_rank', 'average_rating', 'rating_count',
+)
+
+
 # 1. 베스트셀러/일반 목록용 (북마크 정보 없음)
-class BookPreviewSerializer(serializers.ModelSerializer):
+class BookPreviewSerializer(CamelCaseKeysMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Book
-        fields = '__all__'     
+        fields = BOOK_CARD_FIELDS
 
 
 # 도서 평점을 위한 serializer
@@ -51,6 +102,10 @@ class BookDetailSerializer(serializers.ModelSerializer):
         # 로그인하지 않은 유저라면 북마크는 항상 False
         if not request or not request.user.is_authenticated:
             return False
+        # 뷰에서 미리 조회해둔 상태가 있으면 그대로 사용 (services/user_state.py)
+        state = get_user_state(obj, self.context)
+        if state is not None:
+            return state['is_bookmarked']
         # 해당 유저가 이 도서(obj)를 북마크했는지 DB에서 확인
         # Bookmark 클래스에서 Book을 외래키로 참조 (북마크에서 도서 찾기) - related_name='bookmarks'
         # 이 도서를 참조하고 있는 북마크들의 목록을 가져오기
@@ -65,6 +120,9 @@ class BookDetailSerializer(serializers.ModelSerializer):
         # 로그인하지 않은 유저라면 None 반환
         if not request or not request.user.is_authenticated:
             return None
+        state = get_user_state(obj, self.context)
+        if state is not None:
+            return state['user_rating']
         # 해당 유저가 이 도서에 준 평점이 있는지 확인
         try:
             rating = BookRating.objects.get(user=request.user, book=obj)
@@ -79,7 +137,11 @@ class BookDetailSerializer(serializers.ModelSerializer):
         # 상세 정보에 관련된 중고 거래 목록을 확인해야 함
         from trades.models import Trade
         from trades.serializers import TradePreviewSerializer
-        trades = Trade.objects.filter(book=obj).select_related('user')
+        # 뷰에서 Prefetch 해둔 목록이 있으면 추가 쿼리 없이 사용
+        if 'trades' in getattr(obj, '_prefetched_objects_cache', {}):
+            trades = obj.trades.all()
+        else:
+            trades = Trade.objects.filter(book=obj).select_related('user')
         serializer = TradePreviewSerializer(trades, many=True)
         return serializer.data    
 
@@ -89,19 +151,22 @@ class BookDetailSerializer(serializers.ModelSerializer):
 
 
 # 4. 알고리즘 신 (검색)
-class BookSearchSerializer(serializers.ModelSerializer):
+class BookSearchSerializer(CamelCaseKeysMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     # 카테고리 serializer 추가 (이름 확인)
     category = CategorySerializer(read_only=True)
+    related_only = {'category': ('category', 'category__name')}
+
     class Meta:
         model = Book
-        fields = '__all__'
+        # 메인 화면에서 검색 결과를 리뷰 랭킹 / 출판일로 다시 거르므로 두 필드 추가
+        fields = BOOK_CARD_FIELDS + ('publisher', 'customer_review_rank', 'pub_date', 'category')
 
 
 # 3. 베스트 셀러 목록들
-class BookBestSellerSerializer(serializers.ModelSerializer):
+class BookBestSellerSerializer(CamelCaseKeysMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Book
-        fields = '__all__'
+        fields = BOOK_CARD_FIELDS
 
 
 # 중고거래 페이지용
@@ -121,13 +186,13 @@ class BookAutocompleteSerializer(serializers.ModelSerializer):
 
     
 class BookAIInputSerializer(serializers.ModelSerializer):
-    category = serializers.IntegerField(source="category.id", read_only=True)
+    # AI가 읽을 수 있게 카테고리는 이름으로 전달 (표지 URL은 AI에게 필요 없으므로 제외)
+    category = serializers.CharField(source="category.name", read_only=True, default=None)
     class Meta:
         model = Book
         fields = [
             "id",
             "title",
-            "cover",
             "category",
             "author",
             "publisher",
@@ -139,3 +204,22 @@ class BookAIInputSerializer(serializers.ModelSerializer):
         ]
           
     
+
+
+# 평점 / 북마크 일괄 등록 API용 (services/bulk_sync.py)
+class BulkRatingItemSerializer(serializers.Serializer):
+    book_id = serializers.IntegerField(min_value=1)
+    score = serializers.DecimalField(max_digits=2, decimal_places=1, min_value=0, max_value=5)
+
+
+class BulkRatingSerializer(serializers.Serializer):
+    items = serializers.ListField(child=BulkRatingItemSerializer(), allow_empty=False, max_length=MAX_BULK_ITEMS)
+
+
+class BulkBookmarkItemSerializer(serializers.Serializer):
+    book_id = serializers.IntegerField(min_value=1)
+    is_bookmarked = serializers.BooleanField()
+
+
+class BulkBookmarkSerializer(serializers.Serializer):
+    items = serializers.ListField(child=BulkBookmarkItemSerializer(), allow_empty=False, max_length=MAX_BULK_ITEMS)
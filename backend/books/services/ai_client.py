@@ -1,27 +1,359 @@
 # books/services/ai_client.py
+import asyncio
+import copy
+import hashlib
 import json
+import os
+import tempfile
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
 from django.conf import settings
 
 
+# ─────────────────────────────
+# 추천 응답 캐시
+# ─────────────────────────────
+def make_recommend_fingerprint(mbti_code, category_ids, user_prompt, candidate_ids) -> str:
+    """
+    같은 질문인지 판별하는 캐시 키
+    (MBTI 코드, 정렬된 카테고리, 정규화된 프롬프트, 후보 도서 ID 집합)
+    - 후보는 AI 편향 방지용으로 셔플되므로 정렬해서 순서 영향 제거
+    - 프롬프트는 대소문자 / 연속 공백 차이 무시
+    """
+    normalized = {
+        "mbti": mbti_code or "",
+        "categories": sorted({int(category_id) for category_id in category_ids or []}),
+        "prompt": " ".join((user_prompt or "").split()).lower(),
+        "candidates": sorted({int(book_id) for book_id in candidate_ids or []}),
+    }
+    raw = json.dumps(normalized, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LocMemRecommendCacheBackend:
+    """프로세스 메모리 캐시 (TTL + LRU)"""
+
+    def __init__(self, max_entries: int, **kwargs):
+        self.max_entries = max_entries
+        self._data = OrderedDict()   # key → (만료 시각, 값)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._data[key]
+                return None
+            # 최근 사용 → 맨 뒤로 (LRU)
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: int):
+        with self._lock:
+            self._data[key] = (time.time() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                # 가장 오래 안 쓴 항목부터 제거
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class FileRecommendCacheBackend:
+    """
+    파일 캐시 (TTL + LRU)
+    - 항목 하나당 JSON 파일 하나, 파일 수정 시각을 마지막 사용 시각으로 사용
+    - 서버를 재시작하거나 워커가 여러 개여도 같은 디렉터리를 공유
+      - 쓰기는 호출마다 다른 임시 파일에 쓴 뒤 rename (같은 키를 동시에 써도 서로 덮어쓰지 않음)
+      - 읽을 수 없거나 형식이 다른 파일은 캐시 미스로 처리 (다른 버전이 쓴 파일 등)
+    """
+
+    def __init__(self, max_entries: int, location, **kwargs):
+        self.max_entries = max_entries
+        self.location = Path(location)
+        self.location.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _path(self, key) -> Path:
+        return self.location / f"{key}.json"
+
+    @staticmethod
+    def _touch(path):
+        """마지막 사용 시각 기록 (LRU)"""
+        now = time.time()
+        os.utime(path, (now, now))
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            expires_at, value = float(entry["expires_at"]), entry["value"]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError, KeyError):
+            # 깨진 항목은 지우고 미스 처리
+            path.unlink(missing_ok=True)
+            return None
+
+        if expires_at < time.time():
+            path.unlink(missing_ok=True)
+            return None
+        try:
+            self._touch(path)
+        except FileNotFoundError:
+            # 그 사이 다른 워커가 지움 (값은 이미 읽었으므로 그대로 사용)
+            pass
+        return value
+
+    def set(self, key, value, ttl: int):
+        path = self._path(key)
+        # 다른 워커가 쓰다 만 파일을 읽지 않도록 고유한 임시 파일에 쓴 뒤 rename으로 교체
+        tmp = tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=self.location, prefix=f".{key}.", suffix=".tmp", delete=False,
+        )
+        try:
+            with tmp:
+                json.dump({"expires_at": time.time() + ttl, "value": value}, tmp, ensure_ascii=False)
+            os.replace(tmp.name, path)
+        except BaseException:
+            Path(tmp.name).unlink(missing_ok=True)
+            raise
+        self._touch(path)
+        self._evict()
+
+    def _evict(self):
+        with self._lock:
+            files = []
+            for path in self.location.glob("*.json"):
+                try:
+                    files.append((path.stat().st_mtime, path))
+                except FileNotFoundError:
+                    continue
+            if len(files) <= self.max_entries:
+                return
+            files.sort(key=lambda item: item[0])
+            for _, old in files[:len(files) - self.max_entries]:
+                old.unlink(missing_ok=True)
+
+    def clear(self):
+        for path in self.location.glob("*.json"):
+            path.unlink(missing_ok=True)
+
+    def __len__(self):
+        return sum(1 for _ in self.location.glob("*.json"))
+
+
+RECOMMEND_CACHE_BACKENDS = {
+    "locmem": LocMemRecommendCacheBackend,
+    "file": FileRecommendCacheBackend,
+}
+
+
+class RecommendCache:
+    """
+    LLM 추천 응답 캐시 + 적중/미스 카운터
+    settings.RECOMMEND_CACHE 로 설정
+    """
+
+    DEFAULTS = {
+        "BACKEND": "locmem",   # 'locmem' | 'file'
+        "TTL": 600,            # 초
+        "MAX_ENTRIES": 500,
+        "LOCATION": None,      # file 백엔드 저장 경로
+    }
+
+    def __init__(self, options=None):
+        options = {**self.DEFAULTS, **(options or {})}
+        self.ttl = options["TTL"]
+        self.backend = RECOMMEND_CACHE_BACKENDS[options["BACKEND"]](
+            max_entries=options["MAX_ENTRIES"],
+            location=options["LOCATION"],
+        )
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        # 호출하는 쪽에서 값을 고쳐도 캐시 원본은 그대로 유지
+        return copy.deepcopy(value)
+
+    def set(self, key, value):
+        self.backend.set(key, copy.deepcopy(value), self.ttl)
+
+    def clear(self):
+        self.backend.clear()
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "size": len(self.backend),
+        }
+
+
+# ─────────────────────────────
+# 스트리밍 응답 파서
+# ─────────────────────────────
+class LLMStreamError(Exception):
+    """스트리밍 호출 실패 (HTTP 오류 / 깨진 SSE 이벤트 / 추천 결과 없음)"""
+
+    def __init__(self, detail: dict):
+        super().__init__(detail.get("error"))
+        self.detail = detail
+
+
+class RecommendationStreamParser:
+    """
+    AI가 토큰 단위로 보내는 JSON 텍스트를 조금씩 받아서
+    "recommendations" 배열의 원소(추천 1권)가 닫히는 순간 바로 꺼내주는 증분 파서
+
+        parser = RecommendationStreamParser()
+        for chunk in chunks:
+            for item in parser.feed(chunk):
+                ...  # 완성된 추천 1권
+
+    - 문자열 안의 중괄호 / 이스케이프된 따옴표는 깊이 계산에서 제외
+    - 배열 앞의 텍스트(마크다운 코드펜스 등)는 무시
+    """
+
+    ARRAY_KEY = '"recommendations"'
+
+    def __init__(self):
+        self._prefix = []        # 배열 시작 전까지 받은 텍스트
+        self._in_array = False
+        self._finished = False
+        self._depth = 0          # 현재 원소 안에서의 괄호 깊이
+        self._buffer = []        # 현재 원소 텍스트
+        self._in_string = False
+        self._escape = False
+        self.text = []           # 전체 응답 (파싱 실패 시 디버깅용)
+
+    def feed(self, chunk: str) -> list:
+        self.text.append(chunk)
+        items = []
+
+        for ch in chunk:
+            if self._finished:
+                break
+
+            # 1. "recommendations": [ 가 나올 때까지 대기
+            if not self._in_array:
+                self._prefix.append(ch)
+                if ch == "[" and self.ARRAY_KEY in "".join(self._prefix):
+                    self._in_array = True
+                continue
+
+            # 2. 배열 안, 원소 사이
+            if self._depth == 0:
+                if ch == "{":
+                    self._depth = 1
+                    self._buffer = [ch]
+                elif ch == "]":
+                    self._finished = True
+                continue
+
+            # 3. 원소 안
+            self._buffer.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        items.append(json.loads("".join(self._buffer)))
+                    except json.JSONDecodeError:
+                        # 형식이 깨진 원소는 건너뜀
+                        pass
+                    self._buffer = []
+
+        return items
+
+
 class LLMClient:
     """
     SSAFY GMS OpenAI 프록시 호출 클라이언트
+
+    - 동기  : requests.Session (keep-alive 커넥션 풀 재사용)
+    - 비동기 : httpx.AsyncClient (이벤트 루프마다 1개, keep-alive 커넥션 풀)
+    - settings.LLM_ENDPOINT 로 호출 주소 변경 가능 (로컬 스텁 서버 테스트용)
     """
 
     ENDPOINT = "https://gms.ssafy.io/gmsapi/api.openai.com/v1/chat/completions"
+    MODEL = "gpt-4o-mini"
+    TIMEOUT = 30
 
-    def __init__(self):
-        self.api_key = settings.OPENAI_API_KEY # 👉 GMS KEY
+    # 커넥션 풀 크기
+    MAX_CONNECTIONS = 100
+    MAX_KEEPALIVE_CONNECTIONS = 20
+
+    def __init__(self, endpoint: str = None, api_key: str = None):
+        self.endpoint = endpoint or getattr(settings, "LLM_ENDPOINT", None) or self.ENDPOINT
+        self.api_key = api_key or settings.OPENAI_API_KEY # 👉 GMS KEY
+        self.cache = RecommendCache(getattr(settings, "RECOMMEND_CACHE", None))
+
+        # 동기 호출용 커넥션 풀
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.MAX_KEEPALIVE_CONNECTIONS,
+        )
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
 
-    def recommend_books(self, prompt: str) -> dict:
-        headers = {
+        # 비동기 호출용 클라이언트 (이벤트 루프 → AsyncClient)
+        # httpx 커넥션은 만들어진 루프에서만 쓸 수 있어서 루프마다 따로 둠
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    # ─────────────────────────────
+    # 요청 / 응답 공통 처리
+    # ─────────────────────────────
+    def _headers(self) -> dict:
+        return {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.api_key}",
         }
 
-        payload = {
-            "model": "gpt-4o-mini",
+    def _payload(self, prompt: str) -> dict:
+        return {
+            "model": self.MODEL,
             "messages": [
                 {
                     "role": "developer",
@@ -35,21 +367,16 @@ class LLMClient:
             "temperature": 0.5,
         }
 
-        response = requests.post(
-            self.ENDPOINT,
-            headers=headers,
-            json=payload,
-            timeout=30,
-        )
-
-        if response.status_code != 200:
+    @staticmethod
+    def _parse_response(status_code: int, text: str) -> dict:
+        if status_code != 200:
             return {
                 "error": "GMS OpenAI API error",
-                "status_code": response.status_code,
-                "detail": response.text,
+                "status_code": status_code,
+                "detail": text,
             }
 
-        content = response.json()["choices"][0]["message"]["content"]
+        content = json.loads(text)["choices"][0]["message"]["content"]
 
         try:
             return json.loads(content)
@@ -59,6 +386,148 @@ class LLMClient:
                 "raw_response": content,
             }
 
+    # ─────────────────────────────
+    # 동기 호출
+    # ─────────────────────────────
+    def recommend_books(self, prompt: str, cache_key: str = None) -> dict:
+        """
+        :param cache_key: make_recommend_fingerprint() 값
+                          같은 키로 최근에 받은 응답이 있으면 AI를 호출하지 않고 바로 반환
+        """
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        result = self._request_recommendation(prompt)
+
+        # 오류 응답은 캐시하지 않음
+        if cache_key and "error" not in result:
+            self.cache.set(cache_key, result)
+        return result
+
+    def _request_recommendation(self, prompt: str) -> dict:
+        response = self._session.post(
+            self.endpoint,
+            headers=self._headers(),
+            json=self._payload(prompt),
+            timeout=self.TIMEOUT,
+        )
+        return self._parse_response(response.status_code, response.text)
+
+    # ─────────────────────────────
+    # 스트리밍 호출 (SSE 추천용)
+    # ─────────────────────────────
+    def stream_recommend_books(self, prompt: str, cache_key: str = None):
+        """
+        추천 도서를 1권씩 완성되는 대로 yield 하는 제너레이터
+        - 캐시에 있으면 캐시된 추천을 바로 yield
+        - 실패 시 LLMStreamError
+        """
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                yield from cached.get("recommendations", [])
+                return
+
+        payload = {**self._payload(prompt), "stream": True}
+        items = []
+        parser = RecommendationStreamParser()
+
+        with self._session.post(
+            self.endpoint,
+            headers=self._headers(),
+            json=payload,
+            timeout=self.TIMEOUT,
+            stream=True,
+        ) as response:
+            if response.status_code != 200:
+                raise LLMStreamError({
+                    "error": "GMS OpenAI API error",
+                    "status_code": response.status_code,
+                    "detail": response.text,
+                })
+
+            # text/event-stream 은 charset이 없어서 requests가 latin-1로 읽으므로 직접 지정
+            response.encoding = "utf-8"
+            for line in response.iter_lines(decode_unicode=True):
+                # OpenAI SSE: "data: {...}" / "data: [DONE]"
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+
+                try:
+                    choices = json.loads(data).get("choices") or [{}]
+                except (ValueError, AttributeError):
+                    # 잘린 / 형식이 깨진 이벤트 → 뷰가 error 이벤트로 내보내도록 변환
+                    raise LLMStreamError({
+                        "error": "AI stream event is not valid JSON",
+                        "raw_event": data,
+                    }) from None
+                delta = choices[0].get("delta", {}).get("content")
+                if not delta:
+                    continue
+
+                for item in parser.feed(delta):
+                    items.append(item)
+                    yield item
+
+        if not items:
+            raise LLMStreamError({
+                "error": "AI response is not valid JSON",
+                "raw_response": "".join(parser.text),
+            })
+
+        if cache_key:
+            self.cache.set(cache_key, {"recommendations": items})
+
+    # ─────────────────────────────
+    # 비동기 호출 (ASGI 비동기 뷰용)
+    # ─────────────────────────────
+    def _get_async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(
+                timeout=self.TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=self.MAX_CONNECTIONS,
+                    max_keepalive_connections=self.MAX_KEEPALIVE_CONNECTIONS,
+                ),
+            )
+            self._async_clients[loop] = client
+        return client
+
+    async def arecommend_books(self, prompt: str, cache_key: str = None) -> dict:
+        """recommend_books() 의 비동기 버전 (AI 응답을 기다리는 동안 워커를 붙잡지 않음)"""
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        result = await self._arequest_recommendation(prompt)
+
+        if cache_key and "error" not in result:
+            self.cache.set(cache_key, result)
+        return result
+
+    async def _arequest_recommendation(self, prompt: str) -> dict:
+        client = self._get_async_client()
+        response = await client.post(
+            self.endpoint,
+            headers=self._headers(),
+            json=self._payload(prompt),
+        )
+        return self._parse_response(response.status_code, response.text)
+
+    async def aclose(self):
+        """현재 이벤트 루프의 비동기 커넥션 풀 정리"""
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
 
 # 전역 인스턴스
 llm_client = LLMClient()
@@ -1,9 +1,154 @@
 # books/services/ai_prompt.py
+import html
+import logging
+import re
+
+from django.conf import settings
+from django.dispatch import Signal
+
+
+logger = logging.getLogger(__name__)
+
+
+# ─────────────────────────────
+# 프롬프트 크기 측정 훅
+# ─────────────────────────────
+# 프롬프트가 만들어질 때마다 발송
+# receiver(sender, chars, tokens, candidate_count, dropped_count, description_chars, **kwargs)
+recommend_prompt_built = Signal()
+
+
+# ─────────────────────────────
+# 후보 도서 압축 설정
+# ─────────────────────────────
+# settings.RECOMMEND_PROMPT 로 덮어쓸 수 있음
+DEFAULT_PROMPT_OPTIONS = {
+    "TOKEN_BUDGET": 6000,       # 프롬프트 전체 (지시문 + 후보 목록) 추정 토큰 상한
+    "DESCRIPTION_CHARS": 160,   # 도서 1권당 소개글 최대 글자 수
+}
+
+# 후보 목록 한 줄 형식 (프롬프트에 컬럼 설명으로 같이 들어감)
+CANDIDATE_COLUMNS = "id|title|author|publisher|category|year|summary"
+
+_HTML_TAG = re.compile(r"<[^>]+>")
+_SENTENCE_END = re.compile(r"(?<=[.!?。])\s")
+
+
+def _prompt_options() -> dict:
+    return {**DEFAULT_PROMPT_OPTIONS, **getattr(settings, "RECOMMEND_PROMPT", {})}
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    토크나이저 없이 쓰는 대략적인 토큰 수
+    - 영문 / 숫자 / 기호(ASCII) : 4글자당 1토큰
+    - 한글 등 비ASCII           : 1글자당 1토큰
+    """
+    ascii_count = sum(1 for ch in text if ord(ch) < 128)
+    return ascii_count // 4 + (len(text) - ascii_count)
+
+
+def _clean(text) -> str:
+    """HTML 태그 / 엔티티 제거 + 공백 정리 + 구분자(|) 제거"""
+    text = html.unescape(_HTML_TAG.sub(" ", str(text or "")))
+    return " ".join(text.replace("|", "/").split())
+
+
+def summarize_description(text, limit: int) -> str:
+    """
+    소개글을 limit 글자 이내로 줄임
+    - 문장 단위로 앞에서부터 채우고, 첫 문장부터 길면 잘라서 '…' 표시
+    """
+    text = _clean(text)
+    if limit <= 0:
+        return ""
+    if len(text) <= limit:
+        return text
+
+    summary = ""
+    for sentence in _SENTENCE_END.split(text):
+        if len(summary) + len(sentence) + 1 > limit:
+            break
+        summary = f"{summary} {sentence}".strip()
+    return summary or text[:limit - 1] + "…"
+
+
+def encode_candidate(book: dict, description_chars: int) -> str:
+    """BookAIInputSerializer 데이터 1건 → 후보 목록 한 줄"""
+    pub_date = book.get("pub_date") or ""
+    return "|".join([
+        str(book["id"]),
+        _clean(book.get("title")),
+        _clean(book.get("author")),
+        _clean(book.get("publisher")),
+        _clean(book.get("category")),
+        str(pub_date)[:4],
+        summarize_description(book.get("description"), description_chars),
+    ])
+
+
+def encode_candidates(books_payload: list, token_budget: int, description_chars: int):
+    """
+    후보 목록을 토큰 예산 안에 맞춰 인코딩
+
+    1) 소개글 길이를 절반씩 줄여가며 전체 후보가 들어가는지 확인
+    2) 소개글 없이도 넘치면 뒤쪽 후보부터 제외 (후보는 이미 셔플된 상태)
+
+    :return: (후보 목록 텍스트, 실제 포함된 후보 수, 사용한 소개글 길이)
+    """
+    limit = description_chars
+    while True:
+        lines = [encode_candidate(book, limit) for book in books_payload]
+        if limit == 0 or estimate_tokens("\n".join(lines)) <= token_budget:
+            break
+        limit //= 2
+
+    used = 0
+    kept = []
+    for line in lines:
+        cost = estimate_tokens(line) + 1
+        if used + cost > token_budget:
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept), len(kept), limit
+
+
 def build_recommend_prompt(
     mbti_info: str,
     user_prompt: str,
     books_payload: list
     ) -> str:
+    options = _prompt_options()
+
+    # 지시문만으로 쓰는 토큰을 빼고 남은 만큼 후보 목록에 배정
+    base_tokens = estimate_tokens(_render_prompt(mbti_info, user_prompt, ""))
+    candidates, kept, description_chars = encode_candidates(
+        books_payload,
+        token_budget=max(options["TOKEN_BUDGET"] - base_tokens, 0),
+        description_chars=options["DESCRIPTION_CHARS"],
+    )
+    prompt = _render_prompt(mbti_info, user_prompt, candidates)
+
+    # 📏 요청별 프롬프트 크기 기록
+    tokens = estimate_tokens(prompt)
+    dropped = len(books_payload) - kept
+    logger.info(
+        "recommend prompt: %d chars, ~%d tokens, %d candidates (%d dropped, summary %d chars)",
+        len(prompt), tokens, kept, dropped, description_chars,
+    )
+    recommend_prompt_built.send(
+        sender=build_recommend_prompt,
+        chars=len(prompt),
+        tokens=tokens,
+        candidate_count=kept,
+        dropped_count=dropped,
+        description_chars=description_chars,
+    )
+    return prompt
+
+
+def _render_prompt(mbti_info: str, user_prompt: str, candidates: str) -> str:
     # 60세 서점 할아버지 바이브로 말하도록 지시
     return f"""
         You are NOT a generic AI assistant.
@@ -32,17 +177,14 @@ def build_recommend_prompt(
             "recommendations": [
                 {{
                     "id": <book_id from candidate list>,
-                    "title": "책 제목",
-                    "author": "저자명",
-                    "cover": "표지 URL",
-                    "category": <category_id>,
-                    "description": "할아버지의 따뜻한 추천 이유 (어르신 말투 사용)"
+                    "reason": "할아버지의 따뜻한 추천 이유 (어르신 말투 사용)"
                 }},
                 ... (총 3권)
             ]
         }}
         - CRITICAL: You MUST include the "id" field from the candidate book data.
-        - The "description" field should contain your warm, elderly-style recommendation explanation.
+        - Return ONLY "id" and "reason". Do NOT repeat the title, author or any other book field.
+        - The "reason" field should contain your warm, elderly-style recommendation explanation.
 
         ────────────────────────
         Speaking Style Rules:
@@ -72,5 +214,6 @@ def build_recommend_prompt(
 
         ────────────────────────
         [Candidate Books]
-        {books_payload}
+        One book per line: {CANDIDATE_COLUMNS}
+{candidates}
     """
\ No newline at end of file
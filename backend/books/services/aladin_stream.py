@@ -0,0 +1,173 @@
+"""
+books/services/aladin_stream.py
+
+알라딘 도서 덤프(book_raw.json) → Book loaddata fixture 변환 (스트리밍)
+
+정책 요약:
+- 원본 전체를 json.load 하지 않고 JSONDecoder.raw_decode 로 도서 1권씩 읽음
+  (JSON 배열 / JSON Lines 둘 다 지원) → 파일이 몇 GB 여도 메모리 사용량 일정
+- 카테고리 매핑은 {cid: category_pk} dict 로 미리 만들어 두고 O(1) 조회
+  (같은 cid 가 여러 대분류에 있으면 categories.json 에서 먼저 나온 대분류)
+- 정리(HTML 엔티티 / 태그 / 공백 / 저자 괄호)도 읽는 즉시 같이 처리
+- 결과는 한 번만, 바로 파일에 씀
+  - jsonl (기본) : 한 줄에 도서 1권 → loaddata 도 한 줄씩 읽으므로 적재 시에도 메모리 일정
+  - json         : 들여쓰기 없는 JSON 배열 (한 줄에 도서 1권)
+"""
+
+import html
+import json
+import re
+
+
+CHUNK_SIZE = 1 << 20  # 1MB 씩 읽기
+
+# 알라딘 API 키 → Book 모델 필드
+FIELD_MAP = {
+    "title": "title",
+    "isbn13": "isbn",  # 2007년 이후로 isbn13이 책 번호 표준
+    "author": "author",
+    "publisher": "publisher",
+    "pubDate": "pub_date",
+    "cover": "cover",
+    "description": "description",
+    "priceStandard": "price_standard",
+    "priceSales": "price_sales",
+    "salesPoint": "sales_point",
+    "adult": "adult",
+    "itemId": "item_id",
+    "mallType": "mall_type",
+    "customerReviewRank": "customer_review_rank",
+    "bestRank": "best_rank",
+}
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_SPACE_RE = re.compile(r"\s+")
+_AUTHOR_RE = re.compile(r"^(.*?)\(")
+
+
+# ─────────────────────────────
+# 스트리밍 JSON 읽기
+# ─────────────────────────────
+def iter_json_records(fp, chunk_size=CHUNK_SIZE):
+    """
+    JSON 배열 ([{...}, {...}]) 또는 JSON Lines 파일에서 객체를 하나씩 꺼냄
+    - 버퍼에는 아직 처리하지 않은 부분(보통 객체 1개 미만)만 남김
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+    while True:
+        # 구분자(공백 / 배열 괄호 / 쉼표) 건너뛰기
+        while pos < len(buffer) and buffer[pos] in " \t\r\n[],":
+            pos += 1
+        if pos < len(buffer):
+            try:
+                record, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # 객체가 청크 경계에서 잘림 → 더 읽어서 다시 시도
+            else:
+                yield record
+                pos = end
+                continue
+        elif eof:
+            return
+
+        chunk = fp.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+
+# ─────────────────────────────
+# 카테고리 매핑
+# ─────────────────────────────
+def build_cid_map(categories) -> dict:
+    """categories.json → {cid: category_pk}"""
+    cid_map = {}
+    for category in categories:
+        for cid in category.get("cid", []):
+            cid_map.setdefault(int(cid), category["pk"])
+    return cid_map
+
+
+# ─────────────────────────────
+# 정리
+# ─────────────────────────────
+def clean_text(value) -> str:
+    """HTML 엔티티 디코딩 + 태그 제거 + 연속 공백 정리"""
+    if not value:
+        return ""
+    text = _TAG_RE.sub("", html.unescape(value))
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+def clean_author(value) -> str:
+    """'황석영 (지은이)' → '황석영' ('(' 이전까지, 괄호가 없으면 원본 그대로)"""
+    match = _AUTHOR_RE.search(value or "")
+    return clean_text(match.group(1).strip() if match else value)
+
+
+def to_fixture_fields(book: dict, category_pk: int, timestamp: str) -> dict:
+    fields = {"category_id": category_pk}
+    for key, field in FIELD_MAP.items():
+        if key in book:
+            fields[field] = book[key]
+
+    if "description" in fields:
+        fields["description"] = clean_text(fields["description"])
+    if "author" in fields:
+        fields["author"] = clean_author(fields["author"])
+    if "title" in fields:
+        fields["title"] = clean_text(fields["title"])
+
+    # auto_now_add, auto_now 필드 (loaddata 시 필수)
+    fields["created_at"] = timestamp
+    fields["updated_at"] = timestamp
+    return fields
+
+
+def iter_book_fixtures(records, cid_map: dict, timestamp: str, stats: dict):
+    """
+    원본 도서 → fixture entry (pk 는 1부터 순서대로)
+    :param stats: {'read', 'written', 'skipped', 'categories': {pk: 권수}} 를 채움
+    """
+    stats.setdefault("categories", {})
+    pk = 0
+    for book in records:
+        stats["read"] = stats.get("read", 0) + 1
+        try:
+            category_pk = cid_map.get(int(book.get("categoryId")))
+        except (TypeError, ValueError):
+            category_pk = None
+        if category_pk is None:
+            stats["skipped"] = stats.get("skipped", 0) + 1
+            continue
+
+        pk += 1
+        stats["written"] = pk
+        stats["categories"][category_pk] = stats["categories"].get(category_pk, 0) + 1
+        yield {"model": "books.book", "pk": pk, "fields": to_fixture_fields(book, category_pk, timestamp)}
+
+
+# ─────────────────────────────
+# 쓰기
+# ─────────────────────────────
+def write_fixtures(entries, fp, fmt="jsonl") -> None:
+    """entry 를 하나씩 바로 파일에 씀 (fmt: 'jsonl' / 'json')"""
+    def dumps(entry):
+        return json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+
+    if fmt == "jsonl":
+        for entry in entries:
+            fp.write(dumps(entry))
+            fp.write("\n")
+        return
+
+    fp.write("[")
+    for index, entry in enumerate(entries):
+        fp.write(",\n" if index else "\n")
+        fp.write(dumps(entry))
+    fp.write("\n]\n")
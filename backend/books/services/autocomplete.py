@@ -0,0 +1,380 @@
+"""
+books/services/autocomplete.py
+
+중고거래 글 작성 화면의 '도서 선택' 자동완성에서 사용되는
+메모리 상주 도서 제목 인덱스
+
+정책 요약:
+- DB를 전혀 조회하지 않고 (최초 1회 적재 제외) 메모리에서만 응답
+- 한글은 자모 단위로 분해해서 색인 → 입력 중인 글자('핼' → '해리')도 매칭
+- 초성만 입력하면 초성 검색 ('ㅎㄹㅍㅌ' → '해리포터')
+- 자모 bigram 역색인(posting set) 교집합 → 후보 검증 → 제목순 상위 N개
+  (후보가 너무 많은 짧은 검색어는 제목순 목록을 앞에서부터 훑다가 N개 채우면 중단)
+- Book 저장/삭제 시그널로 증분 갱신 (signals.py)
+- 조회 때마다 공용 캐시의 인덱스 버전(catalog_cache.get_index_version)과 비교
+  → 다른 워커 / 적재 커멘드(load_catalog)에서 도서가 바뀌었으면 다시 적재
+- 다시 적재는 백그라운드 스레드에서 새 인덱스를 만든 뒤 통째로 교체 (중고거래 비트맵 인덱스와 같은 방식)
+  → 적재하는 동안 조회는 기존 인덱스로 바로 응답, 그 사이 시그널 변경은 교체 후 다시 반영
+
+주의:
+- 인덱스는 프로세스마다 따로 존재함 (버전이 바뀐 뒤 첫 조회에서 그 프로세스만 다시 적재)
+- 최초 적재는 돌려줄 인덱스가 없으므로 요청 스레드에서 끝날 때까지 기다림
+"""
+
+import bisect
+import heapq
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connection
+
+from books.models import Book
+from books.services.catalog_cache import check_index_version, get_index_version
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "BACKGROUND": True,     # False 면 요청 스레드에서 바로 다시 적재 (테스트 / 단일 프로세스용)
+}
+
+
+def get_autocomplete_index_settings() -> dict:
+    return {**DEFAULTS, **getattr(settings, "AUTOCOMPLETE_INDEX", {})}
+
+
+# ─────────────────────────────
+# 한글 자모 분해 테이블
+# ─────────────────────────────
+HANGUL_BASE = 0xAC00
+HANGUL_LAST = 0xD7A3
+
+CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+JUNGSEONG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+JONGSEONG = ["", "ㄱ", "ㄲ", "ㄳ", "ㄴ", "ㄵ", "ㄶ", "ㄷ", "ㄹ", "ㄺ", "ㄻ", "ㄼ", "ㄽ", "ㄾ",
+             "ㄿ", "ㅀ", "ㅁ", "ㅂ", "ㅄ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ"]
+
+# 겹모음 / 겹받침은 입력 순서대로 풀어서 색인
+# ('닭' 을 치는 중간 상태 '달ㄱ' 도 같은 자모열이 되도록)
+COMPOUND_JAMO = {
+    "ㅘ": "ㅗㅏ", "ㅙ": "ㅗㅐ", "ㅚ": "ㅗㅣ", "ㅝ": "ㅜㅓ", "ㅞ": "ㅜㅔ", "ㅟ": "ㅜㅣ", "ㅢ": "ㅡㅣ",
+    "ㄳ": "ㄱㅅ", "ㄵ": "ㄴㅈ", "ㄶ": "ㄴㅎ", "ㄺ": "ㄹㄱ", "ㄻ": "ㄹㅁ", "ㄼ": "ㄹㅂ", "ㄽ": "ㄹㅅ",
+    "ㄾ": "ㄹㅌ", "ㄿ": "ㄹㅍ", "ㅀ": "ㄹㅎ", "ㅄ": "ㅂㅅ",
+}
+
+# 호환용 자음 (ㄱ ~ ㅎ)
+CONSONANTS = frozenset("ㄱㄲㄳㄴㄵㄶㄷㄸㄹㄺㄻㄼㄽㄾㄿㅀㅁㅂㅃㅄㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ")
+
+
+def _normalize(text: str) -> str:
+    """대소문자 / 띄어쓰기 무시"""
+    return "".join((text or "").lower().split())
+
+
+def decompose_jamo(text: str) -> str:
+    """'해리' → 'ㅎㅐㄹㅣ' (한글 이외 문자는 그대로)"""
+    result = []
+    for ch in _normalize(text):
+        code = ord(ch)
+        if HANGUL_BASE <= code <= HANGUL_LAST:
+            offset = code - HANGUL_BASE
+            jamos = (
+                CHOSEONG[offset // 588],
+                JUNGSEONG[(offset % 588) // 28],
+                JONGSEONG[offset % 28],
+            )
+            for jamo in jamos:
+                result.append(COMPOUND_JAMO.get(jamo, jamo))
+        else:
+            result.append(COMPOUND_JAMO.get(ch, ch))
+    return "".join(result)
+
+
+def extract_choseong(text: str) -> str:
+    """'해리포터' → 'ㅎㄹㅍㅌ' (한글 이외 문자는 그대로)"""
+    result = []
+    for ch in _normalize(text):
+        code = ord(ch)
+        if HANGUL_BASE <= code <= HANGUL_LAST:
+            result.append(CHOSEONG[(code - HANGUL_BASE) // 588])
+        else:
+            result.append(ch)
+    return "".join(result)
+
+
+def _is_choseong_query(query: str) -> bool:
+    """자음만으로 이루어진 검색어인지 ('ㅎㄹ' → True, '핼' → False)"""
+    return bool(query) and all(ch in CONSONANTS for ch in query)
+
+
+def _grams(text: str) -> set:
+    """1글자면 unigram, 그 이상이면 bigram 집합"""
+    if len(text) < 2:
+        return {text} if text else set()
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def _index_grams(text: str) -> set:
+    """색인할 때는 unigram + bigram 모두 등록 (1글자 검색어 대응)"""
+    return set(text) | _grams(text)
+
+
+class _AutocompleteState:
+    """
+    인덱스 한 벌 (다시 적재할 때는 새로 만들어서 통째로 교체)
+
+    - jamo_postings : 자모 n-gram → book_id 집합
+    - cho_postings  : 초성 n-gram → book_id 집합
+    """
+
+    def __init__(self):
+        # book_id → (title, cover, 정렬키, 자모열, 초성열)
+        self.docs = {}
+        # 제목순 정렬키 목록 [(title, book_id), ...]
+        self.sorted_keys = []
+        self.jamo_postings = {}
+        self.cho_postings = {}
+        self.result_cache = {}
+
+    def add(self, book_id, title, cover, keep_sorted=True):
+        title = title or ""
+        jamo = decompose_jamo(title)
+        cho = extract_choseong(title)
+        sort_key = (title, book_id)
+        self.docs[book_id] = (title, cover, sort_key, jamo, cho)
+
+        if keep_sorted:
+            bisect.insort(self.sorted_keys, sort_key)
+        else:
+            # 전체 적재 중에는 마지막에 한 번만 정렬
+            self.sorted_keys.append(sort_key)
+
+        for gram in _index_grams(jamo):
+            self.jamo_postings.setdefault(gram, set()).add(book_id)
+        for gram in _index_grams(cho):
+            self.cho_postings.setdefault(gram, set()).add(book_id)
+
+    def remove(self, book_id):
+        doc = self.docs.pop(book_id, None)
+        if doc is None:
+            return
+        _, _, sort_key, jamo, cho = doc
+
+        pos = bisect.bisect_left(self.sorted_keys, sort_key)
+        if pos < len(self.sorted_keys) and self.sorted_keys[pos] == sort_key:
+            del self.sorted_keys[pos]
+
+        for postings, text in ((self.jamo_postings, jamo), (self.cho_postings, cho)):
+            for gram in _index_grams(text):
+                ids = postings.get(gram)
+                if ids is not None:
+                    ids.discard(book_id)
+                    if not ids:
+                        del postings[gram]
+
+
+class BookAutocompleteIndex:
+    """도서 제목 자동완성 인덱스"""
+
+    # 같은 검색어 반복 입력 대비 결과 캐시 크기 (인덱스가 바뀌면 비움)
+    RESULT_CACHE_SIZE = 1024
+    # 후보가 이 개수보다 많으면 정렬 대신 제목순 목록을 앞에서부터 훑음
+    SCAN_THRESHOLD = 1000
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        # 최초 적재를 기다리는 요청끼리 한 번만 적재하도록
+        self._first_build_lock = threading.Lock()
+        self._state = _AutocompleteState()
+        self._built = False
+        # 적재 당시 인덱스 버전
+        self._version = None
+        # 적재 중이면 그동안의 증분 갱신 기록 (적재 중이 아니면 None)
+        self._replay = None
+
+    # ─────────────────────────────
+    # 적재
+    # ─────────────────────────────
+    @property
+    def built(self) -> bool:
+        return self._built
+
+    def _load(self) -> _AutocompleteState:
+        """DB에서 전체 도서를 읽어 새 인덱스 생성 (잠금 없이 실행)"""
+        state = _AutocompleteState()
+        rows = Book.objects.values_list("id", "title", "cover").iterator(chunk_size=2000)
+        for book_id, title, cover in rows:
+            state.add(book_id, title, cover, keep_sorted=False)
+        state.sorted_keys.sort()
+        return state
+
+    def rebuild(self):
+        """DB에서 전체 도서를 다시 읽어 인덱스 교체 (현재 스레드에서 실행)"""
+        with self._lock:
+            if self._replay is None:
+                self._replay = []
+        try:
+            # 읽기 전에 버전부터 기록 (읽는 도중 바뀌면 다음 조회 때 다시 적재)
+            version = get_index_version()
+            state = self._load()
+            with self._lock:
+                self._state = state
+                self._built = True
+                self._version = version
+                # 읽는 동안 커밋된 변경 다시 반영 (순서대로 → 마지막 값이 남음)
+                for apply, args in self._replay:
+                    apply(*args)
+        finally:
+            with self._lock:
+                self._replay = None
+
+    def _rebuild_in_background(self):
+        try:
+            self.rebuild()
+        except Exception:
+            logger.exception("도서 자동완성 인덱스 적재 실패 (기존 인덱스 유지)")
+        finally:
+            # 이 스레드 전용 DB 연결 정리
+            connection.close()
+
+    def schedule_rebuild(self):
+        """재적재 예약 (이미 적재 중이면 무시)"""
+        with self._lock:
+            if self._replay is not None:
+                return
+            self._replay = []
+        if get_autocomplete_index_settings()["BACKGROUND"]:
+            threading.Thread(target=self._rebuild_in_background, name="book-autocomplete-index", daemon=True).start()
+        else:
+            self.rebuild()
+
+    def clear(self):
+        """인덱스 비우기 (다음 조회 때 DB에서 다시 적재)"""
+        with self._lock:
+            self._state = _AutocompleteState()
+            self._built = False
+
+    def _ensure_built(self):
+        """
+        - 적재 전이면 요청 스레드에서 적재 (다른 요청은 끝날 때까지 기다림)
+        - 인덱스 버전이 바뀌었으면 재적재를 예약하고 기존 인덱스로 응답
+        """
+        if not self._built:
+            with self._first_build_lock:
+                if not self._built:
+                    self.rebuild()
+            return
+        version, stale = check_index_version(self._version)
+        if stale:
+            self.schedule_rebuild()
+        elif version != self._version:
+            # 이 프로세스 시그널로 이미 반영한 변경
+            self._version = version
+
+    # ─────────────────────────────
+    # 증분 갱신
+    # ─────────────────────────────
+    def _record(self, apply, *args):
+        """적재된 인덱스에 바로 반영 + 적재 중이면 교체 후 다시 반영하도록 기록"""
+        with self._lock:
+            if self._replay is not None:
+                self._replay.append((apply, args))
+            if self._built:
+                apply(*args)
+
+    def _apply_add(self, book_id, title, cover):
+        self._state.remove(book_id)
+        self._state.add(book_id, title, cover)
+        self._state.result_cache.clear()
+
+    def _apply_remove(self, book_id):
+        self._state.remove(book_id)
+        self._state.result_cache.clear()
+
+    def add(self, book):
+        """도서 추가/수정 반영 (아직 적재 전이고 적재 중도 아니면 최초 조회 때 한꺼번에 읽으므로 무시)"""
+        self._record(self._apply_add, book.pk, book.title, book.cover)
+
+    def remove(self, book_id):
+        self._record(self._apply_remove, book_id)
+
+    # ─────────────────────────────
+    # 조회
+    # ─────────────────────────────
+    def search(self, query: str, limit: int = 10) -> list:
+        """
+        검색어가 포함된 도서를 제목순으로 최대 limit개 반환
+        반환값: [{'id', 'title', 'cover'}, ...] (BookAutocompleteSerializer와 같은 모양)
+        """
+        self._ensure_built()
+        with self._lock:
+            state = self._state
+            normalized = _normalize(query)
+            cache_key = (normalized, limit)
+            cached = state.result_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+            if _is_choseong_query(normalized):
+                # 초성 검색
+                needle = normalized
+                postings = state.cho_postings
+                text_index = 4
+            else:
+                needle = decompose_jamo(normalized)
+                postings = state.jamo_postings
+                text_index = 3
+
+            if needle:
+                top = self._match(state, postings, needle, text_index, limit)
+            else:
+                # 빈 검색어는 전체 도서 대상 (기존 icontains('') 동작과 동일)
+                top = [state.docs[key[1]] for key in state.sorted_keys[:limit]]
+
+            result = [
+                {"id": doc[2][1], "title": doc[0], "cover": doc[1]}
+                for doc in top
+            ]
+
+            if len(state.result_cache) >= self.RESULT_CACHE_SIZE:
+                state.result_cache.clear()
+            state.result_cache[cache_key] = result
+            return result
+
+    def _match(self, state, postings, needle, text_index, limit) -> list:
+        """n-gram posting 집합 교집합 → 원문 포함 여부 검증 → 제목순 상위 limit개"""
+        sets = []
+        for gram in _grams(needle):
+            ids = postings.get(gram)
+            if not ids:
+                return []
+            sets.append(ids)
+        sets.sort(key=len)
+        # posting 집합이 하나뿐이면 복사 없이 그대로 사용
+        candidates = sets[0].intersection(*sets[1:]) if len(sets) > 1 else sets[0]
+
+        # 2글자 이하 검색어는 n-gram 자체가 검색어이므로 검증 생략
+        needs_check = len(needle) > 2
+
+        if len(candidates) > self.SCAN_THRESHOLD:
+            # 흔한 글자('ㅎ', '해' 등) → 제목순으로 훑다가 limit개 채우면 중단
+            top = []
+            for _, book_id in state.sorted_keys:
+                if book_id in candidates:
+                    doc = state.docs[book_id]
+                    if not needs_check or needle in doc[text_index]:
+                        top.append(doc)
+                        if len(top) >= limit:
+                            break
+            return top
+
+        matched = (
+            state.docs[book_id] for book_id in candidates
+            if not needs_check or needle in state.docs[book_id][text_index]
+        )
+        return heapq.nsmallest(limit, matched, key=lambda doc: doc[2])
+
+
+# 전역 인스턴스
+book_autocomplete_index = BookAutocompleteIndex()
@@ -0,0 +1,109 @@
+"""
+books/services/bookmarks.py
+
+북마크 토글 + 도서별 북마크 수(Book.bookmark_count) 관리
+
+정책 요약:
+- exists() 확인 후 delete() / create() 하지 않음 (왕복 3번 + 더블클릭 시 unique 제약 IntegrityError)
+  1. 조건부 DELETE → 지운 행이 있으면 '해제'
+  2. 없었으면 INSERT ... ON CONFLICT DO NOTHING → 동시에 같은 요청이 와도 에러 없이 1건만 등록
+- 북마크 테이블 문장은 최대 2개, 이어서 book.bookmark_count 를 UPDATE ... RETURNING 으로 증감하면서 새 값 조회
+  → 상세 / 프로필 화면에서 bookmark 테이블 COUNT(*) 불필요
+- INSERT 는 도서가 있을 때만 (INSERT ... SELECT ... WHERE EXISTS) → 없는 도서는 None (뷰에서 404)
+- RETURNING / ON CONFLICT 를 못 쓰는 DB 는 ORM(F() UPDATE + SELECT)으로 같은 동작
+- 일괄 등록(bulk_sync.py) / 사용자 탈퇴(signals.py) 때는 bookmark_count 를 다시 계산하거나 차감
+"""
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from books.models import Book, Bookmark
+from books.services.rating_stats import supports_update_returning
+
+
+# ─────────────────────────────
+# bookmark_count 증감 / 재계산
+# ─────────────────────────────
+def apply_bookmark_delta(book_id: int, delta: int) -> int | None:
+    """bookmark_count 에 delta 를 더하고 새 값 반환 (도서가 없으면 None)"""
+    if supports_update_returning():
+        qn = connection.ops.quote_name
+        count = qn("bookmark_count")
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {qn(Book._meta.db_table)} SET {count} = {count} + %s "
+                f"WHERE {qn('id')} = %s RETURNING {count}",
+                [delta, book_id],
+            )
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    Book.objects.filter(pk=book_id).update(bookmark_count=F("bookmark_count") + delta)
+    return Book.objects.filter(pk=book_id).values_list("bookmark_count", flat=True).first()
+
+
+def bookmark_count_update(bookmark_model) -> dict:
+    """
+    Book.objects.filter(...).update(**bookmark_count_update(Bookmark)) 로 한 번에 재계산
+    (마이그레이션은 그 시점의 복사본을 따로 가지고 있음)
+    """
+    counts = (
+        bookmark_model.objects.filter(book=OuterRef("pk")).order_by().values("book")
+        .annotate(c=Count("id")).values("c")
+    )
+    return {"bookmark_count": Coalesce(Subquery(counts), 0)}
+
+
+# ─────────────────────────────
+# 토글
+# ─────────────────────────────
+def toggle_bookmark(user_id: int, book_id: int) -> dict | None:
+    """
+    북마크 토글
+    :return: {'is_bookmarked': bool, 'bookmark_count': int} (도서가 없으면 None)
+    """
+    with transaction.atomic():
+        # 1. 있으면 삭제 (Bookmark 에는 signal / 연관 모델이 없어서 DELETE 1번)
+        deleted, _ = Bookmark.objects.filter(user_id=user_id, book_id=book_id).delete()
+        if deleted:
+            return {"is_bookmarked": False, "bookmark_count": apply_bookmark_delta(book_id, -1)}
+
+        # 2. 없었으면 등록
+        inserted = _insert_ignore_conflict(user_id, book_id)
+        if inserted:
+            return {"is_bookmarked": True, "bookmark_count": apply_bookmark_delta(book_id, 1)}
+
+    # 등록되지 않음 → 도서가 없거나, 동시에 들어온 같은 요청이 먼저 등록함
+    count = Book.objects.filter(pk=book_id).values_list("bookmark_count", flat=True).first()
+    if count is None:
+        return None
+    return {"is_bookmarked": True, "bookmark_count": count}
+
+
+def _insert_ignore_conflict(user_id: int, book_id: int) -> bool:
+    """INSERT ... ON CONFLICT DO NOTHING (도서가 있을 때만) → 새로 들어갔으면 True"""
+    if not supports_update_returning():
+        if not Book.objects.filter(pk=book_id).exists():
+            return False
+        try:
+            with transaction.atomic():
+                Bookmark.objects.create(user_id=user_id, book_id=book_id)
+        except IntegrityError:
+            return False
+        return True
+
+    qn = connection.ops.quote_name
+    bookmark, book = qn(Bookmark._meta.db_table), qn(Book._meta.db_table)
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    with connection.cursor() as cursor:
+        # WHERE 가 있어야 SQLite 가 ON CONFLICT 를 SELECT 의 일부로 해석하지 않음
+        cursor.execute(
+            f"INSERT INTO {bookmark} ({qn('user_id')}, {qn('book_id')}, {qn('created_at')}) "
+            f"SELECT %s, %s, %s WHERE EXISTS (SELECT 1 FROM {book} WHERE {qn('id')} = %s) "
+            f"ON CONFLICT ({qn('user_id')}, {qn('book_id')}) DO NOTHING "
+            f"RETURNING {qn('id')}",
+            [user_id, book_id, now, book_id],
+        )
+        return cursor.fetchone() is not None
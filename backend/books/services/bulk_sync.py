@@ -0,0 +1,101 @@
+"""
+books/services/bulk_sync.py
+
+평점 / 북마크 일괄 등록 (다른 앱에서 옮겨오는 사용자, 배치 작업용)
+
+정책 요약:
+- 도서 1권씩 API 를 호출하는 대신 한 요청에 최대 MAX_BULK_ITEMS 건
+- 평점: bulk_create(update_conflicts=True) 한 번으로 등록/수정 (user, book 유일 제약 기준 upsert)
+  → 행마다 signal 을 타지 않으므로 마지막에 영향받은 도서만 평점 집계 1번에 재계산
+- 북마크: 등록은 bulk_create(ignore_conflicts=True), 해제는 DELETE 1번
+  → 마지막에 영향받은 도서만 bookmark_count 재계산
+- 없는 도서 id 는 건너뛰고 missing 으로 돌려줌 (나머지는 그대로 반영)
+- 같은 도서가 여러 번 오면 마지막 값 사용
+- 전체가 한 트랜잭션 (중간에 실패하면 아무것도 반영되지 않음)
+"""
+
+from django.db import transaction
+
+from books.models import Book, BookRating, Bookmark
+from books.services.bookmarks import bookmark_count_update
+from books.services.catalog_cache import bump_catalog_version
+from books.services.rating_stats import rating_aggregate_updates
+
+
+# 한 요청에 받을 수 있는 최대 건수
+MAX_BULK_ITEMS = 500
+
+BATCH_SIZE = 500
+
+
+def _existing_book_ids(book_ids) -> set:
+    return set(Book.objects.filter(pk__in=book_ids).values_list("pk", flat=True))
+
+
+# ─────────────────────────────
+# 평점
+# ─────────────────────────────
+def bulk_upsert_ratings(user, items) -> dict:
+    """
+    평점 일괄 등록/수정
+    :param items: [(book_id, score), ...]
+    :return: {'saved': 반영 건수, 'missing': [없는 도서 id]}
+    """
+    scores = dict(items)  # 같은 도서는 마지막 값
+    existing = _existing_book_ids(scores)
+    missing = sorted(set(scores) - existing)
+
+    ratings = [
+        BookRating(user=user, book_id=book_id, score=score)
+        for book_id, score in scores.items() if book_id in existing
+    ]
+    if ratings:
+        with transaction.atomic():
+            BookRating.objects.bulk_create(
+                ratings,
+                batch_size=BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=["user", "book"],
+                update_fields=["score", "updated_at"],
+            )
+            # 영향받은 도서만 평점 합계 / 개수 / 평균 재계산 (UPDATE 1번)
+            Book.objects.filter(pk__in=existing).update(**rating_aggregate_updates(BookRating))
+            transaction.on_commit(bump_catalog_version)
+
+    return {"saved": len(ratings), "missing": missing}
+
+
+# ─────────────────────────────
+# 북마크
+# ─────────────────────────────
+def bulk_sync_bookmarks(user, items) -> dict:
+    """
+    북마크 상태 일괄 지정 (토글이 아니라 원하는 상태로 맞춤 → 여러 번 보내도 결과 같음)
+    :param items: [(book_id, is_bookmarked), ...]
+    :return: {'added': 새로 등록된 수, 'removed': 해제된 수, 'missing': [없는 도서 id]}
+    """
+    states = dict(items)
+    add_ids = {book_id for book_id, bookmarked in states.items() if bookmarked}
+    remove_ids = set(states) - add_ids
+
+    existing = _existing_book_ids(add_ids) if add_ids else set()
+    missing = sorted(add_ids - existing)
+
+    with transaction.atomic():
+        added = 0
+        if existing:
+            before = Bookmark.objects.filter(user=user, book_id__in=existing).count()
+            Bookmark.objects.bulk_create(
+                [Bookmark(user=user, book_id=book_id) for book_id in existing],
+                batch_size=BATCH_SIZE,
+                ignore_conflicts=True,
+            )
+            added = len(existing) - before
+        removed = 0
+        if remove_ids:
+            removed, _ = Bookmark.objects.filter(user=user, book_id__in=remove_ids).delete()
+        if added or removed:
+            # 영향받은 도서만 북마크 수 재계산 (UPDATE 1번)
+            Book.objects.filter(pk__in=existing | remove_ids).update(**bookmark_count_update(Bookmark))
+
+    return {"added": added, "removed": removed, "missing": missing}
@@ -0,0 +1,178 @@
+"""
+books/services/catalog_cache.py
+
+메인 도서 목록(book_list) / 베스트셀러(BestSellerAPIView) 응답 캐시
+
+정책 요약:
+- 도서 카탈로그는 적재(loaddata / 적재 커멘드) / 관리자 수정 / 평점 집계 때만 바뀜
+  → 카탈로그 버전 번호를 캐시 키에 넣고, 바뀔 때마다 버전만 올려서 한 번에 무효화
+- 응답은 camelCase 변환 + JSON 렌더링까지 끝난 bytes 로 저장 (조회 시 직렬화 없음)
+- ETag 를 같이 저장 → If-None-Match 가 같으면 304 (본문 전송 없음)
+- 버전 올리기
+  - Book 저장/삭제 시그널 (목록에 나오는 컬럼이 바뀐 경우만, signals.py)
+  - signal 을 타지 않는 일괄 UPDATE / bulk_create 뒤에는 bump_catalog_version() 직접 호출
+
+- 버전 키는 settings.CACHES 의 공용 캐시(파일 / Redis)에 있으므로
+  적재 커멘드 / 다른 워커에서 올린 버전도 모든 서버 프로세스에 바로 반영됨
+- 메모리 인덱스(도서 자동완성 / 중고거래 비트맵) 용 버전은 따로 둠 (인덱스 버전)
+  - 인덱스에 들어가는 컬럼(INDEX_FIELDS)이 바뀌거나 일괄 적재(load_catalog) 뒤에 올림
+  - 각 프로세스의 인덱스는 조회 때 자기가 적재한 버전과 비교해서 다르면 다시 적재
+    → 적재 커멘드 / 다른 워커의 변경도 서버 프로세스 인덱스에 반영됨
+  - 시그널로 이미 자기 인덱스에 반영하고 올린 버전은 기억해 둠 → 자기 변경으로는 다시 적재하지 않음
+
+주의:
+- 파일 캐시의 incr 는 원자적이지 않아서 동시에 올리면 1만 오를 수 있음
+  (값은 어쨌든 바뀌므로 커밋 뒤에 올리는 한 무효화는 보장됨)
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from bookmarket.renderers import render_camel_json
+
+
+VERSION_KEY = "catalog:version"
+INDEX_VERSION_KEY = "catalog:index_version"
+
+# 응답 캐시 유지 시간 (초) - 버전으로 무효화하므로 길게 잡아도 됨
+RESPONSE_TIMEOUT = getattr(settings, "CATALOG_CACHE_TIMEOUT", 60 * 60)
+
+# 이 컬럼들이 바뀌면 목록 응답이 달라짐 (BookPreviewSerializer / BookBestSellerSerializer 필드)
+CATALOG_FIELDS = frozenset({
+    "title", "author", "cover", "adult", "best_rank", "average_rating", "rating_count",
+})
+
+# 이 컬럼들이 바뀌면 메모리 인덱스가 달라짐 (자동완성 제목 / 표지, 비트맵 성인 여부)
+INDEX_FIELDS = frozenset({"title", "cover", "adult"})
+
+# 이 프로세스가 시그널로 인덱스에 직접 반영한 뒤 올린 인덱스 버전
+_applied_index_versions = set()
+APPLIED_INDEX_VERSIONS_MAX = 10000
+
+
+# ─────────────────────────────
+# 카탈로그 / 인덱스 버전
+# ─────────────────────────────
+def _get_version(key: str) -> int:
+    """
+    버전 키의 현재 값
+    - 버전 키만 캐시에서 밀려나도 예전 값과 겹치지 않도록 시작값은 현재 시각(ms)
+    """
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def _bump_version(key: str) -> int:
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # 버전 키가 아직 없거나 밀려난 경우
+        _get_version(key)
+        return cache.incr(key)
+
+
+def get_catalog_version() -> int:
+    """현재 카탈로그 버전"""
+    return _get_version(VERSION_KEY)
+
+
+def bump_catalog_version() -> int:
+    """카탈로그가 바뀌었을 때 호출 → 이전 버전의 캐시 응답은 전부 무시됨"""
+    return _bump_version(VERSION_KEY)
+
+
+def get_index_version() -> int:
+    """현재 인덱스 버전 (자동완성 / 중고거래 비트맵 인덱스가 조회 때 비교)"""
+    return _get_version(INDEX_VERSION_KEY)
+
+
+def bump_index_version(applied_locally: bool = False) -> int:
+    """
+    인덱스 컬럼이 바뀌었을 때 호출 → 모든 프로세스의 메모리 인덱스가 다음 조회 때 다시 적재
+    :param applied_locally: 이 프로세스 인덱스에는 시그널로 이미 반영했으면 True (이 프로세스는 다시 적재 안 함)
+    """
+    version = _bump_version(INDEX_VERSION_KEY)
+    if applied_locally:
+        if len(_applied_index_versions) >= APPLIED_INDEX_VERSIONS_MAX:
+            _applied_index_versions.clear()
+        _applied_index_versions.add(version)
+    return version
+
+
+def check_index_version(built_version) -> tuple:
+    """
+    메모리 인덱스가 적재한 버전 이후에 다른 곳에서 바뀐 게 있는지
+    :return: (현재 버전, 다시 적재해야 하는지)
+             그 사이 버전이 모두 이 프로세스가 직접 반영한 것이면 다시 적재하지 않음
+    """
+    version = get_index_version()
+    if built_version is None or version == built_version:
+        return version, built_version is None
+    steps = range(built_version + 1, version + 1)
+    stale = not (0 < len(steps) <= len(_applied_index_versions)
+                 and all(step in _applied_index_versions for step in steps))
+    return version, stale
+
+
+def touches_catalog(update_fields) -> bool:
+    """save(update_fields=...) 가 목록에 나오는 컬럼을 건드리는지"""
+    return update_fields is None or not CATALOG_FIELDS.isdisjoint(update_fields)
+
+
+def touches_index(update_fields) -> bool:
+    """save(update_fields=...) 가 메모리 인덱스 컬럼을 건드리는지"""
+    return update_fields is None or not INDEX_FIELDS.isdisjoint(update_fields)
+
+
+# ─────────────────────────────
+# 응답 캐시
+# ─────────────────────────────
+def _render(data) -> bytes:
+    """Response(data) 와 같은 camelCase JSON bytes"""
+    return render_camel_json(data)
+
+
+def _etag(version: int, body: bytes) -> str:
+    return f'"{version}-{hashlib.sha1(body).hexdigest()[:16]}"'
+
+
+def _not_modified(request, etag: str) -> bool:
+    if_none_match = request.META.get("HTTP_IF_NONE_MATCH", "")
+    return etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+
+
+def cached_catalog_response(request, name: str, build) -> HttpResponse:
+    """
+    카탈로그 버전 기준 응답 캐시
+
+    :param name: 엔드포인트 구분용 이름
+    :param build: 캐시가 없을 때 응답 데이터(dict / list)를 만드는 함수
+                  (Http404 / NotFound 등 예외는 그대로 전달, 캐시하지 않음)
+    """
+    version = get_catalog_version()
+    # 페이지네이션 next / previous 링크에 호스트가 들어가므로 전체 URL 기준
+    key = "catalog:response:" + hashlib.sha1(
+        f"{name}|{version}|{request.build_absolute_uri()}".encode("utf-8")
+    ).hexdigest()
+
+    entry = cache.get(key)
+    if entry is None:
+        body = _render(build())
+        entry = (_etag(version, body), body)
+        cache.set(key, entry, RESPONSE_TIMEOUT)
+    etag, body = entry
+
+    if _not_modified(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type="application/json")
+    response["ETag"] = etag
+    # 매번 ETag 로 재검증 (카탈로그가 바뀌면 바로 반영되도록)
+    response["Cache-Control"] = "no-cache"
+    return response
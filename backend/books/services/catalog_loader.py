@@ -0,0 +1,134 @@
+"""
+books/services/catalog_loader.py
+
+알라딘 도서 덤프 → Book 테이블 직접 적재 (load_catalog 커멘드)
+
+정책 요약:
+- fixture + loaddata 를 거치지 않음
+  (loaddata 는 serializer 로 1건씩 역직렬화 + save() → 100만 권이면 몇 시간)
+- 덤프는 aladin_stream.py 로 1권씩 읽고, BATCH_SIZE 권씩 모아서
+  bulk_create(update_conflicts=True, unique_fields=['isbn']) 한 번으로 등록/수정 (isbn 기준 upsert)
+- 배치마다 트랜잭션을 나눔 → 중간에 실패해도 앞 배치는 유지, 같은 명령 다시 실행하면 이어서 반영
+- signal 을 타지 않으므로 signal 이 하던 일은 여기서 직접
+  - final_score : 읽는 즉시 compute_final_score() 로 계산
+  - 평점 / 북마크 집계 : 업데이트 대상 컬럼이 아니므로 기존 값 유지 (새 도서는 0)
+  - 목록 캐시 / 자동완성 / 중고거래 비트맵 : 적재가 끝나면 공용 캐시의 버전을 한 번만 올림
+    (커멘드 프로세스가 아니라 서버 프로세스들이 다음 조회 때 버전을 보고 다시 적재)
+- full 적재 시에는 보조 인덱스 + FTS 동기화 트리거를 잠시 지우고 마지막에 한 번에 다시 만듦
+  (isbn UNIQUE 인덱스는 upsert 에 필요하므로 유지)
+"""
+
+import time
+
+from django.db import connection, transaction
+
+from books.models import Book, Category
+from books.services.aladin_stream import FIELD_MAP, iter_book_fixtures
+from books.services.catalog_cache import bump_catalog_version, bump_index_version
+from books.services.recommand import compute_final_score
+from books.services.search_index import SQLITE_TRIGGER_SQL, ensure_book_search_index
+
+
+BATCH_SIZE = 5000
+
+# 덤프 값으로 덮어쓸 컬럼 (평점 / 북마크 집계, created_at 은 제외)
+UPDATE_FIELDS = ["category", *FIELD_MAP.values(), "final_score", "updated_at"]
+
+
+# ─────────────────────────────
+# 보조 인덱스 / FTS 트리거
+# ─────────────────────────────
+def _existing_index_names() -> set:
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, Book._meta.db_table)
+    return {name for name, info in constraints.items() if info["index"]}
+
+
+def drop_secondary_indexes() -> list:
+    """Book.Meta.indexes 중 있는 것만 삭제 → 삭제한 인덱스 이름 목록"""
+    editor = connection.schema_editor(atomic=False)
+    qn = connection.ops.quote_name
+    existing = _existing_index_names()
+    dropped = []
+    with connection.cursor() as cursor:
+        for index in Book._meta.indexes:
+            if index.name in existing:
+                cursor.execute(editor.sql_delete_index % {"name": qn(index.name), "table": qn(Book._meta.db_table)})
+                dropped.append(index.name)
+        if connection.vendor == "sqlite":
+            for name in SQLITE_TRIGGER_SQL:
+                cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+    return dropped
+
+
+def restore_secondary_indexes() -> list:
+    """
+    빠진 Book.Meta.indexes 재생성 + FTS 트리거 재생성 / 재색인
+    (중간에 실패한 적재 뒤에 다시 실행해도 빠진 것만 만듦)
+    """
+    editor = connection.schema_editor(atomic=False)
+    existing = _existing_index_names()
+    created = []
+    with connection.cursor() as cursor:
+        for index in Book._meta.indexes:
+            if index.name not in existing:
+                cursor.execute(str(index.create_sql(Book, editor)))
+                created.append(index.name)
+    ensure_book_search_index(connection.alias)
+    return created
+
+
+# ─────────────────────────────
+# 적재
+# ─────────────────────────────
+def _to_book(fields: dict) -> Book:
+    fields = {key: value for key, value in fields.items() if key not in ("created_at", "updated_at")}
+    book = Book(**fields)
+    book.final_score = compute_final_score(book.sales_point, book.best_rank, book.customer_review_rank)
+    return book
+
+
+def _flush(batch: dict) -> None:
+    with transaction.atomic():
+        Book.objects.bulk_create(
+            list(batch.values()),
+            update_conflicts=True,
+            unique_fields=["isbn"],
+            update_fields=UPDATE_FIELDS,
+        )
+
+
+def load_books(records, cid_map: dict, batch_size: int = BATCH_SIZE, progress=None) -> dict:
+    """
+    원본 도서 레코드 → Book upsert
+    :param cid_map: {cid: category_pk} (aladin_stream.build_cid_map), 없는 Category 는 제외
+    :param progress: 배치마다 호출 progress(stats, elapsed)
+    :return: {'read', 'loaded', 'skipped', 'categories', 'elapsed'}
+    """
+    existing_categories = set(Category.objects.values_list("pk", flat=True))
+    cid_map = {cid: pk for cid, pk in cid_map.items() if pk in existing_categories}
+
+    stats = {"read": 0, "loaded": 0, "skipped": 0, "categories": {}}
+    started = time.perf_counter()
+    # isbn → Book (한 배치 안에 같은 isbn 이 여러 번 오면 마지막 값, PostgreSQL ON CONFLICT 제약)
+    batch = {}
+    for entry in iter_book_fixtures(records, cid_map, "", stats):
+        book = _to_book(entry["fields"])
+        if not book.isbn:
+            stats["skipped"] += 1
+            continue
+        stats["loaded"] += 1
+        batch[book.isbn] = book
+        if len(batch) >= batch_size:
+            _flush(batch)
+            batch = {}
+            if progress:
+                progress(stats, time.perf_counter() - started)
+    if batch:
+        _flush(batch)
+
+    stats["elapsed"] = time.perf_counter() - started
+    # signal 대신 적재 끝에 한 번만 무효화
+    bump_catalog_version()
+    bump_index_version()
+    return stats
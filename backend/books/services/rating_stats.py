@@ -0,0 +1,120 @@
+"""
+books/services/rating_stats.py
+
+도서 평점 집계(Book.rating_sum / rating_count / average_rating) 증분 갱신
+
+정책 요약:
+- 평점이 바뀔 때마다 AVG / COUNT 를 다시 계산하지 않고 변화량만 더함
+  - 새 평점   : sum + score,        count + 1
+  - 평점 수정 : sum + (new - old),  count + 0
+  - 평점 삭제 : sum - score,        count - 1
+- UPDATE 한 번에 sum / count / average 를 같이 갱신 (DB 값 기준 → 동시 요청에도 유실 없음)
+- UPDATE ... RETURNING 을 지원하는 DB(PostgreSQL, SQLite 3.35+)는 갱신된 값을 같은 문장에서 받음
+  (그 외 DB 는 UPDATE 후 SELECT 1번)
+- 평점 수와 상관없이 평점 1건 변경 = 문장 1개 (집계 쿼리 없음)
+- 전체 재계산은 bulk 적재 / 마이그레이션 때만 (rating_aggregate_updates)
+"""
+
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import Avg, Case, Count, DecimalField, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Round
+
+from books.models import Book
+
+
+AVERAGE_PLACES = Decimal("0.01")
+STATS_FIELDS = ("rating_sum", "rating_count", "average_rating")
+
+
+def supports_update_returning() -> bool:
+    if connection.vendor == "postgresql":
+        return True
+    if connection.vendor == "sqlite":
+        return connection.Database.sqlite_version_info >= (3, 35, 0)
+    return False
+
+
+def _to_decimal(value, places) -> Decimal:
+    # SQLite 는 float / int 로 돌려주므로 자리수 맞춰서 변환
+    return Decimal(str(value or 0)).quantize(places)
+
+
+# ─────────────────────────────
+# 증분 갱신
+# ─────────────────────────────
+def apply_rating_delta(book_id: int, score_delta, count_delta: int) -> dict | None:
+    """
+    Book 평점 집계에 변화량 반영
+    :return: 갱신된 {'rating_sum', 'rating_count', 'average_rating'} (도서가 없으면 None)
+    """
+    score_delta = Decimal(str(score_delta))
+    if supports_update_returning():
+        return _update_returning(book_id, score_delta, count_delta)
+
+    new_count = F("rating_count") + count_delta
+    new_sum = F("rating_sum") + score_delta
+    Book.objects.filter(pk=book_id).update(
+        rating_sum=new_sum,
+        rating_count=new_count,
+        average_rating=Case(
+            # 새 count 가 0 이하 (= 기존 count <= -count_delta) 면 평균 0
+            When(rating_count__lte=-count_delta, then=Value(Decimal("0"))),
+            default=Round(new_sum * Value(Decimal("1.0")) / new_count, 2),
+            output_field=DecimalField(max_digits=3, decimal_places=2),
+        ),
+    )
+    return Book.objects.filter(pk=book_id).values(*STATS_FIELDS).first()
+
+
+def _update_returning(book_id, score_delta, count_delta) -> dict | None:
+    """
+    UPDATE ... RETURNING 한 문장으로 갱신 + 결과 조회
+    (SET 의 오른쪽 컬럼은 모두 UPDATE 이전 값이므로 평균도 새 sum / count 로 계산)
+    """
+    qn = connection.ops.quote_name
+    table, rating_sum, rating_count, average = (
+        qn(Book._meta.db_table), qn("rating_sum"), qn("rating_count"), qn("average_rating"),
+    )
+    sql = (
+        f"UPDATE {table} SET "
+        f"{rating_sum} = {rating_sum} + %s, "
+        f"{rating_count} = {rating_count} + %s, "
+        f"{average} = CASE WHEN {rating_count} + %s > 0 "
+        f"THEN ROUND(({rating_sum} + %s) * 1.0 / ({rating_count} + %s), 2) ELSE 0 END "
+        f"WHERE {qn('id')} = %s "
+        f"RETURNING {rating_sum}, {rating_count}, {average}"
+    )
+    params = [score_delta, count_delta, count_delta, score_delta, count_delta, book_id]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    return {
+        "rating_sum": _to_decimal(row[0], Decimal("0.1")),
+        "rating_count": row[1],
+        "average_rating": _to_decimal(row[2], AVERAGE_PLACES),
+    }
+
+
+# ─────────────────────────────
+# 전체 재계산 (bulk 적재 / 마이그레이션용)
+# ─────────────────────────────
+def rating_aggregate_updates(rating_model) -> dict:
+    """
+    Book.objects.update(**rating_aggregate_updates(BookRating)) 로 한 번에 재계산
+    (마이그레이션은 그 시점의 복사본을 따로 가지고 있음)
+    """
+    stats = rating_model.objects.filter(book=OuterRef("pk")).order_by().values("book")
+    decimal = DecimalField(max_digits=10, decimal_places=2)
+    return {
+        "rating_sum": Coalesce(
+            Subquery(stats.annotate(s=Sum("score")).values("s"), output_field=decimal), Value(Decimal("0"))
+        ),
+        "rating_count": Coalesce(Subquery(stats.annotate(c=Count("id")).values("c")), 0),
+        "average_rating": Coalesce(
+            Subquery(stats.annotate(a=Avg("score")).values("a"), output_field=decimal), Value(Decimal("0"))
+        ),
+    }
@@ -11,15 +11,19 @@ books/recommand.py
 - sales_point 기반 인기 축
 - best_rank / customer_review_rank 조건부 보정
 - 출판일 NULL / 미래값은 최후순위
+
+점수(final_score)는 요청마다 계산하지 않고
+Book.final_score 컬럼에 미리 저장해 둠 (인덱스로 상위 N개만 읽음)
+- Book 저장 시 : signals.py (pre_save) 에서 compute_final_score() 로 갱신
+- 대량 적재 후 : refresh_final_scores() 로 한 번의 UPDATE 로 갱신
 """
 
-from datetime import date
+import math
 
 from django.db.models import (
     F,
     Value,
     FloatField,
-    IntegerField,
     Case,
     When,
     ExpressionWrapper,
@@ -27,11 +31,89 @@ from django.db.models import (
 from django.db.models.functions import (
     Log,
 )
-from django.utils.timezone import now
 
 from books.models import Book
 
 
+# ─────────────────────────────
+# 추천 점수 계산 (Python / SQL 동일 공식)
+# ─────────────────────────────
+# 판매 지수 로그 밑
+POPULARITY_LOG_BASE = 100000
+
+# 베스트셀러 조건부 보정 (best_rank 이하 → 배율)
+TREND_BOOSTS = [(10, 1.50), (50, 1.3), (100, 1.1)]
+
+# 리뷰 점수 조건부 보정 (customer_review_rank 이상 → 배율, 숨은 명작)
+REVIEW_BOOSTS = [(9, 1.30), (7, 1.10)]
+
+
+def compute_final_score(sales_point, best_rank, customer_review_rank) -> float:
+    """
+    도서 1권의 추천 점수
+    final_score = log_100000(sales_point + 1) * trend_boost * review_boost
+    """
+    sales = (sales_point or 0) + 1
+    # ── 2️⃣ 판매 지수 (로그 스케일)
+    popularity = math.log(sales, POPULARITY_LOG_BASE) if sales > 0 else 0.0
+
+    # ── 3️⃣ 베스트셀러 조건부 보정
+    trend_boost = 1.00
+    if best_rank is not None:
+        for rank, boost in TREND_BOOSTS:
+            if best_rank <= rank:
+                trend_boost = boost
+                break
+
+    # ── 4️⃣ 리뷰 점수 조건부 보정
+    review_boost = 1.00
+    if customer_review_rank is not None:
+        for rank, boost in REVIEW_BOOSTS:
+            if customer_review_rank >= rank:
+                review_boost = boost
+                break
+
+    # ── 5️⃣ 최종 점수
+    return popularity * trend_boost * review_boost
+
+
+def final_score_expression():
+    """compute_final_score() 와 같은 공식의 SQL 표현식 (대량 UPDATE 용)"""
+    popularity = Case(
+        When(
+            sales_point__gte=0,
+            then=Log(POPULARITY_LOG_BASE, F("sales_point") + 1),
+        ),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+    trend_boost = Case(
+        *[When(best_rank__lte=rank, then=Value(boost)) for rank, boost in TREND_BOOSTS],
+        default=Value(1.00),
+        output_field=FloatField(),
+    )
+    review_boost = Case(
+        *[When(customer_review_rank__gte=rank, then=Value(boost)) for rank, boost in REVIEW_BOOSTS],
+        default=Value(1.00),
+        output_field=FloatField(),
+    )
+    return ExpressionWrapper(
+        popularity * trend_boost * review_boost,
+        output_field=FloatField(),
+    )
+
+
+def refresh_final_scores(queryset=None) -> int:
+    """
+    final_score 컬럼 일괄 재계산 (UPDATE 한 번)
+    - loaddata / 대량 적재처럼 sales_point, 순위 정보가 바뀐 뒤 호출
+    :return: 갱신된 도서 수
+    """
+    if queryset is None:
+        queryset = Book.objects.all()
+    return queryset.update(final_score=final_score_expression())
+
+
 class BookRecommendationCandidate:
     """
     추천 페이지 요청 기준으로
@@ -63,7 +145,8 @@ class BookRecommendationCandidate:
     # 기본 QuerySet (하드 필터)
     # ─────────────────────────────
     def _base_queryset(self):
-        qs = Book.objects.all()
+        # AI 입력에 카테고리 이름이 들어가므로 같이 조회
+        qs = Book.objects.select_related("category")
 
         # 카테고리 선택했을 때만 필터
         if self.category_ids:
@@ -82,46 +165,10 @@ class BookRecommendationCandidate:
     # 추천 후보 50권 생성
     # ─────────────────────────────
     def get_top_50(self):
-        current_year = now().year
-
-        qs = self._base_queryset().annotate(
-            # ── 2️⃣ 판매 지수 (로그 스케일)
-            # popularity_score=ExpressionWrapper(
-            #     Log(100,F("sales_point") + 1),
-            #     output_field=FloatField()
-            # ),
-            popularity_score=ExpressionWrapper(
-                Log(100000, F("sales_point") + 1),
-                output_field=FloatField()
-            ),
-            # ── 3️⃣ 베스트셀러 조건부 보정
-            trend_boost=Case(
-                When(best_rank__lte=10, then=Value(1.50)),
-                When(best_rank__lte=50, then=Value(1.3)),
-                When(best_rank__lte=100, then=Value(1.1)),
-                default=Value(1.00),
-                output_field=FloatField(),
-            ),
-
-            # ── 4️⃣ 리뷰 점수 조건부 보정 (숨은 명작)
-            review_boost=Case(
-                When(customer_review_rank__gte=9, then=Value(1.30)),
-                When(customer_review_rank__gte=7, then=Value(1.10)),
-                default=Value(1.00),
-                output_field=FloatField(),
-            ),
-        ).annotate(
-            # ── 5️⃣ 최종 점수
-            final_score=ExpressionWrapper(
-                F("popularity_score")
-                * F("trend_boost")
-                * F("review_boost"),
-                output_field=FloatField(),
-            )
-        )
-
+        # 점수는 Book.final_score 에 미리 계산되어 있음
+        # → idx_book_final_score 인덱스 순서대로 읽다가 상위 70개에서 멈춤
         return (
-            qs.order_by(
+            self._base_queryset().order_by(
                 "-final_score",     # ⭐ 최종 추천 점수
             )[:70]
         )
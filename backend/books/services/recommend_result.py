@@ -0,0 +1,97 @@
+"""
+books/services/recommend_result.py
+
+AI 추천 응답 후처리
+
+정책 요약:
+- AI는 추천 도서의 id 와 추천 이유(reason)만 생성 (services/ai_prompt.py)
+  → 제목 / 저자 / 표지 / 카테고리는 서버가 DB에서 채움 (생성 토큰 절약 + 지어낸 값 차단)
+- 후보 목록에 없는 id / 중복 id 는 버림
+- 도서 정보는 in_bulk 쿼리 1번으로 조회
+"""
+
+from books.models import Book
+
+
+# 추천 권수 (프롬프트의 'EXACTLY 3 books' 와 동일)
+MAX_RECOMMENDATIONS = 3
+
+# 응답에 채워 넣는 도서 컬럼
+HYDRATE_FIELDS = ("id", "title", "author", "cover", "category_id")
+
+
+def _book_id(item):
+    try:
+        return int(item.get("id"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def _load_books(ids) -> dict:
+    return Book.objects.only(*HYDRATE_FIELDS).in_bulk(ids)
+
+
+def _to_response_item(item: dict, book: Book) -> dict:
+    """프론트가 쓰는 기존 응답 모양 {id, title, author, cover, category, description}"""
+    return {
+        "id": book.id,
+        "title": book.title,
+        "author": book.author,
+        "cover": book.cover,
+        "category": book.category_id,
+        # 예전 프롬프트 형식(description)으로 캐시된 응답도 그대로 처리
+        "description": item.get("reason") or item.get("description") or "",
+    }
+
+
+def _valid_picks(items, candidate_ids) -> list:
+    """후보에 속한 id 만 순서대로, 중복 없이 최대 MAX_RECOMMENDATIONS 개"""
+    candidates = set(candidate_ids)
+    picks = []
+    seen = set()
+    for item in items:
+        book_id = _book_id(item)
+        if book_id in candidates and book_id not in seen:
+            seen.add(book_id)
+            picks.append((book_id, item))
+            if len(picks) >= MAX_RECOMMENDATIONS:
+                break
+    return picks
+
+
+def hydrate_recommendations(result: dict, candidate_ids) -> dict:
+    """
+    AI 응답 {"recommendations": [{"id", "reason"}, ...]} → 도서 정보가 채워진 응답
+    - 에러 응답 ({"error": ...}) 은 그대로 반환
+    """
+    if not isinstance(result, dict) or "recommendations" not in result:
+        return result
+
+    picks = _valid_picks(result.get("recommendations") or [], candidate_ids)
+    books = _load_books([book_id for book_id, _ in picks])
+    return {
+        "recommendations": [
+            _to_response_item(item, books[book_id])
+            for book_id, item in picks
+            if book_id in books
+        ]
+    }
+
+
+def iter_hydrated_recommendations(items, candidate_ids):
+    """
+    스트리밍용: 추천이 하나 완성될 때마다 바로 채워서 반환
+    - 어떤 id 가 올지 미리 모르므로 후보 도서를 처음에 한 번에 읽어둠 (쿼리 1번)
+    """
+    books = None
+    seen = set()
+    for item in items:
+        if books is None:
+            books = _load_books(list(candidate_ids))
+        book_id = _book_id(item)
+        if book_id not in books or book_id in seen:
+            continue
+        seen.add(book_id)
+        yield _to_response_item(item, books[book_id])
+        if len(seen) >= MAX_RECOMMENDATIONS:
+            return
@@ -0,0 +1,210 @@
+"""
+books/services/search_index.py
+
+도서 검색(BookSearchAPIView)에서 사용되는
+전문 검색(Full-Text Search) 인덱스 조회 로직
+
+정책 요약:
+- SQLite     : FTS5 가상 테이블(book_fts, trigram 토크나이저)
+               → book 테이블 트리거로 자동 동기화 (save / loaddata / bulk_create 모두 반영)
+- PostgreSQL : 두 GIN 인덱스를 OR 로 같이 사용 (플래너가 BitmapOr 로 합침)
+               - to_tsvector('simple', ...) 표현식 인덱스 → 띄어쓰기 단위 접두어 검색 ('해리 포' → '해리포터와 ...')
+               - pg_trgm 인덱스(UPPER(컬럼) gin_trgm_ops) → icontains 부분 문자열 검색 ('포터' → '해리포터')
+               조회 표현식이 마이그레이션의 인덱스 표현식과 글자 그대로 같아야 인덱스를 탐 (SimpleTsVector)
+- 관련도(relevance) 순 정렬 (SQLite: bm25, PostgreSQL: ts_rank)
+- trigram은 3글자 미만 검색어를 인덱싱하지 못하므로 그때만 icontains로 대체 (SQLite)
+
+주의:
+- SQLite는 컬럼 추가 등 마이그레이션 때 book 테이블을 새로 만들어 바꿔치기하므로
+  book 에 걸린 동기화 트리거가 같이 사라짐
+  → migrate 가 끝날 때마다 ensure_book_search_index() 로 트리거를 다시 만들고 재색인 (signals.py)
+- PostgreSQL pg_trgm 은 DB 의 LC_CTYPE 가 UTF-8 로캘이어야 한글을 trigram 으로 나눔 (C 로캘이면 인덱스를 못 씀)
+"""
+
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+from django.db import connection, connections
+from django.db.models import Func, Q
+
+
+# FTS5 가상 테이블 이름 (migrations/0002_book_search_index.py 에서 생성)
+BOOK_FTS_TABLE = "book_fts"
+
+# 검색 가능한 컬럼 (searchType 값과 동일)
+SEARCH_FIELDS = ("title", "author")
+
+# trigram 토크나이저 최소 길이
+TRIGRAM_MIN_LENGTH = 3
+
+# book → book_fts 동기화 트리거 (migrations/0002_book_search_index.py 와 동일)
+SQLITE_TRIGGER_SQL = {
+    "book_fts_ai": f"""
+        CREATE TRIGGER IF NOT EXISTS book_fts_ai AFTER INSERT ON book BEGIN
+            INSERT INTO {BOOK_FTS_TABLE}(rowid, title, author) VALUES (new.id, new.title, new.author);
+        END
+    """,
+    "book_fts_ad": f"""
+        CREATE TRIGGER IF NOT EXISTS book_fts_ad AFTER DELETE ON book BEGIN
+            INSERT INTO {BOOK_FTS_TABLE}({BOOK_FTS_TABLE}, rowid, title, author) VALUES ('delete', old.id, old.title, old.author);
+        END
+    """,
+    "book_fts_au": f"""
+        CREATE TRIGGER IF NOT EXISTS book_fts_au AFTER UPDATE OF title, author ON book BEGIN
+            INSERT INTO {BOOK_FTS_TABLE}({BOOK_FTS_TABLE}, rowid, title, author) VALUES ('delete', old.id, old.title, old.author);
+            INSERT INTO {BOOK_FTS_TABLE}(rowid, title, author) VALUES (new.id, new.title, new.author);
+        END
+    """,
+}
+
+# PostgreSQL tsquery 특수문자 제거용
+_TSQUERY_SPECIAL_CHARS = re.compile(r"[&|!():*<>'\\]")
+
+
+class SimpleTsVector(Func):
+    """
+    to_tsvector('simple'::regconfig, COALESCE(<컬럼>, ''))
+    - 마이그레이션(0002)의 GIN 인덱스 표현식과 글자 그대로 같게 만듦
+      (SearchVector 는 config / 빈 문자열을 파라미터로 넘겨서 인덱스 표현식과 어긋날 수 있음)
+    """
+    template = "to_tsvector('simple'::regconfig, COALESCE(%(expressions)s, ''))"
+    arity = 1
+    output_field = SearchVectorField()
+
+
+# ─────────────────────────────
+# 인덱스 사용 가능 여부
+# ─────────────────────────────
+_fts_table_cache = {}
+
+
+def _sqlite_fts_available() -> bool:
+    """book_fts 테이블이 실제로 만들어져 있는지 (FTS5/trigram 미지원 SQLite 대비)"""
+    alias = connection.alias
+    if alias not in _fts_table_cache:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                [BOOK_FTS_TABLE],
+            )
+            _fts_table_cache[alias] = cursor.fetchone() is not None
+    return _fts_table_cache[alias]
+
+
+# ─────────────────────────────
+# 검색어 → MATCH / tsquery 변환
+# ─────────────────────────────
+def _fts5_match_expression(field: str, search: str) -> str:
+    """
+    FTS5 MATCH 식 생성
+    - 검색어 전체를 하나의 phrase로 감싸서 trigram 부분 문자열 검색
+      (기존 icontains와 같은 '포함' 의미 유지)
+    - phrase 안의 큰따옴표는 두 번 써서 이스케이프
+    """
+    phrase = search.replace('"', '""')
+    return f'{field} : "{phrase}"'
+
+
+def _pg_prefix_query(search: str) -> str:
+    """
+    PostgreSQL raw tsquery 생성
+    - 띄어쓰기 단위 토큰마다 접두어 검색(:*) 적용 → '해리 포' 도 '해리포터와 ...' 에 매칭
+    """
+    tokens = _TSQUERY_SPECIAL_CHARS.sub(" ", search).split()
+    return " & ".join(f"{token}:*" for token in tokens)
+
+
+# ─────────────────────────────
+# 검색 적용
+# ─────────────────────────────
+def search_books(queryset, search: str, field: str = "title"):
+    """
+    queryset에 전문 검색 조건 + 관련도 정렬을 적용해서 반환
+
+    :param queryset: Book QuerySet
+    :param search: 검색어
+    :param field: 'title' | 'author'
+    """
+    search = (search or "").strip()
+    if not search or field not in SEARCH_FIELDS:
+        return queryset
+
+    vendor = connection.vendor
+
+    if vendor == "sqlite" and len(search) >= TRIGRAM_MIN_LENGTH and _sqlite_fts_available():
+        # book_fts.rowid == book.id 조인 → FTS 인덱스에서 먼저 후보를 뽑고 bm25 점수로 정렬
+        return queryset.extra(
+            tables=[BOOK_FTS_TABLE],
+            where=[
+                f"{BOOK_FTS_TABLE}.rowid = book.id",
+                f"{BOOK_FTS_TABLE} MATCH %s",
+            ],
+            params=[_fts5_match_expression(field, search)],
+            # bm25는 값이 작을수록 관련도가 높음
+            select={"search_rank": f"bm25({BOOK_FTS_TABLE})"},
+            order_by=["search_rank", "id"],
+        )
+
+    if vendor == "postgresql":
+        # 부분 문자열: UPPER(<field>::text) LIKE ... → pg_trgm 인덱스(idx_book_<field>_trgm)
+        substring = Q(**{f"{field}__icontains": search})
+        tsquery = _pg_prefix_query(search)
+        if tsquery:
+            # 접두어 검색: tsvector 표현식 → GIN 인덱스(idx_book_<field>_fts)
+            vector = SimpleTsVector(field)
+            query = SearchQuery(tsquery, config="simple", search_type="raw")
+            return (
+                queryset
+                .annotate(search_vector=vector, search_rank=SearchRank(vector, query))
+                .filter(Q(search_vector=query) | substring)
+                .order_by("-search_rank", "id")
+            )
+        return queryset.filter(substring)
+
+    # 인덱스를 쓸 수 없는 경우 (짧은 검색어 / 기타 DB) → 기존 방식 유지
+    return queryset.filter(**{f"{field}__icontains": search})
+
+
+def rebuild_book_search_index() -> None:
+    """
+    FTS 인덱스 전체 재구축
+    - 트리거를 우회한 raw SQL 적재 후 등 인덱스가 어긋났을 때 사용
+    - PostgreSQL 표현식 인덱스는 DB가 자동으로 유지하므로 REINDEX만 수행
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite" and _sqlite_fts_available():
+            cursor.execute(f"INSERT INTO {BOOK_FTS_TABLE}({BOOK_FTS_TABLE}) VALUES ('rebuild')")
+        elif connection.vendor == "postgresql":
+            for field in SEARCH_FIELDS:
+                cursor.execute(f"REINDEX INDEX idx_book_{field}_fts")
+                cursor.execute(f"REINDEX INDEX idx_book_{field}_trgm")
+
+
+def ensure_book_search_index(using: str = "default") -> bool:
+    """
+    SQLite 동기화 트리거가 빠져 있으면 다시 만들고 FTS 인덱스 재구축
+    - FTS 테이블이 없는 환경(트리그램 미지원 SQLite / 마이그레이션 전)이면 아무것도 안 함
+    :return: 트리거를 다시 만들었는지 여부
+    """
+    conn = connections[using]
+    if conn.vendor != "sqlite":
+        return False
+
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE (type = 'table' AND name = %s) OR type = 'trigger'",
+            [BOOK_FTS_TABLE],
+        )
+        names = {row[0] for row in cursor.fetchall()}
+        if BOOK_FTS_TABLE not in names:
+            return False
+
+        missing = [name for name in SQLITE_TRIGGER_SQL if name not in names]
+        if not missing:
+            return False
+
+        for name in missing:
+            cursor.execute(SQLITE_TRIGGER_SQL[name])
+        # 트리거가 없던 동안 바뀐 도서까지 반영
+        cursor.execute(f"INSERT INTO {BOOK_FTS_TABLE}({BOOK_FTS_TABLE}) VALUES ('rebuild')")
+    return True
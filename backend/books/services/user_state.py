@@ -0,0 +1,72 @@
+"""
+books/services/user_state.py
+
+로그인한 사용자의 도서별 상태 (북마크 여부 / 내가 준 평점) 조회
+
+정책 요약:
+- 도서 1권이든 여러 권이든 쿼리 1번으로 조회
+  (Exists(북마크) + Subquery(평점) 주석 → unique(user, book) 이라 도서당 최대 1건)
+- 상세 조회  : annotate_user_state() 로 도서 조회 쿼리 자체에 붙임 → 추가 쿼리 없음
+- 목록 조회  : load_user_state() 결과를 serializer context['user_state'] 로 전달
+- 비로그인   : 쿼리 없이 기본값 (북마크 False / 평점 None)
+"""
+
+from django.db.models import Exists, OuterRef, Subquery
+
+from books.models import Book, Bookmark, BookRating
+
+
+# 주석(annotate) 이름 (serializer 필드 이름과 겹치지 않게)
+BOOKMARKED_ANNOTATION = "user_is_bookmarked"
+SCORE_ANNOTATION = "user_score"
+
+# 비로그인 / 상태 없음 기본값
+EMPTY_STATE = {"is_bookmarked": False, "user_rating": None}
+
+
+def annotate_user_state(queryset, user):
+    """Book QuerySet에 user_is_bookmarked / user_score 주석 추가"""
+    if not user or not user.is_authenticated:
+        return queryset
+    return queryset.annotate(**{
+        BOOKMARKED_ANNOTATION: Exists(
+            Bookmark.objects.filter(user=user, book=OuterRef("pk"))
+        ),
+        SCORE_ANNOTATION: Subquery(
+            BookRating.objects.filter(user=user, book=OuterRef("pk")).values("score")[:1]
+        ),
+    })
+
+
+def load_user_state(user, book_ids) -> dict:
+    """
+    book_id → {'is_bookmarked': bool, 'user_rating': Decimal | None}
+    - 북마크 / 평점이 없는 도서도 키는 포함
+    """
+    book_ids = list(book_ids)
+    if not user or not user.is_authenticated or not book_ids:
+        return {book_id: dict(EMPTY_STATE) for book_id in book_ids}
+
+    rows = annotate_user_state(Book.objects.filter(pk__in=book_ids), user).values_list(
+        "pk", BOOKMARKED_ANNOTATION, SCORE_ANNOTATION
+    )
+    return {
+        book_id: {"is_bookmarked": bool(is_bookmarked), "user_rating": score}
+        for book_id, is_bookmarked, score in rows
+    }
+
+
+def get_user_state(book, context) -> dict | None:
+    """
+    serializer 에서 사용: 주석 → context['user_state'] 순서로 찾고 없으면 None
+    (None 이면 serializer가 기존 방식대로 직접 조회)
+    """
+    if hasattr(book, BOOKMARKED_ANNOTATION):
+        return {
+            "is_bookmarked": bool(getattr(book, BOOKMARKED_ANNOTATION)),
+            "user_rating": getattr(book, SCORE_ANNOTATION),
+        }
+    user_state = context.get("user_state")
+    if user_state is not None:
+        return user_state.get(book.pk, EMPTY_STATE)
+    return None
@@ -1,42 +1,187 @@
 """
 Book 평점 자동 업데이트 Signal
-BookRating이 생성/수정/삭제될 때 Book의 average_rating, rating_count 자동 업데이트
+BookRating이 생성/수정/삭제될 때 Book의 rating_sum, rating_count, average_rating 을 변화량만큼 갱신
+
+Book 북마크 수 차감 Signal
+사용자가 삭제될 때 CASCADE 로 함께 지워지는 북마크만큼 Book.bookmark_count 차감
+
+Book 추천 점수 자동 계산 Signal
+Book이 저장될 때 sales_point / best_rank / customer_review_rank 로 final_score 갱신
+
+Book 자동완성 인덱스 Signal
+Book이 생성/수정/삭제될 때 메모리 자동완성 인덱스 증분 갱신
+
+도서 목록 캐시 무효화 Signal
+Book이 생성/수정/삭제될 때 카탈로그 버전을 올려서 메인 목록 / 베스트셀러 캐시 무효화
+제목 / 표지 / 성인 여부가 바뀌면 인덱스 버전도 올려서 다른 프로세스의 자동완성 / 중고거래 비트맵 인덱스 재적재
+
+자동완성 갱신 / 버전 올리기는 트랜잭션 블록마다 모아서 커밋 뒤 한 번에 반영
+(loaddata 처럼 한 트랜잭션에서 많은 행을 저장해도 on_commit 콜백 1개, 공용 캐시 읽기/쓰기 1번)
+loaddata(raw) 저장은 행마다 인덱스를 고치지 않고 인덱스 버전만 올려서 모든 프로세스가 다시 적재
+
+도서 검색(FTS) 트리거 복구 Signal
+migrate 후 SQLite book 테이블 재생성으로 사라진 FTS 동기화 트리거 재생성
 """
-from django.db.models.signals import post_save, post_delete
+from decimal import Decimal
+from django.db import transaction
+from django.conf import settings
+from django.db.models import F
+from django.db.models.signals import pre_save, pre_delete, post_init, post_save, post_delete, post_migrate
 from django.dispatch import receiver
-from django.db.models import Avg, Count
-from .models import BookRating
+from .models import Book, BookRating
+from .services.autocomplete import book_autocomplete_index
+from .services.recommand import compute_final_score
+from .services.search_index import ensure_book_search_index
+from .services.catalog_cache import bump_catalog_version, bump_index_version, touches_catalog, touches_index
+from .services.rating_stats import apply_rating_delta
 
 
-@receiver(post_save, sender=BookRating)
-def update_book_rating_on_save(sender, instance, **kwargs):
-    """평점 생성/수정 시 Book 평점 필드 자동 업데이트"""
-    book = instance.book
-
-    # BookRating 테이블에서 집계
-    stats = BookRating.objects.filter(book=book).aggregate(
-        avg_rating=Avg('score'),
-        count_rating=Count('id')
-    )
+@receiver(post_init, sender=BookRating)
+def remember_original_score(sender, instance, **kwargs):
+    """DB 에서 읽어온 점수 기억 (수정 시 old → new 차이 계산용)"""
+    instance._original_score = instance.score if instance.pk else None
 
-    # Book 테이블 업데이트
-    book.average_rating = stats['avg_rating'] or 0.00
-    book.rating_count = stats['count_rating']
-    book.save(update_fields=['average_rating', 'rating_count'])
+
+def _apply_rating_delta(rating, score_delta, count_delta):
+    """
+    Book 평점 집계 증분 갱신
+    - 갱신된 값은 rating.book_stats 에 저장 + 이미 불러온 rating.book 에도 반영 (뷰에서 refresh_from_db 불필요)
+    """
+    stats = apply_rating_delta(rating.book_id, score_delta, count_delta)
+    if stats is None:
+        return
+    rating.book_stats = stats
+    # 이미 불러온 book 객체가 있을 때만 갱신 (없으면 쿼리하지 않음)
+    book = rating._state.fields_cache.get('book')
+    if book is not None:
+        for field, value in stats.items():
+            setattr(book, field, value)
+    # 목록 응답에 평점이 나오므로 캐시 무효화
+    _queue_book_changes(catalog=True)
+
+
+@receiver(post_save, sender=BookRating)
+def update_book_rating_on_save(sender, instance, created, **kwargs):
+    """평점 생성/수정 시 Book 평점 필드 자동 업데이트 (AVG / COUNT 재집계 없이 변화량만)"""
+    if created or instance._original_score is None:
+        _apply_rating_delta(instance, instance.score, 1)
+    elif instance.score != instance._original_score:
+        _apply_rating_delta(instance, Decimal(str(instance.score)) - Decimal(str(instance._original_score)), 0)
+    instance._original_score = instance.score
 
 
 @receiver(post_delete, sender=BookRating)
 def update_book_rating_on_delete(sender, instance, **kwargs):
     """평점 삭제 시 Book 평점 필드 자동 업데이트"""
-    book = instance.book
+    score = instance._original_score if instance._original_score is not None else instance.score
+    _apply_rating_delta(instance, -Decimal(str(score)), -1)
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def release_bookmarks_on_user_delete(sender, instance, **kwargs):
+    """탈퇴 시 CASCADE 로 지워질 북마크만큼 도서별 북마크 수 차감 (UPDATE 1번)"""
+    Book.objects.filter(bookmarks__user=instance).update(bookmark_count=F('bookmark_count') - 1)
+
 
-    # BookRating 테이블에서 집계
-    stats = BookRating.objects.filter(book=book).aggregate(
-        avg_rating=Avg('score'),
-        count_rating=Count('id')
+@receiver(pre_save, sender=Book)
+def update_book_final_score(sender, instance, **kwargs):
+    """도서 저장 직전 추천 점수 계산 (loaddata 포함)"""
+    instance.final_score = compute_final_score(
+        instance.sales_point,
+        instance.best_rank,
+        instance.customer_review_rank,
     )
 
-    # Book 테이블 업데이트
-    book.average_rating = stats['avg_rating'] or 0.00
-    book.rating_count = stats['count_rating']
-    book.save(update_fields=['average_rating', 'rating_count'])
+
+# ─────────────────────────────
+# 커밋 뒤 반영할 도서 변경 (트랜잭션 블록마다 1번)
+# ─────────────────────────────
+class _PendingBookChanges:
+    """한 트랜잭션 블록에서 쌓인 도서 변경 → 커밋 뒤 자동완성 인덱스 반영 + 버전 올리기"""
+
+    def __init__(self):
+        self.saved = {}         # book_id → Book
+        self.deleted = set()
+        self.catalog = False
+        self.index = False
+        self.applied_locally = True     # 인덱스 변경을 모두 이 프로세스 인덱스에 직접 반영했는지
+        self.done = False
+
+    def __call__(self):
+        self.done = True
+        for book_id in self.deleted:
+            book_autocomplete_index.remove(book_id)
+        for book in self.saved.values():
+            book_autocomplete_index.add(book)
+        if self.catalog:
+            bump_catalog_version()
+        if self.index:
+            bump_index_version(applied_locally=self.applied_locally)
+
+
+def _queue_book_changes(saved=None, deleted=None, catalog=False, index=False, applied_locally=True):
+    """
+    커밋 뒤 반영할 변경 추가
+    - 트랜잭션 블록(세이브포인트)마다 변경 모음 1개만 on_commit 에 등록 (connection 에 기억)
+    - 이미 실행됐거나 롤백으로 콜백이 버려졌으면 새로 등록 (세이브포인트 롤백 시 그 안의 변경도 같이 버려짐)
+    - 트랜잭션 밖(autocommit)이면 on_commit 처럼 바로 반영
+    """
+    connection = transaction.get_connection()
+    pending = getattr(connection, '_pending_book_changes', None)
+    registered = False
+    if connection.in_atomic_block and pending is not None and not pending.done:
+        # 같은 블록(세이브포인트)에서 등록한 콜백이 아직 남아 있는지
+        savepoint_ids = set(connection.savepoint_ids)
+        registered = any(
+            func is pending and sids == savepoint_ids for sids, func, _ in reversed(connection.run_on_commit)
+        )
+    if not registered:
+        pending = _PendingBookChanges()
+
+    if saved is not None:
+        pending.deleted.discard(saved.pk)
+        pending.saved[saved.pk] = saved
+    if deleted is not None:
+        pending.saved.pop(deleted, None)
+        pending.deleted.add(deleted)
+    pending.catalog |= catalog
+    if index:
+        pending.index = True
+        pending.applied_locally &= applied_locally
+
+    if not registered:
+        if connection.in_atomic_block:
+            connection._pending_book_changes = pending
+        transaction.on_commit(pending)
+
+
+@receiver(post_save, sender=Book)
+def update_book_indexes_on_save(sender, instance, update_fields=None, raw=False, **kwargs):
+    """
+    도서 생성/수정 시 자동완성 인덱스 갱신 + 캐시 무효화 (커밋된 뒤에만 반영)
+    - 목록에 나오는 컬럼이 바뀌었을 때만 카탈로그 버전 올림 (관리자 수정 / 평점 집계 포함)
+    - 인덱스 컬럼이 바뀌면 인덱스 버전도 올림 (이 프로세스 인덱스는 직접 반영하므로 다른 프로세스만 다시 적재)
+    - loaddata(raw) 는 행마다 인덱스를 고치지 않고 버전만 올림 → 모든 프로세스가 다시 적재
+    """
+    if raw:
+        _queue_book_changes(catalog=True, index=True, applied_locally=False)
+        return
+    _queue_book_changes(
+        saved=instance,
+        catalog=touches_catalog(update_fields),
+        index=touches_index(update_fields),
+    )
+
+
+@receiver(post_delete, sender=Book)
+def update_book_indexes_on_delete(sender, instance, **kwargs):
+    """도서 삭제 시 자동완성 인덱스에서 제거 + 캐시 무효화"""
+    _queue_book_changes(deleted=instance.pk, catalog=True, index=True)
+
+
+@receiver(post_migrate)
+def restore_book_search_triggers(sender, using, **kwargs):
+    """AddField 등으로 book 테이블이 재생성되면 FTS 트리거도 같이 사라지므로 다시 생성"""
+    if sender.label != 'books':
+        return
+    ensure_book_search_index(using)
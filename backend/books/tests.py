@@ -1,3 +1,1243 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Avg, Count, Sum
+from django.test import TestCase, override_settings, tag
+from django.test.utils import CaptureQueriesContext
+from djangorestframework_camel_case.parser import CamelCaseJSONParser
+from djangorestframework_camel_case.render import CamelCaseJSONRenderer
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from bookmarket.perf import EndpointBudgetMixin, seed_catalog
+from bookmarket.renderers import FastCamelCaseJSONParser, FastCamelCaseJSONRenderer
+from trades.models import Trade
+
+from .models import Book, Bookmark, BookRating, Category
+from .serializers import BookSearchSerializer
+from .services.ai_client import (
+    FileRecommendCacheBackend, LLMClient, LLMStreamError, LocMemRecommendCacheBackend, RecommendationStreamParser,
+    llm_client,
+)
+from .services.autocomplete import book_autocomplete_index, decompose_jamo, extract_choseong
+from .services.catalog_cache import bump_index_version, check_index_version, get_catalog_version, get_index_version
+from .services.aladin_stream import iter_json_records
+from .services.recommand import compute_final_score, refresh_final_scores
+from .services.search_index import SQLITE_TRIGGER_SQL, ensure_book_search_index, search_books
+from .services.ai_prompt import build_recommend_prompt, encode_candidates, estimate_tokens, recommend_prompt_built
+from .services.recommend_result import hydrate_recommendations
+from .services.user_state import load_user_state
+
+# 자동완성 인덱스 재적재를 요청 스레드에서 바로 (TestCase 트랜잭션 안의 데이터는 다른 스레드에서 안 보임)
+sync_autocomplete_index = override_settings(AUTOCOMPLETE_INDEX={"BACKGROUND": False})
+
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    """OpenAI chat completions 응답을 흉내내는 로컬 스텁 서버"""
+    protocol_version = "HTTP/1.1"   # keep-alive
+    content = {"recommendations": [{"id": 1, "reason": "좋은 책이라네."}]}
+    # 스트림 끝([DONE] 앞)에 덧붙일 SSE data (깨진 이벤트 테스트용)
+    trailing_events = ()
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        request_body = json.loads(self.rfile.read(length))
+        self.server.requests.append(request_body)
+        self.server.client_ports.add(self.client_address[1])
+
+        if request_body.get("stream"):
+            return self._stream()
+
+        body = json.dumps({
+            "choices": [{"message": {"content": json.dumps(self.content, ensure_ascii=False)}}],
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self):
+        """응답 JSON을 몇 글자씩 잘라 SSE delta 로 전송"""
+        content = json.dumps(self.content, ensure_ascii=False)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for i in range(0, len(content), 7):
+            chunk = {"choices": [{"delta": {"content": content[i:i + 7]}}]}
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+        for data in self.trailing_events:
+            self.wfile.write(f"data: {data}\n\n".encode("utf-8"))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubLLMServerMixin:
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubLLMHandler)
+        cls.server.requests = []
+        cls.server.client_ports = set()
+        cls.endpoint = f"http://127.0.0.1:{cls.server.server_port}/v1/chat/completions"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        self.server.requests.clear()
+        self.server.client_ports.clear()
+
+
+class LLMClientStubServerTest(StubLLMServerMixin, TestCase):
+    """로컬 스텁 서버로 동기 / 비동기 AI 호출 확인"""
+
+    def test_sync_client_reuses_connection(self):
+        client = LLMClient(endpoint=self.endpoint, api_key="test")
+
+        first = client.recommend_books("prompt 1")
+        second = client.recommend_books("prompt 2")
+
+        self.assertEqual(first, StubLLMHandler.content)
+        self.assertEqual(second, StubLLMHandler.content)
+        self.assertEqual(len(self.server.requests), 2)
+        # keep-alive 커넥션 풀 → TCP 연결 1개로 두 번 호출
+        self.assertEqual(len(self.server.client_ports), 1)
+
+    def test_async_client_handles_concurrent_requests(self):
+        client = LLMClient(endpoint=self.endpoint, api_key="test")
+
+        async def run():
+            try:
+                return await asyncio.gather(*[
+                    client.arecommend_books(f"prompt {i}") for i in range(5)
+                ])
+            finally:
+                await client.aclose()
+
+        results = asyncio.run(run())
+
+        self.assertEqual(results, [StubLLMHandler.content] * 5)
+        self.assertEqual(len(self.server.requests), 5)
+
+    def test_cache_key_skips_second_call(self):
+        client = LLMClient(endpoint=self.endpoint, api_key="test")
+
+        client.recommend_books("prompt", cache_key="same")
+        client.recommend_books("prompt", cache_key="same")
+
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(client.cache.stats()["hits"], 1)
+
+    def test_stream_malformed_event_raises_stream_error(self):
+        client = LLMClient(endpoint=self.endpoint, api_key="test")
+        received = []
+
+        with mock.patch.object(StubLLMHandler, "trailing_events", ('{"choices": [{"delta": {"cont',)):
+            with self.assertRaises(LLMStreamError) as raised:
+                for item in client.stream_recommend_books("prompt", cache_key="broken"):
+                    received.append(item)
+
+        # 깨진 이벤트 전까지 완성된 추천은 그대로 전달, 실패한 응답은 캐시하지 않음
+        self.assertEqual(received, StubLLMHandler.content["recommendations"])
+        self.assertEqual(raised.exception.detail["raw_event"], '{"choices": [{"delta": {"cont')
+        self.assertIsNone(client.cache.get("broken"))
+
+
+class RecommendationStreamParserTest(TestCase):
+    def test_emits_each_recommendation_when_closed(self):
+        text = json.dumps({"recommendations": [
+            {"id": 1, "description": "중괄호 {도} \"따옴표\" 도 괜찮다네"},
+            {"id": 2, "description": "두 번째"},
+            {"id": 3, "description": "세 번째"},
+        ]}, ensure_ascii=False)
+        parser = RecommendationStreamParser()
+
+        fed = "```json\n" + text
+        emitted = []
+        for ch in fed:
+            emitted.append([item["id"] for item in parser.feed(ch)])
+
+        flat = [book_id for ids in emitted for book_id in ids]
+        self.assertEqual(flat, [1, 2, 3])
+        # 첫 번째 추천은 두 번째 추천을 받기 전에 나와야 함
+        first_index = next(i for i, ids in enumerate(emitted) if ids)
+        self.assertLess(first_index, fed.index('"id": 2'))
+
+
+class RecommendCacheBackendTest(TestCase):
+    """추천 응답 캐시 백엔드 (locmem / file) TTL / LRU"""
+
+    def backends(self, max_entries=2):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        return {
+            "locmem": LocMemRecommendCacheBackend(max_entries=max_entries),
+            "file": FileRecommendCacheBackend(max_entries=max_entries, location=tmp.name),
+        }
+
+    def test_entries_expire_after_ttl(self):
+        for name, backend in self.backends().items():
+            with self.subTest(name), mock.patch("books.services.ai_client.time.time", return_value=1000.0) as now:
+                backend.set("a", {"n": 1}, ttl=60)
+                now.return_value = 1059.0
+                self.assertEqual(backend.get("a"), {"n": 1})
+                now.return_value = 1061.0
+                self.assertIsNone(backend.get("a"))
+                self.assertEqual(len(backend), 0)
+
+    def test_least_recently_used_is_evicted(self):
+        for name, backend in self.backends().items():
+            with self.subTest(name), mock.patch("books.services.ai_client.time.time", return_value=1000.0) as now:
+                backend.set("a", 1, ttl=600)
+                now.return_value = 1001.0
+                backend.set("b", 2, ttl=600)
+                now.return_value = 1002.0
+                backend.get("a")    # a 를 최근 사용으로
+                now.return_value = 1003.0
+                backend.set("c", 3, ttl=600)
+
+                self.assertEqual(len(backend), 2)
+                self.assertEqual((backend.get("a"), backend.get("b"), backend.get("c")), (1, None, 3))
+
+    def test_file_backend_treats_bad_entries_as_misses(self):
+        backend = self.backends()["file"]
+        for key, content in (("broken", "{not json"), ("list", "[1, 2]"), ("partial", '{"value": 1}'),
+                             ("text", '{"expires_at": "soon", "value": 1}')):
+            (backend.location / f"{key}.json").write_text(content, encoding="utf-8")
+            self.assertIsNone(backend.get(key), key)
+            self.assertFalse((backend.location / f"{key}.json").exists(), key)
+
+    def test_file_backend_writes_through_unique_temp_files(self):
+        backend = self.backends(max_entries=10)["file"]
+        with mock.patch("books.services.ai_client.os.replace", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                backend.set("a", 1, ttl=60)
+        # 실패한 임시 파일은 남기지 않음
+        self.assertEqual(list(backend.location.iterdir()), [])
+
+        threads = [threading.Thread(target=backend.set, args=("same", i, 60)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertIn(backend.get("same"), range(8))
+        self.assertEqual([path.name for path in backend.location.iterdir()], ["same.json"])
+
+
+class RecommendPromptBudgetTest(TestCase):
+    """후보 목록 압축 / 토큰 예산"""
+
+    books = [
+        {
+            "id": i, "title": f"<b>도서</b> {i}", "author": "저자", "publisher": "출판사",
+            "category": "소설/시/희곡", "pub_date": "2020-01-01",
+            "description": "아주 긴 소개글 " * 100,
+        }
+        for i in range(70)
+    ]
+
+    def test_descriptions_shrink_before_books_are_dropped(self):
+        text, kept, description_chars = encode_candidates(self.books, token_budget=3000, description_chars=160)
+
+        self.assertEqual(kept, 70)
+        self.assertLess(description_chars, 160)
+        self.assertLessEqual(estimate_tokens(text), 3000)
+        self.assertTrue(text.startswith("0|도서 0|저자|출판사|소설/시/희곡|2020|"))
+
+    def test_prompt_respects_budget_and_reports_size(self):
+        sizes = []
+        receiver = lambda sender, **kwargs: sizes.append(kwargs)
+        recommend_prompt_built.connect(receiver)
+        try:
+            with self.settings(RECOMMEND_PROMPT={"TOKEN_BUDGET": 1500}):
+                prompt = build_recommend_prompt("", "따뜻한 소설", self.books)
+        finally:
+            recommend_prompt_built.disconnect(receiver)
+
+        self.assertEqual(len(sizes), 1)
+        self.assertEqual(sizes[0]["tokens"], estimate_tokens(prompt))
+        self.assertLessEqual(sizes[0]["tokens"], 1500)
+        self.assertGreater(sizes[0]["dropped_count"], 0)
+        self.assertNotIn("http", prompt)
+
+
+class RecommendHydrationTest(TestCase):
+    """AI 응답(id + reason) → 도서 정보 채우기"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.books = [
+            Book.objects.create(
+                isbn=f"979000000000{i}", title=f"진짜 제목 {i}", author="진짜 저자", publisher="출판사",
+                cover=f"https://example.com/{i}.jpg",
+            )
+            for i in range(4)
+        ]
+        cls.candidate_ids = [book.id for book in cls.books[:3]]
+
+    def test_fills_fields_from_db_in_one_query(self):
+        first, second, _, outside = self.books
+        result = {"recommendations": [
+            {"id": str(first.id), "reason": "첫 번째라네.", "title": "지어낸 제목"},
+            {"id": outside.id, "reason": "후보가 아니라네."},
+            {"id": first.id, "reason": "중복이라네."},
+            {"id": second.id, "reason": "두 번째라네."},
+        ]}
+
+        with self.assertNumQueries(1):
+            hydrated = hydrate_recommendations(result, self.candidate_ids)
+
+        self.assertEqual(hydrated["recommendations"], [
+            {"id": first.id, "title": first.title, "author": "진짜 저자", "cover": first.cover,
+             "category": None, "description": "첫 번째라네."},
+            {"id": second.id, "title": second.title, "author": "진짜 저자", "cover": second.cover,
+             "category": None, "description": "두 번째라네."},
+        ])
+
+    def test_error_response_passes_through(self):
+        error = {"error": "GMS OpenAI API error", "status_code": 500}
+        with self.assertNumQueries(0):
+            self.assertEqual(hydrate_recommendations(error, self.candidate_ids), error)
+
+
+class BookDetailUserStateTest(APITestCase):
+    """도서 상세 - 북마크 / 평점 / 중고거래를 고정된 쿼리 수로 조회"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="경제경영")
+        cls.book = Book.objects.create(
+            isbn="9791100000001", title="상세 도서", author="저자", publisher="출판사", category=category,
+        )
+        cls.other = Book.objects.create(isbn="9791100000002", title="다른 도서", author="저자", publisher="출판사")
+        User = get_user_model()
+        cls.user = User.objects.create_user(username="detail", password="pw12345!", nickname="독자")
+        for i in range(5):
+            seller = User.objects.create_user(username=f"seller{i}", password="pw12345!", nickname=f"판매자{i}")
+            Trade.objects.create(
+                user=seller, book=cls.book, title=f"판매 {i}", content="내용", price=1000, region="seoul",
+            )
+        Bookmark.objects.create(user=cls.user, book=cls.book)
+        BookRating.objects.create(user=cls.user, book=cls.book, score="4.5")
+
+    def test_detail_query_count_is_fixed(self):
+        self.client.force_authenticate(self.user)
+
+        # 도서 + 카테고리 + 북마크/평점 1번, 중고거래 + 판매자 1번
+        with self.assertNumQueries(2):
+            response = self.client.get(f"/api/books/{self.book.id}/")
+
+        data = response.json()
+        self.assertTrue(data["isBookmarked"])
+        self.assertEqual(data["userRating"], 4.5)
+        self.assertEqual(len(data["trades"]), 5)
+        self.assertEqual(data["trades"][0]["bookTitle"], "상세 도서")
+
+    def test_anonymous_detail(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(f"/api/books/{self.book.id}/")
+
+        data = response.json()
+        self.assertFalse(data["isBookmarked"])
+        self.assertIsNone(data["userRating"])
+
+    def test_load_user_state_for_many_books(self):
+        with self.assertNumQueries(1):
+            state = load_user_state(self.user, [self.book.id, self.other.id])
+
+        self.assertEqual(state[self.book.id], {"is_bookmarked": True, "user_rating": Decimal("4.5")})
+        self.assertEqual(state[self.other.id], {"is_bookmarked": False, "user_rating": None})
+
+
+class BestSellerKeysetPaginationTest(APITestCase):
+    """베스트셀러 ?cursor= 키셋 페이지네이션"""
+
+    def setUp(self):
+        cache.clear()
+
+    @classmethod
+    def setUpTestData(cls):
+        # 순위 동점(같은 best_rank)도 id 로 순서가 정해져야 함
+        Book.objects.bulk_create([
+            Book(isbn=f"97922{i:08d}", title=f"베스트 {i}", author="저자", publisher="출판사", best_rank=i // 3 + 1)
+            for i in range(30)
+        ])
+        Book.objects.create(isbn="9792299999999", title="순위 없음", author="저자", publisher="출판사")
+
+    def test_walks_all_pages_without_count(self):
+        expected = list(
+            Book.objects.filter(best_rank__isnull=False).order_by("best_rank", "id").values_list("id", flat=True)
+        )
+        ids = []
+        url = "/api/books/bestseller/?cursor=&size=7"
+        while url:
+            # 페이지마다 쿼리 1번 (COUNT 없음, OFFSET 없음)
+            with self.assertNumQueries(1):
+                data = self.client.get(url).json()
+            self.assertIsNone(data["count"])
+            ids += [book["id"] for book in data["results"]]
+            url = data["next"]
+
+        self.assertEqual(ids, expected)
+
+    def test_cached_count(self):
+        with self.assertNumQueries(2):
+            data = self.client.get("/api/books/bestseller/", {"cursor": "", "size": 7, "count": "cached"}).json()
+        self.assertEqual(data["count"], 30)
+        self.assertEqual(data["totalPages"], 5)
+
+        # 두 번째 요청부터는 캐시된 개수 사용
+        with self.assertNumQueries(1):
+            self.client.get(data["next"])
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/books/bestseller/", {"page": 2, "size": 7, "count": "cached"})
+        self.assertEqual(response.json()["count"], 30)
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/api/books/bestseller/", {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 404)
+
+
+class BookListProjectionTest(APITestCase):
+    """목록 응답 필드 축소 / ?fields= (serializers.SparseFieldsetMixin)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="소설")
+        Book.objects.bulk_create([
+            Book(isbn=f"97944{i:08d}", title=f"목록 {i}", author="저자", publisher="출판사",
+                 category=category, best_rank=i + 1, description="긴 소개 " * 200)
+            for i in range(5)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_lists_skip_description(self):
+        for url in ("/api/books/", "/api/books/bestseller/", "/api/books/search/"):
+            with self.subTest(url=url), CaptureQueriesContext(connection) as ctx:
+                data = self.client.get(url).json()
+                book = data[0] if isinstance(data, list) else data["results"][0]
+                self.assertNotIn("description", book)
+                self.assertNotIn("createdAt", book)
+                self.assertIn("bestRank", book)
+                # 쿼리에서도 description 컬럼을 읽지 않음
+                self.assertNotIn('"description"', ctx.captured_queries[-1]["sql"])
+
+        book = self.client.get("/api/books/search/").json()["results"][0]
+        self.assertEqual(book["category"]["name"], "소설")
+        self.assertIn("pubDate", book)
+
+    def test_sparse_fieldset(self):
+        data = self.client.get("/api/books/search/", {"fields": "title,bestRank,unknown"}).json()
+
+        self.assertEqual(set(data["results"][0]), {"id", "title", "bestRank"})
+
+    def test_sparse_fieldset_with_cursor(self):
+        # 정렬 컬럼(best_rank)을 요청하지 않아도 추가 쿼리 없이 커서 생성
+        with self.assertNumQueries(1):
+            data = self.client.get("/api/books/bestseller/", {"cursor": "", "size": 2, "fields": "title"}).json()
+
+        self.assertEqual(set(data["results"][0]), {"id", "title"})
+        self.assertIsNotNone(data["nextCursor"])
+
+
+class BookRatingAggregateTest(APITestCase):
+    """평점 집계 증분 갱신 (services/rating_stats.py, signals.py)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.users = [User.objects.create_user(username=f"rater{i}", password="pw12345!") for i in range(3)]
+        cls.book = Book.objects.create(isbn="9796600000001", title="평점", author="저자", publisher="출판사")
+        cls.busy = Book.objects.create(isbn="9796600000002", title="평점 많음", author="저자", publisher="출판사")
+        others = User.objects.bulk_create([User(username=f"busy{i}", password="x") for i in range(60)])
+        BookRating.objects.bulk_create([BookRating(user=u, book=cls.busy, score="4.0") for u in others])
+        Book.objects.filter(pk=cls.busy.pk).update(rating_sum=240, rating_count=60, average_rating=4)
+
+    def rate(self, user, book, score):
+        self.client.force_authenticate(user)
+        return self.client.post(f"/api/books/{book.id}/rating/", {"score": score}, format="json")
+
+    def assertMatchesRecount(self, book):
+        book.refresh_from_db()
+        stats = BookRating.objects.filter(book=book).aggregate(s=Sum("score"), c=Count("id"), a=Avg("score"))
+        self.assertEqual(book.rating_sum, stats["s"] or 0)
+        self.assertEqual(book.rating_count, stats["c"])
+        self.assertEqual(book.average_rating, Decimal(stats["a"] or 0).quantize(Decimal("0.01")))
+
+    def test_create_update_delete(self):
+        data = self.rate(self.users[0], self.book, "4.5").json()
+        self.assertEqual((data["averageRating"], data["ratingCount"]), (4.5, 1))
+
+        self.rate(self.users[1], self.book, "3.0")
+        data = self.rate(self.users[0], self.book, "2.0").json()   # 4.5 → 2.0
+        self.assertEqual((data["averageRating"], data["ratingCount"]), (2.5, 2))
+        self.assertMatchesRecount(self.book)
+
+        BookRating.objects.get(user=self.users[1], book=self.book).delete()
+        self.assertMatchesRecount(self.book)
+        BookRating.objects.get(user=self.users[0], book=self.book).delete()
+        self.assertMatchesRecount(self.book)
+
+    def test_query_count_does_not_depend_on_rating_count(self):
+        with CaptureQueriesContext(connection) as empty:
+            self.rate(self.users[2], self.book, "4.0")
+        with CaptureQueriesContext(connection) as busy:
+            data = self.rate(self.users[2], self.busy, "5.0").json()
+
+        self.assertEqual(len(busy), len(empty))
+        self.assertFalse(any("AVG(" in q["sql"].upper() for q in busy.captured_queries))
+        self.assertEqual((data["averageRating"], data["ratingCount"]), (4.02, 61))
+
+
+class BulkSyncTest(APITestCase):
+    """평점 / 북마크 일괄 등록 API (services/bulk_sync.py)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="bulk", password="pw12345!")
+        cls.other = get_user_model().objects.create_user(username="bulk2", password="pw12345!")
+        cls.books = Book.objects.bulk_create([
+            Book(isbn=f"97977{i:08d}", title=f"일괄 {i}", author="저자", publisher="출판사") for i in range(60)
+        ])
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def post_ratings(self, pairs):
+        items = [{"bookId": book_id, "score": score} for book_id, score in pairs]
+        return self.client.post("/api/books/ratings/bulk/", {"items": items}, format="json")
+
+    def test_bulk_ratings_upsert_and_aggregate(self):
+        a, b = self.books[:2]
+        BookRating.objects.create(user=self.other, book=a, score="2.0")
+
+        data = self.post_ratings([(a.id, "4.0"), (b.id, "3.0"), (999999, "5.0")]).json()
+        self.assertEqual(data, {"saved": 2, "missing": [999999]})
+
+        # 다시 보내면 수정 (중복 행 없음)
+        self.post_ratings([(a.id, "5.0"), (a.id, "1.0")])
+        self.assertEqual(BookRating.objects.get(user=self.user, book=a).score, Decimal("1.0"))
+
+        a.refresh_from_db()
+        b.refresh_from_db()
+        self.assertEqual((a.rating_count, a.rating_sum, a.average_rating), (2, Decimal("3.0"), Decimal("1.50")))
+        self.assertEqual((b.rating_count, b.average_rating), (1, Decimal("3.00")))
+
+    def test_bulk_ratings_query_count_is_constant(self):
+        with CaptureQueriesContext(connection) as few:
+            self.post_ratings([(book.id, "4.0") for book in self.books[:5]])
+        with CaptureQueriesContext(connection) as many:
+            self.post_ratings([(book.id, "3.5") for book in self.books])
+
+        self.assertEqual(len(few), len(many))
+
+    def test_bulk_limit(self):
+        response = self.post_ratings([(1, "4.0")] * 501)
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_bookmarks(self):
+        a, b, c = self.books[:3]
+        Bookmark.objects.create(user=self.user, book=a)
+        items = [
+            {"bookId": a.id, "isBookmarked": True},
+            {"bookId": b.id, "isBookmarked": True},
+            {"bookId": c.id, "isBookmarked": False},
+            {"bookId": 999999, "isBookmarked": True},
+        ]
+
+        data = self.client.post("/api/books/bookmarks/bulk/", {"items": items}, format="json").json()
+        self.assertEqual(data, {"added": 1, "removed": 0, "missing": [999999]})
+
+        items = [{"bookId": a.id, "isBookmarked": False}]
+        data = self.client.post("/api/books/bookmarks/bulk/", {"items": items}, format="json").json()
+        self.assertEqual(data["removed"], 1)
+        self.assertEqual(list(Bookmark.objects.filter(user=self.user).values_list("book_id", flat=True)), [b.id])
+        self.assertEqual(
+            list(Book.objects.filter(pk__in=[a.id, b.id, c.id]).order_by("id").values_list("bookmark_count", flat=True)),
+            [0, 1, 0],
+        )
+
+
+class BookmarkToggleTest(APITestCase):
+    """북마크 토글 (services/bookmarks.py)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.user = User.objects.create_user(username="marker", password="pw12345!")
+        cls.other = User.objects.create_user(username="marker2", password="pw12345!")
+        cls.book = Book.objects.create(isbn="9798800000001", title="북마크", author="저자", publisher="출판사")
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+        self.url = f"/api/books/{self.book.id}/bookmarks/"
+
+    def test_toggle_returns_count(self):
+        Bookmark.objects.create(user=self.other, book=self.book)
+        Book.objects.filter(pk=self.book.pk).update(bookmark_count=1)
+
+        # 등록: DELETE(0건) + INSERT ... ON CONFLICT + UPDATE ... RETURNING
+        with self.assertNumQueries(5):  # + SAVEPOINT / RELEASE
+            data = self.client.post(self.url).json()
+        self.assertEqual((data["isBookmarked"], data["bookmarkCount"]), (True, 2))
+
+        # 해제: DELETE + UPDATE ... RETURNING
+        with self.assertNumQueries(4):
+            data = self.client.post(self.url).json()
+        self.assertEqual((data["isBookmarked"], data["bookmarkCount"]), (False, 1))
+        self.assertFalse(Bookmark.objects.filter(user=self.user).exists())
+
+    def test_missing_book(self):
+        self.assertEqual(self.client.post("/api/books/999999/bookmarks/").status_code, 404)
+        self.assertFalse(Bookmark.objects.exists())
+
+    def test_concurrent_insert_does_not_raise(self):
+        # 다른 요청이 먼저 등록한 상황 (DELETE 와 INSERT 사이)
+        from books.services.bookmarks import _insert_ignore_conflict
+
+        self.assertTrue(_insert_ignore_conflict(self.user.id, self.book.id))
+        self.assertFalse(_insert_ignore_conflict(self.user.id, self.book.id))
+        self.assertEqual(Bookmark.objects.filter(user=self.user).count(), 1)
+
+    def test_user_delete_releases_count(self):
+        self.client.post(self.url)
+        self.client.force_authenticate(self.other)
+        self.client.post(self.url)
+
+        self.other.delete()
+
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.bookmark_count, 1)
+
+
+class AladinStreamTest(TestCase):
+    """init_extracted_books 스트리밍 변환 (services/aladin_stream.py)"""
+
+    RAW = [
+        {"title": "할매 &amp; <b>손녀</b>", "isbn13": "9788936439880", "author": "황석영 (지은이)",
+         "publisher": "창비", "pubDate": "2025-12-12", "description": "  한국  문학<br/>", "categoryId": 50993,
+         "adult": False, "salesPoint": 100},
+        {"title": "분류 없음", "isbn13": "9788936439881", "author": "저자", "publisher": "출판사", "categoryId": 1},
+        {"title": "Second", "isbn13": "9788936439882", "author": "A (Author), B", "publisher": "P",
+         "categoryId": "2105"},
+    ]
+
+    def test_iter_json_records_small_chunks(self):
+        array = json.dumps(self.RAW, ensure_ascii=False, indent=2)
+        lines = "\n".join(json.dumps(book, ensure_ascii=False) for book in self.RAW)
+
+        for text in (array, lines, "[]"):
+            with self.subTest(text=text[:10]):
+                records = list(iter_json_records(io.StringIO(text), chunk_size=7))
+                self.assertEqual(records, json.loads(text) if text.startswith("[") else self.RAW)
+
+    def test_command_writes_loadable_fixture(self):
+        Category.objects.bulk_create([Category(pk=1, name="소설"), Category(pk=2, name="인문")])
+        with tempfile.TemporaryDirectory() as tmp:
+            raw, categories = os.path.join(tmp, "raw.json"), os.path.join(tmp, "categories.json")
+            with open(raw, "w", encoding="utf-8") as f:
+                json.dump(self.RAW, f, ensure_ascii=False)
+            with open(categories, "w", encoding="utf-8") as f:
+                json.dump([{"pk": 1, "cid": [2105, 50993]}, {"pk": 2, "cid": [50993]}], f)
+
+            for fmt in ("jsonl", "json"):
+                with self.subTest(fmt=fmt):
+                    output = os.path.join(tmp, f"books.{fmt}")
+                    call_command("init_extracted_books", input=raw, categories=categories, output=output,
+                                 format=fmt, stdout=io.StringIO())
+                    call_command("loaddata", output, verbosity=0)
+
+                    first = Book.objects.get(pk=1)
+                    self.assertEqual(Book.objects.count(), 2)
+                    self.assertEqual((first.title, first.author, first.description), ("할매 & 손녀", "황석영", "한국 문학"))
+                    # 같은 cid 가 여러 대분류에 있으면 먼저 나온 대분류
+                    self.assertEqual(first.category_id, 1)
+                    self.assertEqual(Book.objects.get(pk=2).author, "A")
+
+
+@sync_autocomplete_index
+class BookAutocompleteTest(TestCase):
+    """도서 제목 자동완성 메모리 인덱스 (services/autocomplete.py)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        titles = ["해리 포터와 비밀의 방", "해리 포터와 마법사의 돌", "해변의 카프카", "닭갈비 요리책", "Harry Potter"]
+        cls.books = {
+            title: Book.objects.create(isbn=f"979000000030{i}", title=title, author="저자", publisher="출판사")
+            for i, title in enumerate(titles)
+        }
+
+    def setUp(self):
+        cache.clear()
+        book_autocomplete_index.clear()
+        self.addCleanup(book_autocomplete_index.clear)
+
+    def titles(self, query, limit=10):
+        return [book["title"] for book in book_autocomplete_index.search(query, limit=limit)]
+
+    def test_decompose_jamo(self):
+        self.assertEqual(decompose_jamo("해리"), "ㅎㅐㄹㅣ")
+        # 겹모음 / 겹받침은 입력 순서대로
+        self.assertEqual(decompose_jamo("과 닭"), "ㄱㅗㅏㄷㅏㄹㄱ")
+        self.assertEqual(decompose_jamo("Harry 2"), "harry2")
+        self.assertEqual(extract_choseong("해리 포터"), "ㅎㄹㅍㅌ")
+
+    def test_choseong_query(self):
+        self.assertEqual(self.titles("ㅎㄹㅍㅌ"), ["해리 포터와 마법사의 돌", "해리 포터와 비밀의 방"])
+        self.assertEqual(self.titles("ㅋㅍㅋ"), ["해변의 카프카"])
+
+    def test_partial_syllable_query(self):
+        # 입력 중인 마지막 글자('핼' = 해 + ㄹ, '달ㄱ' = 닭 입력 중)
+        self.assertEqual(self.titles("핼"), ["해리 포터와 마법사의 돌", "해리 포터와 비밀의 방"])
+        self.assertEqual(self.titles("해리 포터와 ㅂ"), ["해리 포터와 비밀의 방"])
+        self.assertEqual(self.titles("달ㄱ"), ["닭갈비 요리책"])
+        self.assertEqual(self.titles("harry"), ["Harry Potter"])
+        self.assertEqual(self.titles("해", limit=2), ["해리 포터와 마법사의 돌", "해리 포터와 비밀의 방"])
+
+    def test_signals_update_index_without_queries(self):
+        self.titles("핼")   # 최초 적재
+
+        with self.captureOnCommitCallbacks(execute=True):
+            added = Book.objects.create(isbn="9790000000399", title="해리엇", author="저자", publisher="출판사")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.books["해리 포터와 비밀의 방"].delete()
+        book = self.books["해변의 카프카"]
+        book.title = "해리와 카프카"
+        with self.captureOnCommitCallbacks(execute=True):
+            book.save()
+
+        # 이 프로세스의 변경은 시그널로 반영 → 다시 적재하지 않음
+        with self.assertNumQueries(0):
+            self.assertEqual(self.titles("핼"), ["해리 포터와 마법사의 돌", "해리엇", "해리와 카프카"])
+        self.assertEqual(self.titles("ㅎㄹㅇ")[:1], [added.title])
+
+    def test_change_from_another_process_rebuilds(self):
+        self.titles("핼")
+        # 다른 워커 / 적재 커멘드: 시그널 없이 바꾸고 인덱스 버전만 올림
+        Book.objects.filter(pk=self.books["닭갈비 요리책"].pk).update(title="해리의 요리책")
+        bump_index_version()
+
+        self.assertEqual(self.titles("핼"), ["해리 포터와 마법사의 돌", "해리 포터와 비밀의 방", "해리의 요리책"])
+
+    @override_settings(AUTOCOMPLETE_INDEX={"BACKGROUND": True})
+    def test_stale_index_served_while_rebuilding(self):
+        self.titles("핼")
+        Book.objects.filter(pk=self.books["닭갈비 요리책"].pk).update(title="해리의 요리책")
+        bump_index_version()
+
+        # 백그라운드 적재: 적재가 끝날 때까지 기존 인덱스로 응답하고 적재 스레드만 시작
+        with mock.patch("books.services.autocomplete.threading.Thread") as thread:
+            with self.assertNumQueries(0):
+                self.assertEqual(self.titles("핼"), ["해리 포터와 마법사의 돌", "해리 포터와 비밀의 방"])
+            self.titles("해리")
+            thread.assert_called_once()
+
+        self.assertEqual(thread.call_args.kwargs["target"], book_autocomplete_index._rebuild_in_background)
+        load = book_autocomplete_index._load
+
+        def load_then_delete():
+            state = load()
+            # 다 읽은 뒤 교체 전에 커밋된 변경 → 교체 후 다시 반영되어야 함
+            with self.captureOnCommitCallbacks(execute=True):
+                self.books["해리 포터와 비밀의 방"].delete()
+            return state
+
+        with mock.patch.object(book_autocomplete_index, "_load", side_effect=load_then_delete):
+            book_autocomplete_index.rebuild()    # 스레드가 할 일 (적재 후 DB 연결 정리만 추가)
+
+        self.assertEqual(self.titles("핼"), ["해리 포터와 마법사의 돌", "해리의 요리책"])
+
+
+class BookFullTextSearchTest(TestCase):
+    """도서 전문 검색 (services/search_index.py) - bm25 순위 / 짧은 검색어 / 트리거 동기화"""
+
+    @classmethod
+    def setUpTestData(cls):
+        def book(isbn, title, author="저자"):
+            return Book.objects.create(isbn=isbn, title=title, author=author, publisher="출판사")
+
+        # id 순서와 관련도 순서가 반대가 되도록 긴 제목을 먼저 생성
+        cls.long_title = book("9790000000202", "파친코와 함께 읽는 아주 길고 긴 제목의 이민 문학 이야기 모음집")
+        cls.repeated = book("9790000000201", "파친코 파친코")
+        cls.other = book("9790000000203", "채식주의자", author="한강")
+        cls.joined = book("9790000000204", "해리포터와 마법사의 돌")
+
+    def search(self, search, field="title"):
+        return list(search_books(Book.objects.all(), search, field).values_list("id", flat=True))
+
+    def test_substring_inside_word(self):
+        # 띄어쓰기 없이 붙은 제목의 중간 부분도 검색 (접두어 검색만으로는 안 잡힘)
+        self.assertEqual(self.search("포터"), [self.joined.id])
+        self.assertEqual(self.search("리포터와"), [self.joined.id])
+
+    @skipUnless(connection.vendor == "sqlite", "SQLite FTS5")
+    def test_sqlite_search_uses_fts_index(self):
+        plan = search_books(Book.objects.all(), "파친코", "title").explain()
+        self.assertIn("book_fts VIRTUAL TABLE INDEX", plan)
+        self.assertNotIn("SCAN book ", plan)
+
+    @skipUnless(connection.vendor == "postgresql", "PostgreSQL GIN 인덱스")
+    def test_postgres_search_uses_gin_indexes(self):
+        # 도서 3권으로는 순차 스캔이 더 싸므로 끄고, 인덱스 표현식과 조회 표현식이 맞는지만 확인
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        for field in ("title", "author"):
+            plan = search_books(Book.objects.all(), "해리 포터", field).explain()
+            self.assertIn(f"idx_book_{field}_fts", plan)
+            self.assertIn(f"idx_book_{field}_trgm", plan)
+
+    def test_ranked_by_bm25(self):
+        # 검색어가 자주 / 짧은 제목에 나올수록 앞
+        self.assertEqual(self.search("파친코"), [self.repeated.id, self.long_title.id])
+        self.assertEqual(self.search("채식주의"), [self.other.id])
+        self.assertEqual(self.search("한강", "author"), [self.other.id])
+
+    def test_short_search_falls_back_to_icontains(self):
+        # trigram 은 3글자부터 → 2글자는 FTS 테이블을 쓰지 않고 icontains
+        queryset = search_books(Book.objects.all(), "파친", "title")
+        self.assertNotIn("book_fts", str(queryset.query))
+        self.assertEqual(set(queryset.values_list("id", flat=True)), {self.repeated.id, self.long_title.id})
+
+    def test_update_and_delete_reach_index(self):
+        self.other.title = "소년이 온다"
+        self.other.save()
+        self.repeated.delete()
+
+        self.assertEqual(self.search("채식주의"), [])
+        self.assertEqual(self.search("소년이"), [self.other.id])
+        self.assertEqual(self.search("파친코"), [self.long_title.id])
+
+    def test_ensure_restores_dropped_triggers(self):
+        # 마이그레이션으로 book 테이블이 다시 만들어진 상황 (트리거만 사라짐)
+        with connection.cursor() as cursor:
+            for name in SQLITE_TRIGGER_SQL:
+                cursor.execute(f"DROP TRIGGER {name}")
+        Book.objects.filter(pk=self.other.pk).update(title="작별하지 않는다")
+        self.assertEqual(self.search("작별하지"), [])
+
+        self.assertTrue(ensure_book_search_index())
+        self.assertFalse(ensure_book_search_index())    # 이미 있으면 아무것도 안 함
+        # 트리거가 없던 동안의 변경은 재색인으로, 이후 변경은 트리거로 반영
+        self.assertEqual(self.search("작별하지"), [self.other.id])
+        Book.objects.filter(pk=self.other.pk).update(title="흰 고양이 이야기")
+        self.assertEqual(self.search("작별하지"), [])
+        self.assertEqual(self.search("고양이"), [self.other.id])
+
+
+class FinalScoreParityTest(TestCase):
+    """추천 점수: compute_final_score() (저장 시그널) 와 final_score_expression() (일괄 UPDATE) 가 같은 값인지"""
+
+    def test_python_and_sql_formulas_match(self):
+        sales_points = [0, 1, 99, 100000, 987654]
+        ranks = [None, 1, 10, 11, 50, 51, 100, 101]
+        review_ranks = [None, 0, 6, 7, 8, 9, 10]
+        grid = [(sales, rank, review) for sales in sales_points for rank in ranks for review in review_ranks]
+        # bulk_create 는 pre_save 시그널을 타지 않으므로 final_score 는 0 으로 들어감
+        Book.objects.bulk_create([
+            Book(isbn=f"979{i:010d}", title=f"점수 {i}", author="저자", publisher="출판사",
+                 sales_point=sales, best_rank=rank, customer_review_rank=review)
+            for i, (sales, rank, review) in enumerate(grid)
+        ])
+        self.assertEqual(refresh_final_scores(), len(grid))
+
+        rows = Book.objects.values_list("sales_point", "best_rank", "customer_review_rank", "final_score")
+        for sales, rank, review, score in rows:
+            self.assertAlmostEqual(score, compute_final_score(sales, rank, review), places=9,
+                                   msg=(sales, rank, review))
+
+
+@sync_autocomplete_index
+class CatalogLoaderTest(TestCase):
+    """load_catalog: 덤프 → Book bulk upsert (services/catalog_loader.py)"""
+
+    RAW = [
+        {"title": "First Novel", "isbn13": "9790000000001", "author": "A (지은이)", "publisher": "P",
+         "categoryId": 100, "salesPoint": 5000, "bestRank": 3, "customerReviewRank": 9},
+        {"title": "Second Essay", "isbn13": "9790000000002", "author": "B", "publisher": "P", "categoryId": 200},
+        {"title": "No Category", "isbn13": "9790000000003", "author": "C", "publisher": "P", "categoryId": 999},
+        {"title": "Third Poem", "isbn13": "9790000000004", "author": "D", "publisher": "P", "categoryId": 100},
+        {"title": "First Novel Revised", "isbn13": "9790000000001", "author": "A", "publisher": "P2",
+         "categoryId": 100, "salesPoint": 7000},
+    ]
+
+    def setUp(self):
+        Category.objects.bulk_create([Category(pk=1, name="소설"), Category(pk=2, name="에세이")])
+        # 이미 있는 도서 → 덤프 값으로 수정되지만 평점 / 북마크 집계는 유지
+        Book.objects.create(category_id=2, isbn="9790000000002", title="Old", author="B", publisher="P",
+                            rating_count=3, rating_sum=Decimal("12.0"), bookmark_count=2)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.raw = os.path.join(self.tmp.name, "raw.jsonl")
+        self.categories = os.path.join(self.tmp.name, "categories.json")
+        with open(self.raw, "w", encoding="utf-8") as f:
+            f.write("\n".join(json.dumps(book, ensure_ascii=False) for book in self.RAW))
+        with open(self.categories, "w", encoding="utf-8") as f:
+            json.dump([{"pk": 1, "cid": [100]}, {"pk": 2, "cid": [200]}, {"pk": 3, "cid": [999]}], f)
+
+    def load(self, **options):
+        out = io.StringIO()
+        call_command("load_catalog", input=self.raw, categories=self.categories, batch_size=2,
+                     stdout=out, **options)
+        return out.getvalue()
+
+    def test_upserts_on_isbn_and_keeps_aggregates(self):
+        output = self.load()
+        self.load()  # 다시 실행해도 중복 없음
+
+        self.assertIn("권/초", output)
+        self.assertEqual(Book.objects.count(), 3)
+        first = Book.objects.get(isbn="9790000000001")
+        self.assertEqual((first.title, first.publisher, first.sales_point), ("First Novel Revised", "P2", 7000))
+        self.assertAlmostEqual(first.final_score, compute_final_score(7000, None, None))
+        existing = Book.objects.get(isbn="9790000000002")
+        self.assertEqual((existing.title, existing.rating_count, existing.bookmark_count), ("Second Essay", 3, 2))
+        # Category 행이 없는 대분류(pk=3)는 제외
+        self.assertFalse(Book.objects.filter(isbn="9790000000003").exists())
+
+    def test_full_load_restores_indexes_and_search(self):
+        self.load(full=True)
+
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, Book._meta.db_table)
+        self.assertLessEqual({index.name for index in Book._meta.indexes}, set(constraints))
+        # FTS 트리거 / 인덱스도 다시 만들어져서 새로 들어온 도서가 검색됨
+        titles = list(search_books(Book.objects.all(), "Poem", "title").values_list("title", flat=True))
+        self.assertEqual(titles, ["Third Poem"])
+        Book.objects.filter(isbn="9790000000004").update(title="Third Verse")
+        self.assertFalse(search_books(Book.objects.all(), "Poem", "title").exists())
+
+    def test_load_refreshes_autocomplete_index(self):
+        # 적재는 시그널을 타지 않음 → 인덱스 버전만 올리고, 적재된 인덱스는 조회 때 버전을 보고 다시 적재
+        book_autocomplete_index.rebuild()
+        self.addCleanup(book_autocomplete_index.clear)
+        self.assertEqual([book["title"] for book in book_autocomplete_index.search("old")], ["Old"])
+
+        self.load()
+        self.assertEqual(book_autocomplete_index.search("old"), [])
+        self.assertEqual([book["title"] for book in book_autocomplete_index.search("essay")], ["Second Essay"])
+
+
+class CamelCaseRendererTest(TestCase):
+    """bookmarket/renderers.py 가 기존 camel_case 렌더러 / 파서와 같은 결과를 내는지"""
+
+    def test_renderer_matches_library(self):
+        category = Category(id=1, name="소설")
+        book = Book(id=1, category=category, isbn="9790000000001", title="제목\u2028", author="저자",
+                    publisher="출판사", best_rank=3, average_rating=Decimal("4.50"))
+        data = {
+            "total_pages": 1,
+            "nested_list": [{"user_rating": Decimal("4.5"), "book_2_title": "x"}],
+            "results": BookSearchSerializer([book], many=True).data,
+        }
+        legacy = type("LegacySerializer", (BookSearchSerializer,), {"camelize_keys": False})
+        legacy_data = dict(data, results=legacy([book], many=True).data)
+
+        fast = FastCamelCaseJSONRenderer().render(data)
+        expected = CamelCaseJSONRenderer().render(legacy_data)
+
+        self.assertEqual(json.loads(fast), json.loads(expected))
+        self.assertIn(b"\\u2028", fast)
+        self.assertEqual(json.loads(fast)["results"][0]["bestRank"], 3)
+
+    def test_parser_matches_library(self):
+        body = json.dumps({"saleType": "sale", "items": [{"bookId": 1, "userRating2x": 9}]}).encode()
+
+        self.assertEqual(
+            FastCamelCaseJSONParser().parse(io.BytesIO(body)),
+            CamelCaseJSONParser().parse(io.BytesIO(body)),
+        )
+
+
+class CatalogResponseCacheTest(APITestCase):
+    """메인 목록 / 베스트셀러 응답 캐시 (services/catalog_cache.py)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.books = Book.objects.bulk_create([
+            Book(isbn=f"97933{i:08d}", title=f"캐시 {i}", author="저자", publisher="출판사", best_rank=i + 1)
+            for i in range(12)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_second_request_is_served_from_cache(self):
+        with self.assertNumQueries(1):
+            first = self.client.get("/api/books/")
+        with self.assertNumQueries(0):
+            second = self.client.get("/api/books/")
+
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(first["ETag"], second["ETag"])
+        self.assertEqual(second.json()[0]["bestRank"], 1)
+
+    def test_etag_returns_304(self):
+        etag = self.client.get("/api/books/bestseller/")["ETag"]
+
+        response = self.client.get("/api/books/bestseller/", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_best_rank_change_invalidates(self):
+        etag = self.client.get("/api/books/")["ETag"]
+
+        book = Book.objects.get(best_rank=12)
+        book.best_rank = 0
+        with self.captureOnCommitCallbacks(execute=True):
+            book.save()
+
+        response = self.client.get("/api/books/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]["id"], book.id)
+
+    def test_bump_from_another_process_invalidates(self):
+        # 적재 커멘드 / 다른 워커는 별도 프로세스 → 공용 캐시(settings.CACHES)라야 같은 버전을 봄
+        # (테스트용 임시 캐시 폴더를 환경변수로 넘겨 같은 캐시를 보게 함)
+        etag = self.client.get("/api/books/")["ETag"]
+
+        subprocess.run(
+            [sys.executable, "manage.py", "shell", "-c",
+             "from books.services.catalog_cache import bump_catalog_version; bump_catalog_version()"],
+            cwd=settings.BASE_DIR, stdin=subprocess.DEVNULL, capture_output=True, check=True,
+            env={**os.environ, "CACHE_LOCATION": settings.CACHES["default"]["LOCATION"]},
+        )
+
+        response = self.client.get("/api/books/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_unrelated_update_keeps_cache(self):
+        self.client.get("/api/books/")
+
+        book = self.books[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            book.save(update_fields=["updated_at"])
+
+        with self.assertNumQueries(0):
+            self.client.get("/api/books/")
+
+    def test_many_saves_in_one_block_bump_once(self):
+        catalog_version, index_version = get_catalog_version(), get_index_version()
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            for book in self.books:
+                book.best_rank += 100
+                book.save()
+        self.assertEqual(len(callbacks), 1)
+
+        callbacks[0]()
+        self.assertEqual(get_catalog_version(), catalog_version + 1)
+        self.assertEqual(get_index_version(), index_version + 1)
+
+    def test_raw_save_skips_index_and_bumps_once(self):
+        index_version = get_index_version()
+
+        with mock.patch.object(book_autocomplete_index, "add") as add:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                for book in self.books:
+                    book.save_base(raw=True)
+
+        self.assertEqual(len(callbacks), 1)
+        add.assert_not_called()
+        # 이 프로세스 인덱스도 반영하지 않았으므로 다시 적재해야 함
+        self.assertEqual(get_index_version(), index_version + 1)
+        self.assertTrue(check_index_version(index_version)[1])
+
+
+class BookRecommendAsyncViewTest(StubLLMServerMixin, TestCase):
+    """비동기 추천 뷰 → 스텁 서버 호출"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="소설/시/희곡")
+        for i in range(5):
+            Book.objects.create(
+                id=i + 1, isbn=f"978000000000{i}", title=f"도서 {i}", author="저자", publisher="출판사",
+                description="도서 소개", category=category, sales_point=i * 100,
+            )
+        cls.user = get_user_model().objects.create_user(username="reader", password="pw12345!")
+
+    async def test_async_recommend(self):
+        token = str(AccessToken.for_user(self.user))
+
+        with mock.patch.object(llm_client, "endpoint", self.endpoint):
+            response = await self.async_client.post(
+                "/api/books/recommend/async/",
+                data={"categoryIds": [], "userPrompt": "따뜻한 소설"},
+                content_type="application/json",
+                headers={"Authorization": f"Bearer {token}"},
+            )
+        await llm_client.aclose()
+
+        self.assertEqual(response.status_code, 200)
+        [item] = response.json()["recommendations"]
+        book = await Book.objects.aget(pk=item["id"])
+        # 도서 정보는 DB 값으로 채워짐
+        self.assertEqual(item["title"], book.title)
+        self.assertEqual(item["description"], "좋은 책이라네.")
+        self.assertEqual(len(self.server.requests), 1)
+
+    async def test_async_recommend_requires_login(self):
+        response = await self.async_client.post(
+            "/api/books/recommend/async/",
+            data={"userPrompt": "따뜻한 소설"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 401)
+
+    async def test_async_recommend_rejects_non_object_body(self):
+        token = str(AccessToken.for_user(self.user))
+
+        for body in ("not json", "[1, 2]", '"text"', "3", '{"categoryIds": 1}', '{"userPrompt": ["a"]}'):
+            response = await self.async_client.post(
+                "/api/books/recommend/async/",
+                data=body,
+                content_type="application/json",
+                headers={"Authorization": f"Bearer {token}"},
+            )
+            self.assertEqual(response.status_code, 400, body)
+        self.assertEqual(len(self.server.requests), 0)
+
+    def test_stream_recommend(self):
+        self.client.force_login(self.user)
+        token = str(AccessToken.for_user(self.user))
+
+        with mock.patch.object(llm_client, "endpoint", self.endpoint):
+            response = self.client.post(
+                "/api/books/recommend/stream/",
+                data={"categoryIds": [], "userPrompt": "스트리밍"},
+                content_type="application/json",
+                headers={"Authorization": f"Bearer {token}"},
+            )
+            body = b"".join(response.streaming_content).decode("utf-8")
+
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertIn("event: recommendation", body)
+        self.assertIn('"id": 1', body)
+        self.assertTrue(body.rstrip().endswith('data: {"count": 1}'))
+
+
+def fake_llm_recommendation(prompt, cache_key=None):
+    """프롬프트의 후보 목록 앞 3권을 고르는 가짜 AI 응답"""
+    lines = prompt.split("One book per line:")[1].strip().splitlines()[1:4]
+    return {"recommendations": [
+        {"id": int(line.split("|")[0]), "reason": "좋은 책이라네."} for line in lines
+    ]}
+
+
+@tag("perf")
+class BookEndpointBudgetTest(EndpointBudgetMixin, APITestCase):
+    """
+    books 엔드포인트 쿼리 수 / 응답 시간 예산 (bookmarket/perf.py)
+    - 쿼리 수에는 JWT 인증의 사용자 조회 1번이 포함됨
+    - AI 호출은 가짜 응답으로 대체
+    """
+    report_title = "books"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.catalog = seed_catalog()
+        cls.user = cls.catalog["users"][1]
+        cls.user.age = 30
+        cls.user.save(update_fields=["age"])
+        cls.book = Book.objects.filter(trades__isnull=False).first()
+
+    @classmethod
+    def tearDownClass(cls):
+        # 롤백된 테스트 데이터가 자동완성 인덱스에 남지 않도록
+        book_autocomplete_index.clear()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+
+    def test_book_list(self):
+        self.measure("GET books/", self.client.get, "/api/books/", max_queries=2, max_ms=150)
+        # 두 번째부터는 캐시된 응답 (JWT 사용자 조회만)
+        self.measure("GET books/ (cached)", self.client.get, "/api/books/", max_queries=1, max_ms=50)
+
+    def test_book_detail(self):
+        self.measure("GET books/<id>/", self.client.get, f"/api/books/{self.book.id}/", max_queries=3, max_ms=150)
+
+    def test_bookmark_toggle(self):
+        url = f"/api/books/{self.book.id}/bookmarks/"
+        # 인증 + SAVEPOINT + DELETE + INSERT ... ON CONFLICT + UPDATE ... RETURNING + RELEASE
+        self.measure("POST books/<id>/bookmarks/", self.client.post, url, max_queries=6, max_ms=150)
+
+    def test_rating(self):
+        url = f"/api/books/{self.book.id}/rating/"
+        self.measure("POST books/<id>/rating/", self.client.post, url, {"score": "4.5"}, format="json",
+                     max_queries=9, max_ms=200)
+
+    def test_bestseller(self):
+        self.measure("GET books/bestseller/", self.client.get, "/api/books/bestseller/", max_queries=3, max_ms=300)
+        self.measure("GET books/bestseller/ (cached)", self.client.get, "/api/books/bestseller/",
+                     max_queries=1, max_ms=50)
+
+    def test_search(self):
+        response = self.measure("GET books/search/?search=", self.client.get, "/api/books/search/",
+                                {"search": "마법사", "adult": "false"}, max_queries=4, max_ms=300)
+        self.assertGreater(response.json()["count"], 0)
+        self.measure("GET books/search/?categories=", self.client.get, "/api/books/search/",
+                     {"categories": [self.book.category_id]}, max_queries=3, max_ms=300)
+
+    def test_bookmarked(self):
+        self.measure("GET books/bookmarked/", self.client.get, "/api/books/bookmarked/", max_queries=2, max_ms=200)
+
+    def test_autocomplete(self):
+        book_autocomplete_index.rebuild()
+        self.measure("GET books/autocomplete/", self.client.get, "/api/books/autocomplete/", {"q": "해리"},
+                     max_queries=1, max_ms=100)
+
+    def test_recommend(self):
+        with mock.patch.object(llm_client, "recommend_books", side_effect=fake_llm_recommendation):
+            response = self.measure("POST books/recommend/", self.client.post, "/api/books/recommend/",
+                                    {"categoryIds": [], "userPrompt": "따뜻한 소설"}, format="json",
+                                    max_queries=4, max_ms=300)
+        self.assertEqual(len(response.json()["recommendations"]), 3)
+
+    def test_recommend_stream(self):
+        def fake_stream(prompt, cache_key=None):
+            yield from fake_llm_recommendation(prompt)["recommendations"]
+
+        with mock.patch.object(llm_client, "stream_recommend_books", side_effect=fake_stream):
+            self.measure("POST books/recommend/stream/", self.client.post, "/api/books/recommend/stream/",
+                         {"categoryIds": [], "userPrompt": "따뜻한 소설"}, format="json",
+                         max_queries=4, max_ms=300)
+
+    def test_recommend_async(self):
+        async def fake_arecommend(prompt, cache_key=None):
+            return fake_llm_recommendation(prompt)
+
+        with mock.patch.object(llm_client, "arecommend_books", side_effect=fake_arecommend):
+            self.measure("POST books/recommend/async/", self.client.post, "/api/books/recommend/async/",
+                         {"categoryIds": [], "userPrompt": "따뜻한 소설"}, format="json",
+                         max_queries=4, max_ms=300)
@@ -12,6 +12,10 @@ urlpatterns = [
     path('bestseller/', views.BestSellerAPIView.as_view(), name='best_seller'),
     path('search/', views.BookSearchAPIView.as_view(), name='search'),
     path('bookmarked/', views.BookmarkedBooksView.as_view(), name='bookmarked_books'),
+    path('ratings/bulk/', views.BulkRatingView.as_view(), name='bulk_rating'),
+    path('bookmarks/bulk/', views.BulkBookmarkView.as_view(), name='bulk_bookmark'),
     path('autocomplete/', views.BookAutocompleteAPIView.as_view()),
     path("recommend/", views.BookRecommendAPIView.as_view()),
+    path("recommend/stream/", views.BookRecommendStreamAPIView.as_view()),
+    path("recommend/async/", views.BookRecommendAsyncView.as_view()),
 ]
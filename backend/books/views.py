@@ -8,15 +8,39 @@ from rest_framework.views import APIView
 from rest_framework.pagination import PageNumberPagination
 
 from django.shortcuts import get_object_or_404, get_list_or_404
-from django.db.models import Q
+from django.db.models import Prefetch, Q
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from asgiref.sync import sync_to_async
+from djangorestframework_camel_case.util import camelize, underscoreize
+from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from bookmarket.pagination import CachedCountPaginationMixin, KeysetPagination
 
 from .services.recommand import BookRecommendationCandidate
+from .services.search_index import search_books
+from .services.autocomplete import book_autocomplete_index
+from .services.user_state import annotate_user_state
+from .services.catalog_cache import cached_catalog_response
+from .services.bulk_sync import MAX_BULK_ITEMS, bulk_sync_bookmarks, bulk_upsert_ratings
+from .services.bookmarks import toggle_bookmark
 from .services.ai_prompt import build_recommend_prompt
-from .services.ai_client import llm_client
+from .services.ai_client import llm_client, make_recommend_fingerprint, LLMStreamError
+from .services.recommend_result import hydrate_recommendations, iter_hydrated_recommendations
 from .serializers import BookPreviewSerializer, BookDetailSerializer, BookSearchSerializer, BookBestSellerSerializer, BookRatingSerializer, BookAutocompleteSerializer, BookAIInputSerializer
+from .serializers import BulkRatingSerializer, BulkBookmarkSerializer
 from .models import Book, Bookmark, BookRating
+from trades.models import Trade
 
 from math import ceil
+import json
+import logging
+import random
+
+import requests
 
 
 # drf spectacular 사용
@@ -24,6 +48,8 @@ from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiRespon
 from drf_spectacular.types import OpenApiTypes
 # Create your views here.
 
+logger = logging.getLogger(__name__)
+
 # 도서 메인
 @api_view(['GET'])
 def book_list(request):
@@ -31,11 +57,20 @@ def book_list(request):
         # 1. best_rank가 null인 데이터를 제외하고 (순위가 있는 것만)
         # 2. best_rank 기준 오름차순 정렬 (1, 2, 3...)
         # 3. 상위 10개만 슬라이싱
-        queryset = Book.objects.filter(best_rank__isnull=False).order_by('best_rank')[:10]
-        # 데이터가 없으면 자동으로 404를 일으키고, 있으면 리스트를 반환
-        books = get_list_or_404(queryset)
-        serializer = BookPreviewSerializer(books, many=True)
-        return Response(serializer.data)
+        def build():
+            # 목록 카드에 필요한 컬럼만 조회 (?fields= 로 더 줄일 수 있음)
+            queryset = (
+                Book.objects.filter(best_rank__isnull=False)
+                .only(*BookPreviewSerializer.only_fields(request))
+                .order_by('best_rank')[:10]
+            )
+            # 데이터가 없으면 자동으로 404를 일으키고, 있으면 리스트를 반환
+            books = get_list_or_404(queryset)
+            serializer = BookPreviewSerializer(books, many=True, context={'request': request})
+            return serializer.data
+
+        # 카탈로그가 바뀌기 전까지는 렌더링된 응답을 그대로 재사용 (ETag / 304 지원)
+        return cached_catalog_response(request, 'book_list', build)
 
 
 # 도서 상세
@@ -45,7 +80,14 @@ def book_list(request):
 )
 @api_view(['GET'])
 def book_detail(request, id):
-    book = get_object_or_404(Book, pk=id)
+    # 도서 + 카테고리 + 북마크/평점 상태 (1쿼리) / 중고거래 + 판매자 (1쿼리)
+    queryset = annotate_user_state(
+        Book.objects.select_related('category').prefetch_related(
+            Prefetch('trades', queryset=Trade.objects.select_related('user'))
+        ),
+        request.user,
+    )
+    book = get_object_or_404(queryset, pk=id)
     if request.method == 'GET':
         serializer = BookDetailSerializer(book, context={'request': request})
         return Response(serializer.data)
@@ -76,6 +118,7 @@ def book_detail(request, id):
                 "type": "object",
                 "properties": {
                     "is_bookmarked": {"type": "boolean"},
+                    "bookmark_count": {"type": "integer"},
                     "message": {"type": "string"},
                 },
             },
@@ -86,24 +129,21 @@ def book_detail(request, id):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated]) # 로그인한 사용자만 가능
 def book_mark(request, id):
-    book = get_object_or_404(Book, pk=id)
-    user = request.user
-
-    # 현재 사용자가 이 책을 북마크했는지 확인
-    bookmark = Bookmark.objects.filter(user=user, book=book)
-
-    if bookmark.exists():
-        # 이미 있다면 삭제 (북마크 해제)
-        bookmark.delete()
-        return Response({'is_bookmarked': False, 'message': '북마크가 해제되었습니다.'})
+    # 조건부 DELETE → 없었으면 INSERT ... ON CONFLICT DO NOTHING (exists 확인 없음, 더블클릭에도 에러 없음)
+    # 도서의 새 북마크 수까지 같이 반환 (services/bookmarks.py)
+    result = toggle_bookmark(request.user.id, id)
+    if result is None:
+        raise Http404
+
+    if result['is_bookmarked']:
+        message = '북마크가 등록되었습니다.'
     else:
-        # 없다면 생성 (북마크 등록)
-        Bookmark.objects.create(user=user, book=book)
-        return Response({'is_bookmarked': True, 'message': '북마크가 등록되었습니다.'})
+        message = '북마크가 해제되었습니다.'
+    return Response({**result, 'message': message})
 
 
 # 알고리즘 신 - 도서 검색
-class BookPagination(PageNumberPagination):
+class BookPagination(CachedCountPaginationMixin, PageNumberPagination):
     page_size = 25                   # 한 페이지당 개수 (size를 요청 안 했을 경우, 한 페이지당 개수)
     page_query_param = "page"         # ?page=1
     page_size_query_param = "size"    # ?size=20 (size 요청이 왔을 경우, 한 페이지당 개수)
@@ -146,13 +186,21 @@ class BookSearchAPIView(APIView):
             OpenApiParameter("adult", bool, required=False),
             OpenApiParameter("page", int, required=False),
             OpenApiParameter("size", int, required=False),
+            OpenApiParameter("cursor", str, required=False, description="키셋 페이지네이션 (검색어 없을 때만, 첫 페이지는 빈 값)"),
+            OpenApiParameter("count", str, required=False, enum=["cached"], description="전체 개수 캐시 사용"),
+            OpenApiParameter("fields", str, required=False, description="필요한 필드만 (예: id,title,cover)"),
         ],
         responses=BookSearchSerializer,
         summary="도서 검색"
     )
     def get(self, request):
         # 전체 Book 객체를 조회 (기본 쿼리셋)
-        queryset = Book.objects.all()
+        # BookSearchSerializer 가 카테고리 이름까지 내려주므로 같이 JOIN (N+1 방지)
+        # 목록에 필요한 컬럼만 조회 (description 등 큰 컬럼 제외, 키셋 정렬용 id 포함)
+        columns = BookSearchSerializer.only_fields(request, 'id')
+        queryset = Book.objects.only(*columns)
+        if 'category' in columns:
+            queryset = queryset.select_related('category')
 
         # =====================
         # 🔍 검색 타입 (기본: 제목으로 검색)
@@ -162,10 +210,9 @@ class BookSearchAPIView(APIView):
 
         
         if search:
-            if searchType == "title":
-                queryset = queryset.filter(title__icontains=search)     # 제목에 검색어가 포함된 도서만 필터링
-            elif searchType == "author":
-                queryset = queryset.filter(author__icontains=search)    # 저자에 검색어가 포함된 도서만 필터링
+            # 제목/저자 전문 검색 인덱스(FTS) 조회 + 관련도 순 정렬
+            # (LIKE '%검색어%' 전체 스캔 대신 인덱스 사용 → services/search_index.py)
+            queryset = search_books(queryset, search, field=searchType)
 
         # =====================
         # 🏷️ 카테고리 (체크박스)
@@ -203,17 +250,47 @@ class BookSearchAPIView(APIView):
         # =====================
         # 📄 페이지네이션
         # =====================
-        paginator = BookPagination()
+        # 검색어가 있으면 관련도 순 정렬이라 cursor 를 쓸 수 없음 → page 방식
+        paginator = KeysetPagination(ordering=('id',), page_size=BookPagination.page_size)
+        if search or not paginator.is_requested(request):
+            paginator = BookPagination()
         page = paginator.paginate_queryset(queryset, request)    # 쿼리셋을 페이지네이션 적용 (현재 페이지에 해당하는 데이터만 반환)
-        serializer = BookSearchSerializer(page, many=True)       # 페이지네이션된 데이터를 직렬화 (BookSearchSerializer 사용)
+        serializer = BookSearchSerializer(page, many=True, context={'request': request})       # 페이지네이션된 데이터를 직렬화 (BookSearchSerializer 사용)
         return paginator.get_paginated_response(serializer.data) # 페이지네이션된 응답 반환
 
 
 # 베스트 셀러 도서 목록 확인 - 50개 단위
 class BestSellerAPIView(APIView):
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("page", int, required=False),
+            OpenApiParameter("size", int, required=False),
+            OpenApiParameter("cursor", str, required=False, description="키셋 페이지네이션 (첫 페이지는 빈 값)"),
+            OpenApiParameter("count", str, required=False, enum=["cached"], description="전체 개수 캐시 사용"),
+            OpenApiParameter("fields", str, required=False, description="필요한 필드만 (예: id,title,bestRank)"),
+        ],
+        responses=BookBestSellerSerializer(many=True),
+        summary="베스트셀러 목록"
+    )
     def get(self, request):
+        # 카탈로그가 바뀌기 전까지는 렌더링된 응답을 그대로 재사용 (ETag / 304 지원)
+        return cached_catalog_response(request, 'bestseller', lambda: self.build(request).data)
+
+    def build(self, request):
         # 1. 순위 데이터가 있는 도서만 가져와서 순위순(오름차순) 정렬
-        queryset = Book.objects.filter(best_rank__isnull=False).order_by('best_rank')
+        # 목록에 필요한 컬럼만 조회 (키셋 정렬 컬럼 best_rank / id 는 항상 포함)
+        queryset = (
+            Book.objects.filter(best_rank__isnull=False)
+            .only(*BookBestSellerSerializer.only_fields(request, 'best_rank', 'id'))
+            .order_by('best_rank')
+        )
+
+        # ?cursor= → (best_rank, id) 키셋 페이지네이션 (깊은 페이지도 OFFSET 없이 조회)
+        keyset = KeysetPagination(ordering=('best_rank', 'id'), page_size=50)
+        if keyset.is_requested(request):
+            page = keyset.paginate_queryset(queryset, request)
+            serializer = BookBestSellerSerializer(page, many=True, context={'request': request})
+            return keyset.get_paginated_response(serializer.data)
 
         # 2. 기존 BookPagination 클래스 그대로 사용
         paginator = BookPagination()
@@ -225,12 +302,12 @@ class BestSellerAPIView(APIView):
         page = paginator.paginate_queryset(queryset, request)
         if page is not None:
             # 5. 기존 BookSearchSerializer 그대로 사용
-            serializer = BookBestSellerSerializer(page, many=True)
+            serializer = BookBestSellerSerializer(page, many=True, context={'request': request})
             # 이미 구현하신 total_pages가 포함된 응답이 나갑니다.
             return paginator.get_paginated_response(serializer.data)
 
         # 데이터가 없을 경우를 대비한 기본 응답
-        serializer = BookBestSellerSerializer(queryset, many=True)
+        serializer = BookBestSellerSerializer(queryset, many=True, context={'request': request})
         return Response(serializer.data)
 
 
@@ -285,7 +362,10 @@ class BookRatingView(APIView):
             
             # signal 사용할 때 발생할 수 있는 문제점 해결 완료 (회고 딸깍)
             # 이 순간 signals.py가 발동하여 Book 모델의 average_rating을 갱신합니다.
-            book.refresh_from_db()
+            # (UPDATE ... RETURNING 으로 받은 값을 rating.book_stats 로 넘겨주므로 refresh_from_db 불필요,
+            #  점수가 그대로면 갱신이 없으므로 위에서 조회한 book 값 그대로)
+            for field, value in getattr(rating, 'book_stats', {}).items():
+                setattr(book, field, value)
 
             return Response({
                 "message": "등록 완료",
@@ -296,6 +376,39 @@ class BookRatingView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+# 평점 / 북마크 일괄 등록 (다른 앱에서 옮겨오는 사용자, 배치 작업용)
+class BulkRatingView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        summary="도서 평점 일괄 등록/수정",
+        description=f"items 최대 {MAX_BULK_ITEMS}건, 없는 도서 id 는 missing 으로 반환",
+        request=BulkRatingSerializer,
+        responses={200: OpenApiResponse(description="{saved, missing}")},
+    )
+    def post(self, request):
+        serializer = BulkRatingSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        items = [(item['book_id'], item['score']) for item in serializer.validated_data['items']]
+        return Response(bulk_upsert_ratings(request.user, items))
+
+
+class BulkBookmarkView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        summary="북마크 일괄 등록/해제",
+        description=f"items 최대 {MAX_BULK_ITEMS}건, isBookmarked 상태로 맞춤 (토글 아님)",
+        request=BulkBookmarkSerializer,
+        responses={200: OpenApiResponse(description="{added, removed, missing}")},
+    )
+    def post(self, request):
+        serializer = BulkBookmarkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        items = [(item['book_id'], item['is_bookmarked']) for item in serializer.validated_data['items']]
+        return Response(bulk_sync_bookmarks(request.user, items))
+
+
 from rest_framework.generics import ListAPIView
 
 # 프로필 페이지에서 조회할 수 있게 해줘야 함
@@ -310,33 +423,96 @@ class BookmarkedBooksView(ListAPIView):
         
         # 2. Bookmark 모델을 통해 해당 유저가 북마크한 도서들만 필터링합니다.
         # Bookmark 모델에서 Book을 참조하는 related_name='bookmarks'를 활용합니다.
-        return Book.objects.filter(bookmarks__user=user).order_by('-bookmarks__created_at')
+        return (
+            Book.objects.filter(bookmarks__user=user)
+            .only(*BookPreviewSerializer.only_fields(self.request))
+            .order_by('-bookmarks__created_at')
+        )
     
 # 중고거래에서 도서 선택 시 검색과 select하기
 class BookAutocompleteAPIView(APIView):
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("q", str, required=False),
+        ],
+        responses=BookAutocompleteSerializer(many=True),
+        summary="중고거래 도서 자동완성"
+    )
     def get(self, request):
         # /api/books/autocomplete/?q=해 => request.query_params == {'q': '해'} => q = '해' : 자동 파싱
         q = request.query_params.get('q', '')
 
-        queryset = Book.objects.filter(
-            title__icontains=q
-        ).order_by('title')[:10]  # 🔥 10개 제한
-        """
-        1. SQL 코드
-        SELECT *
-        FROM books_book
-        WHERE title LIKE '%해%
-        ORDER BY title ASC
-        LIMIT 10
-
-        - title 순으로 오름차순 정렬
-        - 10개만 보여줌
-        - 스크롤 만들고 싶으면 [:20] 후에 프론트에서 10개만 보이게하면 스크롤 생김.
-        """
-
-        serializer = BookAutocompleteSerializer(queryset, many=True)
-        return Response(serializer.data)
+        # 🔥 DB 조회 없이 메모리 인덱스에서 바로 응답 (services/autocomplete.py)
+        # - 자모 분해 : '핼' → '해리포터' (입력 중인 글자도 매칭)
+        # - 초성 검색 : 'ㅎㄹㅍㅌ' → '해리포터'
+        # - 제목순 정렬, 10개 제한 (기존 order_by('title')[:10] 과 동일)
+        # - 스크롤 만들고 싶으면 limit=20 후에 프론트에서 10개만 보이게하면 스크롤 생김.
+        results = book_autocomplete_index.search(q, limit=10)
+        return Response(results)
     
+def prepare_recommend_prompt(user, category_ids, user_prompt):
+    """
+    추천 요청 → (AI 프롬프트, 캐시 키, 후보 도서 id 목록)
+    동기 뷰 / 비동기 뷰가 같이 쓰는 DB 작업 구간 (비동기 뷰에서는 sync_to_async 로 호출)
+    """
+    # 2️⃣ 추천 후보 50권
+    selector = BookRecommendationCandidate(
+        user=user,
+        category_ids=category_ids
+    )
+    candidate_books = selector.get_top_50()
+    # print("====== RECOMMEND DEBUG ======")
+    # for i, book in enumerate(candidate_books, start=1):
+    #     print(
+    #         f"{i:02d}. "
+    #         f"title={book.title} | "
+    #         f"sales_point={book.sales_point} | "
+    #         f"final_score={round(book.final_score, 4)} | "
+    #     )
+    # print("====== END DEBUG ======")
+
+    # 3️⃣ BookMBTI 고정 프롬프트
+    book_mbti = user.book_mbti if user.is_authenticated else None
+    mbti_info_prompt = book_mbti.info if book_mbti else ""
+
+    logger.debug("추천 MBTI 프롬프트: %s", book_mbti.code if book_mbti else "NO MBTI")
+
+    # 4️⃣ AI 입력용 도서 데이터
+    books_payload = BookAIInputSerializer(
+        candidate_books,
+        many=True
+    ).data
+
+    # 🔀 AI 편향 방지용 셔플 (중요!)
+    # (토큰 예산을 넘으면 뒤쪽 후보부터 빠지므로 셔플 후에 압축)
+    books_payload = list(books_payload)
+    random.shuffle(books_payload)
+    logger.debug("추천 후보 (셔플 후 앞 10권): %s", [b["title"] for b in books_payload[:10]])
+
+    # 5️⃣ 프롬프트 생성
+    prompt = build_recommend_prompt(
+        mbti_info=mbti_info_prompt,
+        user_prompt=user_prompt,
+        books_payload=books_payload
+    )
+
+    # print("====== FINAL PROMPT ======")
+    # print(prompt)
+    # print("====== PROMPT LENGTH ======")
+    # print(len(prompt))
+    # print("====== END PROMPT ======")
+
+    # 같은 질문이면 캐시된 응답을 쓰기 위한 키
+    candidate_ids = [book["id"] for book in books_payload]
+    cache_key = make_recommend_fingerprint(
+        mbti_code=book_mbti.code if book_mbti else None,
+        category_ids=category_ids,
+        user_prompt=user_prompt,
+        candidate_ids=candidate_ids,
+    )
+    return prompt, cache_key, candidate_ids
+
+
 class BookRecommendAPIView(APIView):
     """
     도서 추천 API
@@ -348,102 +524,120 @@ class BookRecommendAPIView(APIView):
     
 
     def post(self, request):
-        # print("====== USER DEBUG ======")
-        # print("user:", request.user)
-        # print("is_authenticated:", request.user.is_authenticated)
-        # print("book_mbti:", getattr(request.user, "book_mbti", None))
-        # print("====== END USER DEBUG ======")
+        # 1️⃣ 요청 데이터
+        category_ids = request.data.get("category_ids", [])
+        user_prompt = request.data.get("user_prompt", "").strip()
+
+        # 2️⃣ ~ 5️⃣ 후보 선정 + 프롬프트 생성
+        prompt, cache_key, candidate_ids = prepare_recommend_prompt(request.user, category_ids, user_prompt)
+
+        # 6️⃣ AI 호출 (같은 질문이면 캐시된 응답 반환)
+        result = llm_client.recommend_books(prompt, cache_key=cache_key)
+
+        # 7️⃣ 도서 정보는 id 로 DB에서 채움 (후보 목록에 없는 id 는 제외)
+        return Response(hydrate_recommendations(result, candidate_ids))
 
+
+def _sse_event(event: str, data) -> str:
+    """Server-Sent Events 메시지 1개 (프론트 컨벤션에 맞춰 camelCase)"""
+    return f"event: {event}\ndata: {json.dumps(camelize(data), ensure_ascii=False)}\n\n"
+
+
+class BookRecommendStreamAPIView(APIView):
+    """
+    도서 추천 API (스트리밍)
+    POST /api/books/recommend/stream/
+    - 요청 형식은 BookRecommendAPIView 와 동일
+    - 응답은 text/event-stream, 추천 1권이 완성될 때마다 바로 전송
+        event: recommendation  → 추천 도서 1권
+        event: error           → AI 호출 실패
+        event: done            → 전송 완료 (추천 개수)
+    """
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    @extend_schema(
+        summary="AI 도서 추천 (SSE 스트리밍)",
+        responses={200: OpenApiResponse(description="text/event-stream")},
+    )
+    def post(self, request):
         # 1️⃣ 요청 데이터
         category_ids = request.data.get("category_ids", [])
         user_prompt = request.data.get("user_prompt", "").strip()
 
-        # 2️⃣ 추천 후보 50권
-        selector = BookRecommendationCandidate(
-            user=request.user,
-            category_ids=category_ids
-        )
-        candidate_books = selector.get_top_50()
-        # print("====== RECOMMEND DEBUG ======")
-        # for i, book in enumerate(candidate_books, start=1):
-        #     print(
-        #         f"{i:02d}. "
-        #         f"title={book.title} | "
-        #         f"sales_point={book.sales_point} | "
-        #         f"popularity={round(book.popularity_score, 4)} | "
-        #         f"trend_boost={book.trend_boost} | "
-        #         f"review_boost={book.review_boost} | "
-        #         f"final_score={round(book.final_score, 4)} | "
-        #     )
-        # print("====== END DEBUG ======")
-
-        # 3️⃣ BookMBTI 고정 프롬프트
-        mbti_info_prompt = ""
-        if request.user.is_authenticated and request.user.book_mbti:
-            mbti_info_prompt = request.user.book_mbti.info
-
-        print("====== MBTI PROMPT ======")
-        if request.user.is_authenticated and request.user.book_mbti:
-            print(request.user.book_mbti.code)
-            print(request.user.book_mbti.info)
-        else:
-            print("NO MBTI")
-        print("====== END MBTI ======")
-
-        # 4️⃣ AI 입력용 도서 데이터
-        books_payload = BookAIInputSerializer(
-            candidate_books,
-            many=True
-        ).data
-
-        # 🔀 AI 편향 방지용 셔플 (중요!)
-        import random
-        books_payload = list(books_payload)
-        random.shuffle(books_payload)
-        print("===== SHUFFLED CANDIDATES =====")
-        for b in books_payload[:10]:
-            print(b["title"])
-        print("===== END =====")
-
-        # print("====== BOOKS PAYLOAD SAMPLE ======")
-        # for book in books_payload[:3]:
-        #     print(book)
-        # print(f"... total books = {len(books_payload)}")
-        # print("====== END PAYLOAD ======")
-
-        # 5️⃣ 프롬프트 생성
-        prompt = build_recommend_prompt(
-            mbti_info=mbti_info_prompt,
-            user_prompt=user_prompt,
-            books_payload=books_payload
-        )
+        # 2️⃣ ~ 5️⃣ 후보 선정 + 프롬프트 생성
+        prompt, cache_key, candidate_ids = prepare_recommend_prompt(request.user, category_ids, user_prompt)
 
-        # print("====== FINAL PROMPT ======")
-        # print(prompt)
-        # print("====== PROMPT LENGTH ======")
-        # print(len(prompt))
-        # print("====== END PROMPT ======")
+        # 6️⃣ AI 스트리밍 호출 → 완성된 추천부터 바로 내보냄
+        def event_stream():
+            count = 0
+            try:
+                items = llm_client.stream_recommend_books(prompt, cache_key=cache_key)
+                # 도서 정보는 id 로 DB에서 채움 (후보 목록에 없는 id 는 제외)
+                for item in iter_hydrated_recommendations(items, candidate_ids):
+                    count += 1
+                    yield _sse_event("recommendation", item)
+            except LLMStreamError as e:
+                yield _sse_event("error", e.detail)
+            except requests.RequestException as e:
+                yield _sse_event("error", {"error": "GMS OpenAI API error", "detail": str(e)})
+            yield _sse_event("done", {"count": count})
+
+        response = StreamingHttpResponse(event_stream(), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"   # nginx 버퍼링 끄기
+        return response
+
+
+# 비동기 도서 추천 (ASGI 서버에서 실행 시 AI 응답을 기다리는 동안 워커를 붙잡지 않음)
+# DRF APIView는 async 핸들러를 지원하지 않아서 Django 기본 View로 구현
+# → 인증(JWT) / camelCase 변환 / 권한 체크를 직접 처리
+@method_decorator(csrf_exempt, name="dispatch")   # JWT 인증이라 CSRF 토큰 불필요 (DRF APIView와 동일)
+class BookRecommendAsyncView(View):
+    """
+    도서 추천 API (비동기)
+    POST /api/books/recommend/async/
+    요청 / 응답 형식은 BookRecommendAPIView 와 동일
+    """
 
-        # 6️⃣ AI 호출
-        result = llm_client.recommend_books(prompt)
+    async def post(self, request):
+        # 🔐 JWT 인증 (유저 조회는 DB 작업이므로 sync_to_async)
+        try:
+            auth = await sync_to_async(JWTAuthentication().authenticate)(request)
+        except AuthenticationFailed as e:
+            return JsonResponse({"detail": str(e.detail)}, status=status.HTTP_401_UNAUTHORIZED)
+        # IsAuthenticatedOrReadOnly → POST는 로그인 필수
+        if auth is None:
+            return JsonResponse(
+                {"detail": str(NotAuthenticated.default_detail)},
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+        user, _ = auth
+
+        # 1️⃣ 요청 데이터 (CamelCaseJSONParser와 동일하게 snake_case로 변환)
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            return JsonResponse({"detail": "JSON 형식이 올바르지 않습니다."}, status=status.HTTP_400_BAD_REQUEST)
+        # 배열 / 문자열 / 숫자 본문이나 필드 타입이 다르면 400 (그대로 쓰면 .get() / .strip() 에서 500)
+        if not isinstance(data, dict):
+            return JsonResponse({"detail": "요청 본문은 JSON 객체여야 합니다."}, status=status.HTTP_400_BAD_REQUEST)
+        data = underscoreize(data)
+        category_ids = data.get("category_ids", [])
+        user_prompt = data.get("user_prompt", "")
+        if not isinstance(category_ids, list) or not isinstance(user_prompt, str):
+            return JsonResponse(
+                {"detail": "categoryIds 는 배열, userPrompt 는 문자열이어야 합니다."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        user_prompt = user_prompt.strip()
 
-        return Response(result)
-    
-        # 50권 호출 확인용 더미 return
-        # return Response({
-        #     "candidate_count": len(candidate_books),
-        #     "candidates": [
-        #         {
-        #             "id": book.id,
-        #             "title": book.title,
-        #             "category" : book.category.id,
-        #             "description" : book.description,
-        #             "sales_point": book.sales_point,
-        #             "best_rank": book.best_rank,
-        #             "customer_review_rank": book.customer_review_rank,
-        #             "pub_date": book.pub_date,
-        #             "adult": book.adult,
-        #         }
-        #         for book in candidate_books
-        #     ]
-        # })
\ No newline at end of file
+        # 2️⃣ ~ 5️⃣ 후보 선정 + 프롬프트 생성 (DB 작업)
+        prompt, cache_key, candidate_ids = await sync_to_async(prepare_recommend_prompt)(user, category_ids, user_prompt)
+
+        # 6️⃣ AI 호출 (keep-alive 커넥션 풀 재사용, await 중에는 이벤트 루프가 다른 요청 처리)
+        result = await llm_client.arecommend_books(prompt, cache_key=cache_key)
+
+        # 7️⃣ 도서 정보는 id 로 DB에서 채움 (후보 목록에 없는 id 는 제외)
+        result = await sync_to_async(hydrate_recommendations)(result, candidate_ids)
+
+        return JsonResponse(camelize(result), json_dumps_params={"ensure_ascii": False})
@@ -1,4 +1,5 @@
 from django.contrib import admin
-from .models import Trade
+from .models import Trade, TradeSearchShape
 # Register your models here.
-admin.site.register(Trade)
\ No newline at end of file
+admin.site.register(Trade)
+admin.site.register(TradeSearchShape)
\ No newline at end of file
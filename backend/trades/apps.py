@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class TradesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'trades'
+
+    def ready(self):
+        """앱이 준비될 때 Signal 등록"""
+        import trades.signals
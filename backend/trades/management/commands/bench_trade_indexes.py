@@ -0,0 +1,164 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+from books.models import Book
+from trades.models import Trade, TradeSearchShape
+from trades.services.query_shapes import REGIONS, SALE_TYPES, shape_queryset
+
+
+# 검색에서 자주 쓰이는 조합 (집계가 있으면 --recorded 로 실제 상위 조합 추가)
+DEFAULT_SHAPES = [
+    'adult|order=-created_at',
+    'adult|status=available|order=-created_at',
+    'adult|status=sold|order=-created_at',
+    'adult|status=available|region:1|order=-created_at',
+    'adult|status=available|region:3|order=-created_at',
+    'adult|status=sold|region:1|order=-created_at',
+    'adult|status=available|min_price|max_price|order=price',
+    'adult|sale_type:1|status=available|order=-created_at',
+]
+
+# 복합 인덱스 추가 전 (0001_initial) 인덱스 중 바뀌거나 없어진 것
+LEGACY_INDEXES = [
+    models.Index(fields=['status'], name='idx_trade_status'),
+    models.Index(fields=['-created_at'], name='idx_trade_created'),
+]
+
+# 판매중 + 최신순 부분 인덱스 (PostgreSQL 에만 있음, migrations/0005_trade_available_partial_index.py)
+AVAILABLE_PARTIAL_INDEX = models.Index(
+    fields=['-created_at', '-id'], condition=models.Q(status='available'), name='idx_trade_available_created',
+)
+
+STATUS_WEIGHTS = {'available': 60, 'reserved': 10, 'sold': 30}
+
+
+class Command(BaseCommand):
+    """
+    중고거래 검색 인덱스 전 / 후 비교 커멘드
+    - 가짜 게시글을 --rows 개 넣고 (기본 100만) 조합별로 실행 계획(EXPLAIN) + 첫 페이지 조회 시간 측정
+    - 전: 단일 컬럼 인덱스만 (status / region / created_at)
+    - 후: Trade.Meta.indexes 의 복합 인덱스 (+ PostgreSQL 이면 status='available' 부분 인덱스)
+    전부 트랜잭션 안에서 만들고 끝나면 롤백 (DB 에 남지 않음)
+    """
+    help = '중고거래 검색 조합별 실행 계획 / 조회 시간을 복합 인덱스 추가 전후로 비교하는 커멘드'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help='가짜 게시글 수')
+        parser.add_argument('--repeat', type=int, default=5, help='조합별 반복 측정 횟수 (중앙값)')
+        parser.add_argument('--recorded', type=int, default=0, help='실제 집계(TradeSearchShape) 상위 N개 조합도 측정')
+
+    def handle(self, *args, **options):
+        shapes = list(DEFAULT_SHAPES)
+        if options['recorded']:
+            recorded = TradeSearchShape.objects.order_by('-hits').values_list('signature', flat=True)
+            shapes += [signature for signature in recorded[:options['recorded']] if signature not in shapes]
+
+        with transaction.atomic():
+            self._run(options['rows'], options['repeat'], shapes)
+            transaction.set_rollback(True)
+
+    def _run(self, rows, repeat, shapes):
+        # 1️⃣ 가짜 데이터
+        started = time.perf_counter()
+        self._seed(rows)
+        self.stdout.write(f'게시글 {rows:,}개 생성 ({time.perf_counter() - started:.1f}초)')
+
+        composite = [index for index in Trade._meta.indexes if len(index.fields) > 1 or index.condition is not None]
+        if connection.vendor == 'postgresql':
+            composite.append(AVAILABLE_PARTIAL_INDEX)
+
+        # 2️⃣ 전: 0001_initial 인덱스 (복합 / 부분 인덱스 없음)
+        self._drop(composite)
+        self._create(LEGACY_INDEXES)
+        before = self._measure(shapes, repeat)
+
+        # 3️⃣ 후: 현재 Trade.Meta.indexes
+        self._drop(LEGACY_INDEXES)
+        self._create(composite)
+        after = self._measure(shapes, repeat)
+
+        for signature in shapes:
+            (before_ms, before_plan), (after_ms, after_plan) = before[signature], after[signature]
+            self.stdout.write(f'\n[{signature}] {before_ms:.1f}ms → {after_ms:.1f}ms ({before_ms / max(after_ms, 1e-3):.1f}배)')
+            self.stdout.write('  전: ' + '\n      '.join(before_plan.splitlines()))
+            self.stdout.write('  후: ' + '\n      '.join(after_plan.splitlines()))
+
+    # ─────────────────────────────
+    def _seed(self, rows):
+        # 사용자가 1명이면 플래너가 user 테이블을 바깥 루프로 잡아서 정렬 인덱스를 못 씀 → 실제처럼 여러 명
+        User = get_user_model()
+        users = User.objects.bulk_create([
+            User(username=f'bench_trade_index_{i}', password='!', nickname=f'벤치마크{i}') for i in range(1000)
+        ])
+        user_ids = [user.id for user in users]
+        books = Book.objects.bulk_create([
+            Book(isbn=f'7{i:012d}', title=f'벤치마크 {i}', author='저자', publisher='출판사', adult=i % 20 == 0)
+            for i in range(1000)
+        ])
+        book_ids = [book.id for book in books]
+        regions = REGIONS[1:]
+        rng = random.Random(0)
+        statuses = rng.choices(list(STATUS_WEIGHTS), weights=list(STATUS_WEIGHTS.values()), k=rows)
+        now = timezone.now()
+
+        qn = connection.ops.quote_name
+        columns = ['user_id', 'book_id', 'title', 'content', 'sale_type', 'price', 'region', 'status',
+                   'view_count', 'created_at', 'updated_at']
+        sql = (
+            f"INSERT INTO {qn(Trade._meta.db_table)} ({', '.join(qn(c) for c in columns)}) "
+            f"VALUES ({', '.join(['%s'] * len(columns))})"
+        )
+        with connection.cursor() as cursor:
+            for start in range(0, rows, 50_000):
+                batch = []
+                for i in range(start, min(start + 50_000, rows)):
+                    created = connection.ops.adapt_datetimefield_value(now - timedelta(minutes=rng.randrange(1_000_000)))
+                    batch.append((
+                        rng.choice(user_ids), rng.choice(book_ids), f'팝니다 {i}', '내용', rng.choice(SALE_TYPES),
+                        rng.randrange(0, 50_000, 500), rng.choice(regions), statuses[i], 0, created, created,
+                    ))
+                cursor.executemany(sql, batch)
+
+    def _index_names(self):
+        with connection.cursor() as cursor:
+            return set(connection.introspection.get_constraints(cursor, Trade._meta.db_table))
+
+    def _drop(self, indexes):
+        editor = connection.schema_editor(atomic=False)
+        existing = self._index_names()
+        with connection.cursor() as cursor:
+            for index in indexes:
+                if index.name in existing:
+                    cursor.execute(editor.sql_delete_index % {
+                        'name': connection.ops.quote_name(index.name),
+                        'table': connection.ops.quote_name(Trade._meta.db_table),
+                    })
+
+    def _create(self, indexes):
+        editor = connection.schema_editor(atomic=False)
+        existing = self._index_names()
+        with connection.cursor() as cursor:
+            for index in indexes:
+                if index.name not in existing:
+                    cursor.execute(str(index.create_sql(Trade, editor)))
+            # 플래너 통계 갱신 (SQLite: sqlite_stat1)
+            cursor.execute('ANALYZE')
+
+    def _measure(self, shapes, repeat):
+        results = {}
+        for signature in shapes:
+            queryset = shape_queryset(signature)[:20]
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            results[signature] = (statistics.median(timings), queryset.explain())
+        return results
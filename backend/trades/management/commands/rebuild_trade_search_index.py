@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from trades.services.search_index import rebuild_trade_search_index
+
+
+class Command(BaseCommand):
+    """
+    중고거래 전문 검색(FTS) 인덱스 재구축 커멘드
+    평소에는 trade / book 테이블 트리거가 자동으로 동기화하므로
+    트리거를 우회해서 데이터를 넣었을 때만 실행하면 됨
+    """
+    help = '중고거래 검색용 전문 검색(FTS) 인덱스를 다시 만드는 커멘드'
+
+    def handle(self, *args, **options):
+        rebuild_trade_search_index()
+        self.stdout.write(self.style.SUCCESS('중고거래 검색 인덱스 재구축 완료!'))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Sum
+from trades.models import TradeSearchShape
+from trades.services.query_shapes import shape_queryset
+
+
+class Command(BaseCommand):
+    """
+    중고거래 검색 필터 / 정렬 조합 집계 확인 커멘드 (services/query_shapes.py)
+    많이 쓰이는 조합 순으로 호출 수 / 비율을 보여주고, --explain 이면 조합별 실행 계획(어떤 인덱스를 타는지)도 출력
+    """
+    help = '중고거래 검색에서 실제로 많이 쓰인 필터 / 정렬 조합과 실행 계획을 보여주는 커멘드'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20, help='보여줄 조합 수')
+        parser.add_argument('--explain', action='store_true', help='조합별 EXPLAIN 결과 출력')
+        parser.add_argument('--reset', action='store_true', help='집계 초기화')
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            deleted, _ = TradeSearchShape.objects.all().delete()
+            self.stdout.write(self.style.SUCCESS(f'검색 조합 집계 초기화 ({deleted}개)'))
+            return
+
+        total = TradeSearchShape.objects.aggregate(total=Sum('hits'))['total'] or 0
+        shapes = TradeSearchShape.objects.order_by('-hits', 'signature')[:options['limit']]
+        if not total:
+            self.stdout.write('아직 집계된 검색 조합이 없습니다.')
+            return
+
+        self.stdout.write(f'전체 검색 {total:,}회')
+        for rank, shape in enumerate(shapes, start=1):
+            self.stdout.write(f'{rank:>3}. {shape.hits:>10,}회 {shape.hits / total:>6.1%}  {shape.signature}')
+            if options['explain']:
+                plan = shape_queryset(shape.signature)[:20].explain()
+                for line in plan.splitlines():
+                    self.stdout.write(f'        {line}')
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.6 on 2026-10-18 11:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trades', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TradeSearchShape',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('signature', models.CharField(max_length=255, unique=True, verbose_name='검색 조합')),
+                ('hits', models.BigIntegerField(default=0, verbose_name='호출 수')),
+                ('first_seen', models.DateTimeField(auto_now_add=True, verbose_name='처음 집계')),
+                ('last_seen', models.DateTimeField(auto_now=True, verbose_name='마지막 집계')),
+            ],
+            options={
+                'verbose_name': '중고거래 검색 조합',
+                'verbose_name_plural': '중고거래 검색 조합',
+                'db_table': 'trade_search_shape',
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='trade',
+            name='idx_trade_status',
+        ),
+        migrations.RemoveIndex(
+            model_name='trade',
+            name='idx_trade_created',
+        ),
+        migrations.AddIndex(
+            model_name='trade',
+            index=models.Index(fields=['-created_at', '-id'], name='idx_trade_created'),
+        ),
+        migrations.AddIndex(
+            model_name='trade',
+            index=models.Index(fields=['status', 'region', '-created_at', '-id'], name='idx_trade_st_region_created'),
+        ),
+        migrations.AddIndex(
+            model_name='trade',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='idx_trade_status_created'),
+        ),
+        migrations.AddIndex(
+            model_name='trade',
+            index=models.Index(fields=['status', 'price'], name='idx_trade_status_price'),
+        ),
+    ]
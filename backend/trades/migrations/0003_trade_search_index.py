@@ -0,0 +1,114 @@
+# 중고거래 검색용 전문 검색(Full-Text Search) 인덱스
+# - SQLite     : FTS5 테이블(제목 / 내용 / 도서명) + trade / book 동기화 트리거
+# - PostgreSQL : to_tsvector 표현식 GIN 인덱스 (도서명은 books 0002 의 idx_book_title_fts)
+
+from django.db import migrations
+
+
+SQLITE_FORWARD_SQL = [
+    # 도서명(book.title)은 trade 컬럼이 아니라서 외부 콘텐츠 대신 값을 복사해 두는 일반 FTS5 테이블
+    # trigram 토크나이저 → 띄어쓰기 없는 한글도 부분 문자열 검색 가능
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS trade_fts USING fts5(
+        title, content, book_title,
+        tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trade_fts_ai AFTER INSERT ON trade BEGIN
+        INSERT INTO trade_fts(rowid, title, content, book_title)
+        VALUES (new.id, new.title, new.content, (SELECT title FROM book WHERE id = new.book_id));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trade_fts_ad AFTER DELETE ON trade BEGIN
+        DELETE FROM trade_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trade_fts_au AFTER UPDATE OF title, content, book_id ON trade BEGIN
+        DELETE FROM trade_fts WHERE rowid = old.id;
+        INSERT INTO trade_fts(rowid, title, content, book_title)
+        VALUES (new.id, new.title, new.content, (SELECT title FROM book WHERE id = new.book_id));
+    END
+    """,
+    # 도서명이 바뀌면 그 도서의 게시글 색인도 갱신
+    """
+    CREATE TRIGGER IF NOT EXISTS trade_fts_book_au AFTER UPDATE OF title ON book BEGIN
+        UPDATE trade_fts SET book_title = new.title
+        WHERE rowid IN (SELECT id FROM trade WHERE book_id = new.id);
+    END
+    """,
+    # 이미 들어있는 게시글 색인
+    """
+    INSERT INTO trade_fts(rowid, title, content, book_title)
+    SELECT trade.id, trade.title, trade.content, book.title FROM trade JOIN book ON book.id = trade.book_id
+    """,
+]
+
+SQLITE_BACKWARD_SQL = [
+    "DROP TRIGGER IF EXISTS trade_fts_ai",
+    "DROP TRIGGER IF EXISTS trade_fts_ad",
+    "DROP TRIGGER IF EXISTS trade_fts_au",
+    "DROP TRIGGER IF EXISTS trade_fts_book_au",
+    "DROP TABLE IF EXISTS trade_fts",
+]
+
+POSTGRES_FORWARD_SQL = [
+    "CREATE INDEX IF NOT EXISTS idx_trade_title_fts ON trade "
+    "USING GIN (to_tsvector('simple'::regconfig, COALESCE(title, '')))",
+    "CREATE INDEX IF NOT EXISTS idx_trade_content_fts ON trade "
+    "USING GIN (to_tsvector('simple'::regconfig, COALESCE(content, '')))",
+]
+
+POSTGRES_BACKWARD_SQL = [
+    "DROP INDEX IF EXISTS idx_trade_title_fts",
+    "DROP INDEX IF EXISTS idx_trade_content_fts",
+]
+
+
+def _sqlite_supports_trigram() -> bool:
+    """FTS5 trigram 토크나이저는 SQLite 3.34.0 이상에서만 사용 가능"""
+    import sqlite3
+    return sqlite3.sqlite_version_info >= (3, 34, 0)
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "sqlite":
+        # 지원하지 않는 SQLite면 인덱스 없이 진행 (검색은 icontains로 동작)
+        if not _sqlite_supports_trigram():
+            return
+        statements = SQLITE_FORWARD_SQL
+    elif connection.vendor == "postgresql":
+        statements = POSTGRES_FORWARD_SQL
+    else:
+        return
+
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "sqlite":
+        statements = SQLITE_BACKWARD_SQL
+    elif connection.vendor == "postgresql":
+        statements = POSTGRES_BACKWARD_SQL
+    else:
+        return
+
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0002_book_search_index'),
+        ('trades', '0002_trade_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,45 @@
+# 중고거래 검색 부분 문자열(icontains) 인덱스
+# - PostgreSQL : pg_trgm GIN 인덱스 (Django icontains 의 UPPER(컬럼::text) LIKE UPPER(...) 와 같은 표현식)
+#                도서명은 books 0006 의 idx_book_title_trgm (pg_trgm 확장도 거기서 생성)
+# - SQLite     : 0003 의 FTS5 trigram 테이블이 이미 부분 문자열을 처리하므로 할 일 없음
+
+from django.db import migrations
+
+
+POSTGRES_FORWARD_SQL = [
+    "CREATE INDEX IF NOT EXISTS idx_trade_title_trgm ON trade "
+    "USING GIN ((UPPER(title::text)) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS idx_trade_content_trgm ON trade "
+    "USING GIN ((UPPER(content::text)) gin_trgm_ops)",
+]
+
+POSTGRES_BACKWARD_SQL = [
+    "DROP INDEX IF EXISTS idx_trade_title_trgm",
+    "DROP INDEX IF EXISTS idx_trade_content_trgm",
+]
+
+
+def create_trgm_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for sql in POSTGRES_FORWARD_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_trgm_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for sql in POSTGRES_BACKWARD_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0006_book_search_trgm_index'),
+        ('trades', '0003_trade_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trgm_index, drop_trgm_index),
+    ]
@@ -0,0 +1,44 @@
+# 판매중 + 최신순(기본 검색) 부분 인덱스 - PostgreSQL 전용
+# SQLite 3.40.1 에서는 만들지 않음: 캐시된 'status = ?' 문장이 스키마 변경 뒤 다시 준비될 때
+# 바인딩된 값('available')으로 부분 인덱스 계획을 세우고, 이후 다른 값('sold')에도 그 계획을 써서 0건을 돌려줌
+#   재현 (python sqlite3, 같은 연결 또는 다른 연결에서 CREATE INDEX):
+#     c.execute("SELECT count(*) FROM t WHERE status = ?", ("available",))
+#     c.execute("CREATE INDEX i ON t(created) WHERE status = 'available'")
+#     c.execute("SELECT count(*) FROM t WHERE status = ?", ("sold",))   # → 0
+
+from django.db import migrations
+
+
+POSTGRES_FORWARD_SQL = [
+    "CREATE INDEX IF NOT EXISTS idx_trade_available_created ON trade "
+    "(created_at DESC, id DESC) WHERE status = 'available'",
+]
+
+POSTGRES_BACKWARD_SQL = [
+    "DROP INDEX IF EXISTS idx_trade_available_created",
+]
+
+
+def create_partial_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for sql in POSTGRES_FORWARD_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_partial_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for sql in POSTGRES_BACKWARD_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trades', '0004_trade_search_trgm_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_partial_index, drop_partial_index),
+    ]
@@ -93,10 +93,34 @@ class Trade(models.Model):
         indexes = [
             models.Index(fields=['user'], name='idx_trade_user'),
             models.Index(fields=['book'], name='idx_trade_book'),
-            models.Index(fields=['status'], name='idx_trade_status'),
-            models.Index(fields=['-created_at'], name='idx_trade_created'),
+            # 최신순 목록은 (created_at, id) 로 정렬하므로 id 까지 넣어야 추가 정렬(TEMP B-TREE) 없음
+            models.Index(fields=['-created_at', '-id'], name='idx_trade_created'),
             models.Index(fields=['region'], name='idx_trade_region'),
+            # 검색(TradeSearchAPIView) 필터 + 정렬 조합용 복합 인덱스 (TradeSearchShape 집계 기준)
+            # status 단일 인덱스는 아래 복합 인덱스들의 앞 컬럼으로 대신함
+            models.Index(fields=['status', 'region', '-created_at', '-id'], name='idx_trade_st_region_created'),
+            models.Index(fields=['status', '-created_at', '-id'], name='idx_trade_status_created'),
+            models.Index(fields=['status', 'price'], name='idx_trade_status_price'),
+            # status='available' 부분 인덱스(idx_trade_available_created)는 PostgreSQL 에만 만듦 (migrations/0005)
+            # → SQLite 3.40 은 캐시된 'status = ?' 문장이 스키마 변경(다른 연결의 migrate 포함) 뒤 다시 준비될 때
+            #   그때 바인딩된 'available' 로 부분 인덱스 계획을 세우고, 이후 다른 status 값에도 그대로 써서 0건을 돌려줌
         ]
 
     def __str__(self):
         return f"{self.title} - {self.user.username}"
+
+
+class TradeSearchShape(models.Model):
+    """중고거래 검색 필터 / 정렬 조합별 호출 수 (인덱스 설계용, services/query_shapes.py)"""
+    signature = models.CharField(max_length=255, unique=True, verbose_name='검색 조합')
+    hits = models.BigIntegerField(default=0, verbose_name='호출 수')
+    first_seen = models.DateTimeField(auto_now_add=True, verbose_name='처음 집계')
+    last_seen = models.DateTimeField(auto_now=True, verbose_name='마지막 집계')
+
+    class Meta:
+        db_table = 'trade_search_shape'
+        verbose_name = '중고거래 검색 조합'
+        verbose_name_plural = '중고거래 검색 조합'
+
+    def __str__(self):
+        return f"{self.signature} ({self.hits})"
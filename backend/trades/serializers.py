@@ -2,9 +2,10 @@ from rest_framework import serializers
 from accounts.serializers import UserSimpleSerializer  # 이미 만들어진 UserSerializer
 from books.serializers import BookTradeSerializer # 도서 요약 정보용
 from .models import Trade, Book
+from bookmarket.renderers import CamelCaseKeysMixin
 import re
 
-class TradeSearchSerializer(serializers.ModelSerializer):
+class TradeSearchSerializer(CamelCaseKeysMixin, serializers.ModelSerializer):
     book_title = serializers.CharField(source='book.title', read_only=True)
     book_adult = serializers.CharField(source='book.adult', read_only=True)
     book_price_standard = serializers.IntegerField(source='book.price_standard', read_only=True)
@@ -89,6 +90,29 @@ class TradeSerializer(serializers.ModelSerializer):
             return data
 
 
+class TradeListSerializer(CamelCaseKeysMixin, serializers.ModelSerializer):
+    """게시글 목록 조회용 (TradeSerializer 에서 목록에 안 쓰는 content / kakao_chat_url 제외)"""
+    user = UserSimpleSerializer(read_only=True)
+    book = BookTradeSerializer(read_only=True)
+
+    # queryset.only() 에 넘길 컬럼 (본문 content 는 조회하지 않음)
+    only_fields = (
+        'id', 'title', 'sale_type', 'price', 'region', 'status', 'image', 'view_count', 'created_at',
+        'user', 'user__id', 'user__nickname',
+        'book', 'book__id', 'book__cover', 'book__title', 'book__customer_review_rank',
+        'book__adult', 'book__price_standard',
+        'book__category', 'book__category__id', 'book__category__name',
+    )
+
+    class Meta:
+        model = Trade
+        fields = [
+            'id', 'user', 'book', 'title',
+            'sale_type', 'price', 'region', 'status',
+            'image', 'view_count', 'created_at',
+        ]
+
+
 class TradeDetailSerializer(serializers.ModelSerializer):
     """게시글 단일 조회(상세 페이지)용"""
     # user = UserSerializer(read_only=True)
@@ -113,7 +137,7 @@ class TradeDetailSerializer(serializers.ModelSerializer):
 
 
 # 중고거래 요약용 serializer
-class TradePreviewSerializer(serializers.ModelSerializer):
+class TradePreviewSerializer(CamelCaseKeysMixin, serializers.ModelSerializer):
     # seller = serializers.CharField(source='user.nickname', read_only=True)
     seller = serializers.SerializerMethodField()
     book_title = serializers.CharField(source='book.title', read_only=True)
@@ -0,0 +1,404 @@
+"""
+trades/services/bitmap_index.py
+
+중고거래 검색(TradeSearchAPIView) enum 조건용 메모리 비트맵 인덱스
+
+정책 요약:
+- 지역(18) / 판매 유형(2) / 거래 상태(3) / 성인 도서 여부 / 가격대(패싯용) 값마다 Trade id 비트맵 1개
+  - 비트맵은 파이썬 int (id 번째 비트 = 1) → AND / OR / 개수(bit_count) 를 C 에서 처리
+    100만 건이어도 비트맵 1개 ≈ 125KB
+  - 게시글별 현재 값은 필드마다 array('B') 1바이트 코드로 보관 → 수정 / 삭제 시 해당 비트만 옮김
+- 조건 조합: 같은 필드끼리 OR, 다른 필드끼리 AND
+  → 전체 개수는 bit_count (COUNT(*) 쿼리 없음), 페이지는 해당 id 만 조회
+- 페이지 조회에는 뷰의 필터가 걸린 QuerySet 을 그대로 씀 (id__in + 상태 / 지역 / 성인 조건)
+  → 비트맵이 잠시 어긋나도 판매 완료 / 성인 도서 게시글이 잘못 보이지 않음
+  → 비트맵 id 중 조건에 안 맞는 글이 나오면 어긋난 것이므로 재적재 예약
+- 패싯(?facets=true) 도 비트맵 AND + bit_count 로 계산 (DB 조회 없음, facets.py 와 같은 응답)
+- 적재는 요청 밖(백그라운드 스레드)에서 새 비트맵을 만든 뒤 한 번에 교체
+  - 적재 전에는 ready() 가 False → 뷰는 기존 DB 조회로 응답
+  - MAX_AGE 가 지나면 기존 비트맵으로 응답하면서 백그라운드 재적재
+  - 적재 중 들어온 증분 갱신은 기록해 뒀다가 교체 직후 다시 반영
+- Trade 생성/수정/삭제 시그널로 증분 갱신 (trades/signals.py)
+  Book.adult 가 바뀌면 그 도서의 게시글 비트도 같이 옮김
+- 공용 캐시의 인덱스 버전(books/services/catalog_cache.py)이 바뀌면 MAX_AGE 전이라도 재적재
+  → 적재 커멘드(load_catalog) / 다른 워커에서 바꾼 도서 성인 여부 반영
+- 최신순 정렬은 id 순서로 대신함 (created_at 은 생성 시각 auto_now_add → id 와 같은 순서)
+  적재 때 created_at 이 id 순서와 어긋나는 행이 있으면 페이지 조회에는 쓰지 않고 패싯에만 사용
+
+주의:
+- 인덱스는 프로세스마다 따로 존재함
+  → 다른 워커에서 바뀐 게시글 / 시그널을 타지 않는 일괄 변경은 재적재 전까지 개수 / 패싯에만 오차
+    (페이지 목록은 SQL 조건으로 다시 거르므로 정확함)
+"""
+
+import logging
+import threading
+import time
+from array import array
+from bisect import bisect_right
+
+from django.conf import settings
+from django.db import connection
+
+from books.services.catalog_cache import check_index_version, get_index_version
+from trades.models import Trade
+from trades.services.facets import FACET_VALUES, PRICE_BUCKETS
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "ENABLED": True,
+    "MAX_AGE": 300,         # 초, 이 시간이 지나면 백그라운드에서 다시 적재
+    "BACKGROUND": True,     # False 면 요청 스레드에서 바로 적재 (테스트 / 단일 프로세스용)
+}
+
+# 필드 → 값 목록 (코드 = 목록 위치 + 1, 0 은 '게시글 없음')
+FIELD_VALUES = {
+    **FACET_VALUES,
+    "adult": [False, True],
+    "price": list(range(len(PRICE_BUCKETS))),   # 가격대 번호
+}
+
+# 페이지 조회 시 개수만 세고 건너뛰는 단위 (바이트)
+SKIP_CHUNK_BYTES = 4096
+
+
+def get_bitmap_index_settings() -> dict:
+    return {**DEFAULTS, **getattr(settings, "TRADE_BITMAP_INDEX", {})}
+
+
+def price_bucket(price) -> int:
+    """가격 → PRICE_BUCKETS 번호"""
+    return max(bisect_right([low for low, _ in PRICE_BUCKETS], price or 0) - 1, 0)
+
+
+def _code_bitmap(codes: array, code: int) -> int:
+    """코드 배열에서 값이 code 인 위치 → 비트맵"""
+    table = bytes(b"1"[0] if value == code else b"0"[0] for value in range(256))
+    digits = codes.tobytes().translate(table)[::-1]
+    return int(digits, 2) if digits else 0
+
+
+def _value_codes() -> dict:
+    return {field: {value: code for code, value in enumerate(values, start=1)}
+            for field, values in FIELD_VALUES.items()}
+
+
+class _BitmapState:
+    """비트맵 한 벌 (재적재 때는 새로 만들어서 통째로 교체)"""
+
+    def __init__(self):
+        # (field, 코드) → 비트맵
+        self.bitmaps = {(field, code): 0 for field, values in FIELD_VALUES.items() for code in range(1, len(values) + 1)}
+        # field → array('B') (trade_id 번째 = 현재 값 코드)
+        self.codes = {field: array("B") for field in FIELD_VALUES}
+        self.all = 0
+        self.ordered_by_id = True
+
+
+class TradeBitmapIndex:
+    """필드 값별 Trade id 비트맵"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._value_codes = _value_codes()
+        self._state = _BitmapState()
+        self._built_at = None
+        # 적재 당시 인덱스 버전
+        self._version = None
+        # 적재 중이면 그동안의 증분 갱신 기록 (적재 중이 아니면 None)
+        self._replay = None
+
+    # ─────────────────────────────
+    # 적재
+    # ─────────────────────────────
+    @property
+    def built(self) -> bool:
+        return self._built_at is not None
+
+    @property
+    def ordered_by_id(self) -> bool:
+        return self._state.ordered_by_id
+
+    def _load(self) -> _BitmapState:
+        """DB에서 전체 게시글을 읽어 새 비트맵 생성 (잠금 없이 실행)"""
+        state = _BitmapState()
+        rows = Trade.objects.order_by("id").values_list(
+            "id", "region", "sale_type", "status", "book__adult", "price", "created_at",
+        )
+        region_codes, sale_type_codes, status_codes = (self._value_codes[field] for field in ("region", "sale_type", "status"))
+        bucket_lows = [low for low, _ in PRICE_BUCKETS]
+
+        # 1️⃣ 게시글마다 필드별 코드만 기록 (행마다 비트맵 int 를 고치면 매번 전체 복사)
+        codes = state.codes
+        region, sale_type, status, adult, price = (codes[field] for field in ("region", "sale_type", "status", "adult", "price"))
+        size = 0
+        last_created = None
+        for trade_id, region_value, sale_type_value, status_value, adult_value, price_value, created_at in rows.iterator(chunk_size=5000):
+            if trade_id >= size:
+                grow = max(trade_id + 1, size * 2) - size
+                for field_codes in codes.values():
+                    field_codes.extend(bytes(grow))
+                size += grow
+            region[trade_id] = region_codes.get(region_value, 0)
+            sale_type[trade_id] = sale_type_codes.get(sale_type_value, 0)
+            status[trade_id] = status_codes.get(status_value, 0)
+            adult[trade_id] = 2 if adult_value else 1
+            price[trade_id] = bisect_right(bucket_lows, price_value or 0)
+
+            if last_created is not None and created_at < last_created:
+                state.ordered_by_id = False
+            last_created = created_at
+
+        # 2️⃣ 코드 배열 → 값별 비트맵 (바이트마다 '1' / '0' 으로 바꾼 뒤 2진수 문자열로 변환, C 에서 처리)
+        for (field, code) in state.bitmaps:
+            state.bitmaps[(field, code)] = _code_bitmap(codes[field], code)
+        # 성인 여부는 항상 값이 있으므로 두 비트맵 합 = 전체 게시글
+        state.all = state.bitmaps[("adult", 1)] | state.bitmaps[("adult", 2)]
+        return state
+
+    def rebuild(self):
+        """DB에서 전체 게시글을 다시 읽어 비트맵 교체 (현재 스레드에서 실행)"""
+        with self._lock:
+            if self._replay is None:
+                self._replay = []
+        try:
+            # 읽기 전에 버전부터 기록 (읽는 도중 바뀌면 다음 조회 때 다시 적재)
+            version = get_index_version()
+            state = self._load()
+            with self._lock:
+                self._state = state
+                self._built_at = time.monotonic()
+                self._version = version
+                # 읽는 동안 커밋된 변경 다시 반영 (순서대로 → 마지막 값이 남음)
+                for apply, args in self._replay:
+                    apply(*args)
+        finally:
+            with self._lock:
+                self._replay = None
+
+    def _rebuild_in_background(self):
+        try:
+            self.rebuild()
+        except Exception:
+            logger.exception("중고거래 비트맵 인덱스 적재 실패 (기존 비트맵 유지)")
+        finally:
+            # 이 스레드 전용 DB 연결 정리
+            connection.close()
+
+    def schedule_rebuild(self):
+        """재적재 예약 (이미 적재 중이면 무시)"""
+        with self._lock:
+            if self._replay is not None:
+                return
+            self._replay = []
+        if get_bitmap_index_settings()["BACKGROUND"]:
+            threading.Thread(target=self._rebuild_in_background, name="trade-bitmap-index", daemon=True).start()
+        else:
+            self.rebuild()
+
+    def ready(self) -> bool:
+        """
+        조회에 쓸 수 있는지
+        - 적재 전이면 적재를 예약하고 False (이번 요청은 DB 조회)
+        - MAX_AGE 가 지났거나 인덱스 버전이 바뀌었으면 재적재를 예약하고 기존 비트맵으로 True
+        """
+        max_age = get_bitmap_index_settings()["MAX_AGE"]
+        version, stale = check_index_version(self._version if self.built else None)
+        if stale or time.monotonic() - self._built_at >= max_age:
+            self.schedule_rebuild()
+        elif version != self._version:
+            # 이 프로세스 시그널로 이미 반영한 변경
+            self._version = version
+        return self.built
+
+    def clear(self):
+        """인덱스 비우기 (다음 사용 때 DB에서 다시 적재)"""
+        with self._lock:
+            self._state = _BitmapState()
+            self._built_at = None
+
+    # ─────────────────────────────
+    # 증분 갱신
+    # ─────────────────────────────
+    def _record(self, apply, *args):
+        """적재된 비트맵에 바로 반영 + 적재 중이면 교체 후 다시 반영하도록 기록"""
+        with self._lock:
+            if self._replay is not None:
+                self._replay.append((apply, args))
+            if self.built:
+                apply(*args)
+
+    def _set_code(self, field, trade_id, code):
+        codes = self._state.codes[field]
+        if len(codes) <= trade_id:
+            codes.extend(bytes(trade_id - len(codes) + 1))
+        codes[trade_id] = code
+
+    def _move(self, field, trade_id, value):
+        """trade_id 의 field 비트를 value 비트맵으로 옮김 (value 가 None 이면 빼기만)"""
+        codes = self._state.codes[field]
+        old = codes[trade_id] if trade_id < len(codes) else 0
+        new = self._value_codes[field].get(value, 0) if value is not None else 0
+        if old == new:
+            return
+        bit = 1 << trade_id
+        if old:
+            self._state.bitmaps[(field, old)] &= ~bit
+        if new:
+            self._state.bitmaps[(field, new)] |= bit
+        self._set_code(field, trade_id, new)
+
+    def _apply_add(self, trade_id, values):
+        for field, value in values.items():
+            self._move(field, trade_id, value)
+        self._state.all |= 1 << trade_id
+
+    def _apply_remove(self, trade_id):
+        for field in FIELD_VALUES:
+            self._move(field, trade_id, None)
+        self._state.all &= ~(1 << trade_id)
+
+    def _apply_adult(self, trade_ids, adult):
+        for trade_id in trade_ids:
+            if self._state.all >> trade_id & 1:
+                self._move("adult", trade_id, adult)
+
+    def add(self, trade):
+        """게시글 생성/수정 반영"""
+        if not self.built and self._replay is None:
+            # 적재 전 → 최초 적재 때 한꺼번에 읽으므로 무시
+            return
+        values = {"region": trade.region, "sale_type": trade.sale_type, "status": trade.status,
+                  "adult": bool(trade.book.adult), "price": price_bucket(trade.price)}
+        self._record(self._apply_add, trade.pk, values)
+
+    def remove(self, trade_id):
+        self._record(self._apply_remove, trade_id)
+
+    def set_adult(self, trade_ids, adult: bool):
+        """도서 성인 여부 변경 → 해당 도서 게시글 비트 이동"""
+        self._record(self._apply_adult, list(trade_ids), bool(adult))
+
+    # ─────────────────────────────
+    # 조회 (ready() 가 True 일 때)
+    # ─────────────────────────────
+    def _field_bitmap(self, state, field, values) -> int:
+        """같은 필드 값끼리 OR (없는 값은 무시)"""
+        bitmap = 0
+        for value in values:
+            code = self._value_codes[field].get(value)
+            if code:
+                bitmap |= state.bitmaps[(field, code)]
+        return bitmap
+
+    def match(self, filters: dict) -> int:
+        """
+        :param filters: {'region': [...], 'sale_type': [...], 'status': [...], 'adult': [bool]}
+                        (값이 비어 있으면 조건 없음)
+        :return: 조건을 만족하는 게시글 비트맵
+        """
+        with self._lock:
+            state = self._state
+            bitmap = state.all
+            for field, values in filters.items():
+                if values:
+                    bitmap &= self._field_bitmap(state, field, values)
+            return bitmap
+
+    def facet_counts(self, filters: dict) -> dict:
+        """facets.facet_counts 와 같은 결과 (각 패싯은 자기 조건만 빼고 셈)"""
+        with self._lock:
+            state = self._state
+            constrained = {field: self._field_bitmap(state, field, values) for field, values in filters.items() if values}
+
+            def others(exclude=None):
+                bitmap = state.all
+                for field, field_bitmap in constrained.items():
+                    if field != exclude:
+                        bitmap &= field_bitmap
+                return bitmap
+
+            facets = {"total": others().bit_count()}
+            for field, values in FACET_VALUES.items():
+                base = others(field)
+                facets[field] = {
+                    value: (base & state.bitmaps[(field, code)]).bit_count()
+                    for code, value in enumerate(values, start=1)
+                }
+            base = others()
+            facets["price"] = [
+                {"min": low, "max": high, "count": (base & state.bitmaps[("price", code)]).bit_count()}
+                for code, (low, high) in enumerate(PRICE_BUCKETS, start=1)
+            ]
+            return facets
+
+    @staticmethod
+    def page_ids(bitmap: int, start: int, stop: int, descending: bool = True) -> list:
+        """
+        비트맵에서 start ~ stop 번째 id (id 내림차순 / 오름차순)
+        - SKIP_CHUNK_BYTES 단위로 개수만 세면서 앞 페이지를 건너뜀
+        """
+        ids = []
+        if stop <= start or not bitmap:
+            return ids
+        data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+        skip, size = start, stop - start
+
+        offsets = range(0, len(data), SKIP_CHUNK_BYTES)
+        for offset in (reversed(offsets) if descending else offsets):
+            chunk = data[offset:offset + SKIP_CHUNK_BYTES]
+            count = int.from_bytes(chunk, "little").bit_count()
+            if skip >= count:
+                skip -= count
+                continue
+            positions = range(len(chunk))
+            for position in (reversed(positions) if descending else positions):
+                byte = chunk[position]
+                if not byte:
+                    continue
+                bits = range(8)
+                for bit in (reversed(bits) if descending else bits):
+                    if byte >> bit & 1:
+                        if skip:
+                            skip -= 1
+                            continue
+                        ids.append((offset + position) * 8 + bit)
+                        if len(ids) == size:
+                            return ids
+        return ids
+
+
+class BitmapPage:
+    """
+    Django Paginator 에 넘기는 목록 (QuerySet 대신)
+    - 개수: 비트맵 bit_count
+    - 슬라이스: 해당 범위 id 만 뷰의 필터 QuerySet 으로 id__in 조회 후 비트맵 순서대로 정렬
+      (비트맵이 어긋나서 조건에 안 맞게 된 글은 SQL 에서 빠짐 → 재적재 예약)
+    """
+
+    def __init__(self, bitmap: int, queryset, descending: bool = True, index=None):
+        self.bitmap = bitmap
+        # 정렬은 비트맵 순서로 하므로 ORDER BY 없이 조회
+        self.queryset = queryset.order_by()
+        self.descending = descending
+        self.index = index if index is not None else trade_bitmap_index
+
+    def __len__(self):
+        return self.bitmap.bit_count()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self[item:item + 1][0]
+        start, stop, _ = item.indices(len(self))
+        ids = TradeBitmapIndex.page_ids(self.bitmap, start, stop, self.descending)
+        trades = self.queryset.in_bulk(ids)
+        if len(trades) < len(ids):
+            # 다른 워커에서 삭제 / 상태 변경된 글 또는 일괄 변경 → 비트맵이 어긋남
+            self.index.schedule_rebuild()
+        return [trades[trade_id] for trade_id in ids if trade_id in trades]
+
+
+# 전역 인스턴스
+trade_bitmap_index = TradeBitmapIndex()
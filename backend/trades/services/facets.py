@@ -0,0 +1,81 @@
+"""
+trades/services/facets.py
+
+중고거래 검색(TradeSearchAPIView ?facets=true) 필터별 게시글 수 (패싯)
+
+정책 요약:
+- 지역 / 판매 유형 / 거래 상태 / 가격대 별 개수를 조건마다 COUNT 하지 않고
+  조건부 집계(COUNT(...) FILTER / CASE WHEN) 를 모은 SELECT 1번으로 계산
+- 각 패싯은 '자기 조건만 뺀' 나머지 조건 기준으로 셈 (다중 선택 필터 방식)
+  예) 지역=서울 로 검색 중이어도 지역 패싯에는 부산 / 대구 ... 개수가 그대로 보임
+      (지역을 더 고르면 몇 개가 될지), 판매 유형 / 상태 / 가격 패싯은 서울 기준
+- 검색어 / 성인 도서 조건은 모든 패싯에 공통으로 적용 (facet_base 에 이미 걸려 있음)
+- total 은 모든 조건을 건 현재 검색 결과 수
+"""
+
+from django.db.models import Count, Q
+
+from trades.models import Trade
+
+
+# 패싯으로 보여줄 필드 → 값 목록
+FACET_VALUES = {
+    "region": [value for value, _ in Trade.REGION_CHOICES],
+    "sale_type": [value for value, _ in Trade.SALE_TYPE_CHOICES],
+    "status": [value for value, _ in Trade.STATUS_CHOICES],
+}
+
+# 가격대 (이상, 미만) - 마지막은 상한 없음
+PRICE_BUCKETS = [
+    (0, 1),
+    (1, 5000),
+    (5000, 10000),
+    (10000, 20000),
+    (20000, 50000),
+    (50000, None),
+]
+
+
+def _combined(filters: dict, exclude: str | None = None) -> Q:
+    """exclude 를 뺀 나머지 조건을 AND 로 묶음"""
+    condition = Q()
+    for name, q in filters.items():
+        if name != exclude:
+            condition &= q
+    return condition
+
+
+def _price_bucket(low, high) -> Q:
+    condition = Q(price__gte=low)
+    if high is not None:
+        condition &= Q(price__lt=high)
+    return condition
+
+
+def facet_counts(facet_base, filters: dict) -> dict:
+    """
+    :param facet_base: 패싯 대상 조건(판매 유형 / 상태 / 지역 / 가격)을 걸기 전 QuerySet
+    :param filters: {'region' | 'sale_type' | 'status' | 'price': Q} 현재 검색에 걸린 패싯 조건
+    :return: {'total', 'region': {값: 개수}, 'sale_type': {...}, 'status': {...},
+              'price': [{'min', 'max', 'count'}, ...]}
+    """
+    aggregates = {"total": Count("id", filter=_combined(filters))}
+    for field, values in FACET_VALUES.items():
+        others = _combined(filters, exclude=field)
+        for index, value in enumerate(values):
+            aggregates[f"{field}_{index}"] = Count("id", filter=others & Q(**{field: value}))
+    others = _combined(filters, exclude="price")
+    for index, (low, high) in enumerate(PRICE_BUCKETS):
+        aggregates[f"price_{index}"] = Count("id", filter=others & _price_bucket(low, high))
+
+    # 정렬 / JOIN 컬럼 조회 없이 집계만 (SELECT 1번)
+    row = facet_base.order_by().aggregate(**aggregates)
+
+    facets = {"total": row["total"]}
+    for field, values in FACET_VALUES.items():
+        facets[field] = {value: row[f"{field}_{index}"] for index, value in enumerate(values)}
+    facets["price"] = [
+        {"min": low, "max": high, "count": row[f"price_{index}"]}
+        for index, (low, high) in enumerate(PRICE_BUCKETS)
+    ]
+    return facets
@@ -0,0 +1,215 @@
+"""
+trades/services/query_shapes.py
+
+중고거래 검색(TradeSearchAPIView) 필터 / 정렬 조합 집계
+→ 실제로 많이 쓰이는 조합에 맞춰 복합 / 부분 인덱스를 고르기 위한 자료 (trade_query_shapes 커멘드로 확인)
+
+정책 요약:
+- 검색어 / 가격 같은 '값'은 버리고 어떤 조건이 걸렸는지(조합)만 기록
+  예) 'adult|status=available|region:2|order=-created_at'
+  - status 는 선택지가 3개뿐이고 부분 인덱스 사용 여부가 값에 따라 달라서 값까지 기록
+  - region / saleType 은 IN 목록 개수만 기록
+- 요청마다 DB 에 쓰지 않고 메모리에 모았다가 FLUSH_INTERVAL 마다 조합별 F() UPDATE 로 반영
+  (조회수 버퍼 view_counter.py 와 같은 방식, 조합 종류는 많아야 수십 개)
+  - 반영은 트랜잭션(세이브포인트) 1번 → 실패하면 로그만 남기고 집계를 버퍼에 되돌림
+    (검색 요청 안에서 반영되므로 DB 오류가 검색 응답 / 요청 트랜잭션으로 번지지 않게 함)
+- shape_queryset() 으로 조합 → 같은 모양의 QuerySet 을 다시 만들어서 실행 계획(EXPLAIN) 확인
+
+주의:
+- 버퍼는 프로세스마다 따로 존재함 → 각 워커가 자기 몫을 반영
+- 프로세스가 비정상 종료되면 마지막 FLUSH_INTERVAL 동안의 집계는 유실될 수 있음 (통계용이라 허용)
+"""
+
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from trades.models import Trade, TradeSearchShape
+from trades.services.search_index import search_trades
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "RECORD": True,            # False 면 집계하지 않음
+    "FLUSH_INTERVAL": 60,      # 초
+}
+
+# 뷰에서 정렬로 받아주는 값 (그 외 값은 정렬 없음, relevance 는 전문 검색 관련도 순)
+ORDERINGS = ("created_at", "-created_at", "price", "-price", "relevance")
+
+STATUSES = {value for value, _ in Trade.STATUS_CHOICES}
+REGIONS = [value for value, _ in Trade.REGION_CHOICES]
+SALE_TYPES = [value for value, _ in Trade.SALE_TYPE_CHOICES]
+
+
+def get_query_shape_settings() -> dict:
+    return {**DEFAULTS, **getattr(settings, "TRADE_QUERY_SHAPES", {})}
+
+
+# ─────────────────────────────
+# 요청 → 조합 문자열
+# ─────────────────────────────
+def _applies_adult_filter(params, user) -> bool:
+    """TradeSearchAPIView 의 성인 도서 조건과 같은 기준으로 book.adult 조건이 걸리는지"""
+    if not (user is not None and user.is_authenticated and user.age is not None and user.age >= 20):
+        return True
+    return params.get("adult") in ("true", "True", "false", "False")
+
+
+def default_ordering(params) -> str:
+    """정렬을 지정하지 않았을 때: 전문 검색이면 관련도 순, 아니면 최신순 (isbn 검색은 icontains 라 최신순)"""
+    if params.get("search") and params.get("searchType", "title") != "isbn":
+        return "relevance"
+    return "-created_at"
+
+
+def trade_search_shape(params, user=None) -> str:
+    """
+    검색 요청 파라미터 → 조합 문자열 (같은 WHERE / ORDER BY 모양이면 같은 값)
+    :param params: request.query_params
+    """
+    tokens = []
+    search = params.get("search")
+    if search:
+        tokens.append(f"search={params.get('searchType', 'title')}")
+    if _applies_adult_filter(params, user):
+        tokens.append("adult")
+    sale_types = params.getlist("saleType")
+    if sale_types:
+        tokens.append(f"sale_type:{len(sale_types)}")
+    status = params.get("status")
+    if status:
+        tokens.append(f"status={status}" if status in STATUSES else "status")
+    regions = params.getlist("region")
+    if regions:
+        tokens.append(f"region:{len(regions)}")
+    if params.get("min_price"):
+        tokens.append("min_price")
+    if params.get("max_price"):
+        tokens.append("max_price")
+    ordering = params.get("ordering", default_ordering(params))
+    tokens.append(f"order={ordering}" if ordering in ORDERINGS else "order=none")
+    if "cursor" in params:
+        tokens.append("cursor")
+    return "|".join(tokens)
+
+
+def shape_queryset(signature: str, queryset=None):
+    """
+    조합 문자열 → 같은 모양의 검색 QuerySet (값은 임의로 채움, 실행 계획 확인용)
+    """
+    queryset = Trade.objects.select_related("book", "user") if queryset is None else queryset
+    for token in signature.split("|"):
+        name, _, value = token.partition("=")
+        name, _, count = name.partition(":")
+        if name == "search":
+            if value == "isbn":
+                queryset = queryset.filter(book__isbn__icontains="978")
+            else:
+                queryset = search_trades(queryset, "팝니다", value)
+        elif name == "adult":
+            queryset = queryset.filter(book__adult=False)
+        elif name == "sale_type":
+            queryset = queryset.filter(sale_type__in=SALE_TYPES[:int(count)] or SALE_TYPES[:1])
+        elif name == "status":
+            queryset = queryset.filter(status=value or "available")
+        elif name == "region":
+            queryset = queryset.filter(region__in=REGIONS[1:int(count) + 1])
+        elif name == "min_price":
+            queryset = queryset.filter(price__gte=1000)
+        elif name == "max_price":
+            queryset = queryset.filter(price__lte=20000)
+        elif name == "order" and value in ORDERINGS and value != "relevance":
+            queryset = queryset.order_by(value, "-id" if value.startswith("-") else "id")
+    return queryset
+
+
+# ─────────────────────────────
+# 집계 버퍼
+# ─────────────────────────────
+class TradeQueryShapeRecorder:
+    """조합별 호출 수를 메모리에 모았다가 주기적으로 DB 반영"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = defaultdict(int)
+        self._last_flush = time.monotonic()
+
+    def record(self, params, user=None) -> str | None:
+        """검색 요청 1번 기록 → 기록한 조합 문자열 (집계가 꺼져 있으면 None)"""
+        conf = get_query_shape_settings()
+        if not conf["RECORD"]:
+            return None
+
+        signature = trade_search_shape(params, user)
+        with self._lock:
+            self._pending[signature] += 1
+            due = time.monotonic() - self._last_flush >= conf["FLUSH_INTERVAL"]
+        if due:
+            self.flush()
+        return signature
+
+    def pending(self) -> dict:
+        with self._lock:
+            return dict(self._pending)
+
+    def flush(self) -> int:
+        """
+        쌓인 집계를 DB 에 반영
+        - DB 오류가 나면 예외를 올리지 않고 집계를 버퍼에 되돌림 (다음 주기에 다시 반영)
+        :return: 반영한 조합 수
+        """
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(int)
+            self._last_flush = time.monotonic()
+        if not pending:
+            return 0
+
+        try:
+            with transaction.atomic():
+                self._write(pending)
+        except DatabaseError:
+            logger.exception("검색 조합 집계 반영 실패 (%d개 조합, 다음 주기에 다시 반영)", len(pending))
+            with self._lock:
+                for signature, hits in pending.items():
+                    self._pending[signature] += hits
+            return 0
+        return len(pending)
+
+    @staticmethod
+    def _write(pending: dict):
+        now = timezone.now()
+        for signature, hits in pending.items():
+            shapes = TradeSearchShape.objects.filter(signature=signature)
+            if shapes.update(hits=F("hits") + hits, last_seen=now):
+                continue
+            # 처음 보는 조합 (동시에 다른 워커가 만들었으면 get_or_create 가 기존 행을 돌려줌)
+            _, created = TradeSearchShape.objects.get_or_create(signature=signature, defaults={"hits": hits})
+            if not created:
+                shapes.update(hits=F("hits") + hits, last_seen=now)
+
+    def discard(self):
+        """반영하지 않고 버림 (테스트용, 다음 주기 flush 시점도 지금부터 다시 계산)"""
+        with self._lock:
+            self._pending.clear()
+            self._last_flush = time.monotonic()
+
+
+# 전역 인스턴스
+trade_query_shapes = TradeQueryShapeRecorder()
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        trade_query_shapes.flush()
+    except Exception:
+        logger.exception("종료 전 검색 조합 집계 반영 실패")
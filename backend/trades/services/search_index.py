@@ -0,0 +1,230 @@
+"""
+trades/services/search_index.py
+
+중고거래 검색(TradeSearchAPIView)에서 사용되는
+전문 검색(Full-Text Search) 인덱스 조회 로직 (도서 검색 books/services/search_index.py 와 같은 방식)
+
+정책 요약:
+- 검색 대상: 게시글 제목(title) / 내용(content) / 도서명(book.title)
+  - searchType=title | content | book → 해당 컬럼만, searchType=all → 세 컬럼 모두
+  - searchType=isbn 은 기존처럼 icontains (숫자 일부 검색)
+- SQLite     : FTS5 테이블(trade_fts, trigram 토크나이저 → 띄어쓰기 없는 한글도 부분 문자열 검색)
+               → trade / book 테이블 트리거로 자동 동기화 (게시글 저장 / 삭제, 도서명 수정 모두 반영)
+               도서명은 trade 컬럼이 아니라서 외부 콘텐츠 테이블이 아닌 일반 FTS5 테이블에 복사해 둠
+- PostgreSQL : 도서 검색과 같이 두 GIN 인덱스를 OR 로 같이 사용 (도서명은 idx_book_title_fts / idx_book_title_trgm)
+               - to_tsvector('simple', ...) 표현식 인덱스 → 띄어쓰기 단위 접두어 검색
+               - pg_trgm 인덱스(UPPER(컬럼) gin_trgm_ops) → icontains 부분 문자열 검색 (띄어쓰기 없는 한글)
+- 관련도(relevance) 순 정렬 (SQLite: bm25, PostgreSQL: ts_rank)
+  all 검색은 제목 > 도서명 > 내용 순으로 가중치
+- trigram은 3글자 미만 검색어를 인덱싱하지 못하므로 그때만 icontains + 최신순으로 대체 (SQLite)
+
+주의:
+- SQLite는 컬럼 추가 등 마이그레이션 때 trade / book 테이블을 새로 만들어 바꿔치기하므로
+  걸려 있던 동기화 트리거가 같이 사라짐
+  → migrate 가 끝날 때마다 ensure_trade_search_index() 로 트리거를 다시 만들고 재색인 (signals.py)
+"""
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection, connections
+from django.db.models import Q
+
+from books.services.search_index import TRIGRAM_MIN_LENGTH, SimpleTsVector, _pg_prefix_query
+
+
+# FTS5 테이블 이름 (migrations/0003_trade_search_index.py 에서 생성)
+TRADE_FTS_TABLE = "trade_fts"
+
+# searchType → 검색 컬럼 (ORM 필드, FTS5 컬럼)
+SEARCH_FIELDS = {
+    "title": ("title", "title"),
+    "content": ("content", "content"),
+    "book": ("book__title", "book_title"),
+}
+
+# searchType=all 관련도 가중치 (SQLite bm25 컬럼 순서 / PostgreSQL setweight)
+SEARCH_WEIGHTS = {"title": ("A", 3.0), "book": ("B", 2.0), "content": ("D", 1.0)}
+
+# 이미 들어있는 게시글 색인 (마이그레이션 / 재구축 공용)
+SQLITE_POPULATE_SQL = f"""
+    INSERT INTO {TRADE_FTS_TABLE}(rowid, title, content, book_title)
+    SELECT trade.id, trade.title, trade.content, book.title FROM trade JOIN book ON book.id = trade.book_id
+"""
+
+# trade / book → trade_fts 동기화 트리거 (migrations/0003_trade_search_index.py 와 동일)
+SQLITE_TRIGGER_SQL = {
+    "trade_fts_ai": f"""
+        CREATE TRIGGER IF NOT EXISTS trade_fts_ai AFTER INSERT ON trade BEGIN
+            INSERT INTO {TRADE_FTS_TABLE}(rowid, title, content, book_title)
+            VALUES (new.id, new.title, new.content, (SELECT title FROM book WHERE id = new.book_id));
+        END
+    """,
+    "trade_fts_ad": f"""
+        CREATE TRIGGER IF NOT EXISTS trade_fts_ad AFTER DELETE ON trade BEGIN
+            DELETE FROM {TRADE_FTS_TABLE} WHERE rowid = old.id;
+        END
+    """,
+    "trade_fts_au": f"""
+        CREATE TRIGGER IF NOT EXISTS trade_fts_au AFTER UPDATE OF title, content, book_id ON trade BEGIN
+            DELETE FROM {TRADE_FTS_TABLE} WHERE rowid = old.id;
+            INSERT INTO {TRADE_FTS_TABLE}(rowid, title, content, book_title)
+            VALUES (new.id, new.title, new.content, (SELECT title FROM book WHERE id = new.book_id));
+        END
+    """,
+    "trade_fts_book_au": f"""
+        CREATE TRIGGER IF NOT EXISTS trade_fts_book_au AFTER UPDATE OF title ON book BEGIN
+            UPDATE {TRADE_FTS_TABLE} SET book_title = new.title
+            WHERE rowid IN (SELECT id FROM trade WHERE book_id = new.id);
+        END
+    """,
+}
+
+
+# ─────────────────────────────
+# 인덱스 사용 가능 여부
+# ─────────────────────────────
+_fts_table_cache = {}
+
+
+def _sqlite_fts_available() -> bool:
+    """trade_fts 테이블이 실제로 만들어져 있는지 (FTS5/trigram 미지원 SQLite 대비)"""
+    alias = connection.alias
+    if alias not in _fts_table_cache:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                [TRADE_FTS_TABLE],
+            )
+            _fts_table_cache[alias] = cursor.fetchone() is not None
+    return _fts_table_cache[alias]
+
+
+# ─────────────────────────────
+# 검색어 → MATCH 변환
+# ─────────────────────────────
+def _fts5_match_expression(columns, search: str) -> str:
+    """
+    FTS5 MATCH 식 생성
+    - 검색어 전체를 하나의 phrase로 감싸서 trigram 부분 문자열 검색 (icontains와 같은 '포함' 의미)
+    - 컬럼이 여러 개면 {title content book_title} : "..." 형태로 묶음
+    """
+    phrase = search.replace('"', '""')
+    return f'{{{" ".join(columns)}}} : "{phrase}"'
+
+
+# ─────────────────────────────
+# 검색 적용
+# ─────────────────────────────
+def search_trades(queryset, search: str, search_type: str = "title"):
+    """
+    queryset에 전문 검색 조건 + 관련도 정렬을 적용해서 반환
+
+    :param queryset: Trade QuerySet
+    :param search: 검색어
+    :param search_type: 'title' | 'content' | 'book' | 'all'
+    """
+    search = (search or "").strip()
+    if not search:
+        return queryset
+    if search_type == "all":
+        types = list(SEARCH_FIELDS)
+    elif search_type in SEARCH_FIELDS:
+        types = [search_type]
+    else:
+        return queryset
+
+    vendor = connection.vendor
+
+    if vendor == "sqlite" and len(search) >= TRIGRAM_MIN_LENGTH and _sqlite_fts_available():
+        # trade_fts.rowid == trade.id 조인 → FTS 인덱스에서 먼저 후보를 뽑고 bm25 점수로 정렬
+        weights = ", ".join(str(SEARCH_WEIGHTS[name][1]) for name in ("title", "content", "book"))
+        return queryset.extra(
+            tables=[TRADE_FTS_TABLE],
+            where=[
+                f"{TRADE_FTS_TABLE}.rowid = trade.id",
+                f"{TRADE_FTS_TABLE} MATCH %s",
+            ],
+            params=[_fts5_match_expression([SEARCH_FIELDS[name][1] for name in types], search)],
+            # bm25는 값이 작을수록 관련도가 높음 (인자는 title / content / book_title 가중치)
+            select={"search_rank": f"bm25({TRADE_FTS_TABLE}, {weights})"},
+            order_by=["search_rank", "-id"],
+        )
+
+    if vendor == "postgresql":
+        # 부분 문자열: UPPER(<컬럼>::text) LIKE ... → pg_trgm 인덱스(idx_trade_<field>_trgm / idx_book_title_trgm)
+        substring = Q()
+        for name in types:
+            substring |= Q(**{f"{SEARCH_FIELDS[name][0]}__icontains": search})
+        tsquery = _pg_prefix_query(search)
+        if tsquery:
+            query = SearchQuery(tsquery, config="simple", search_type="raw")
+            # 접두어 검색: 컬럼별 tsvector 표현식 → GIN 인덱스(idx_trade_<field>_fts / idx_book_title_fts)
+            vectors = {name: SimpleTsVector(SEARCH_FIELDS[name][0]) for name in types}
+            condition = substring
+            for name in types:
+                condition |= Q(**{f"{name}_search_vector": query})
+            # 순위 계산용 가중치 벡터 (인덱스와 무관)
+            weighted = None
+            for name in types:
+                vector = SearchVector(SEARCH_FIELDS[name][0], config="simple", weight=SEARCH_WEIGHTS[name][0])
+                weighted = vector if weighted is None else weighted + vector
+            return (
+                queryset
+                .annotate(**{f"{name}_search_vector": vector for name, vector in vectors.items()})
+                .annotate(search_rank=SearchRank(weighted, query))
+                .filter(condition)
+                .order_by("-search_rank", "-id")
+            )
+        return queryset.filter(substring).order_by("-created_at", "-id")
+
+    # 인덱스를 쓸 수 없는 경우 (짧은 검색어 / 기타 DB) → 기존 방식 (최신순)
+    condition = Q()
+    for name in types:
+        condition |= Q(**{f"{SEARCH_FIELDS[name][0]}__icontains": search})
+    return queryset.filter(condition).order_by("-created_at", "-id")
+
+
+def rebuild_trade_search_index() -> None:
+    """
+    FTS 인덱스 전체 재구축
+    - 트리거를 우회한 raw SQL 적재 후 등 인덱스가 어긋났을 때 사용
+    - PostgreSQL 표현식 인덱스는 DB가 자동으로 유지하므로 REINDEX만 수행
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite" and _sqlite_fts_available():
+            cursor.execute(f"DELETE FROM {TRADE_FTS_TABLE}")
+            cursor.execute(SQLITE_POPULATE_SQL)
+        elif connection.vendor == "postgresql":
+            for field in ("title", "content"):
+                cursor.execute(f"REINDEX INDEX idx_trade_{field}_fts")
+                cursor.execute(f"REINDEX INDEX idx_trade_{field}_trgm")
+
+
+def ensure_trade_search_index(using: str = "default") -> bool:
+    """
+    SQLite 동기화 트리거가 빠져 있으면 다시 만들고 FTS 인덱스 재구축
+    - FTS 테이블이 없는 환경(트리그램 미지원 SQLite / 마이그레이션 전)이면 아무것도 안 함
+    :return: 트리거를 다시 만들었는지 여부
+    """
+    conn = connections[using]
+    if conn.vendor != "sqlite":
+        return False
+
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE (type = 'table' AND name = %s) OR type = 'trigger'",
+            [TRADE_FTS_TABLE],
+        )
+        names = {row[0] for row in cursor.fetchall()}
+        if TRADE_FTS_TABLE not in names:
+            return False
+
+        missing = [name for name in SQLITE_TRIGGER_SQL if name not in names]
+        if not missing:
+            return False
+
+        for name in missing:
+            cursor.execute(SQLITE_TRIGGER_SQL[name])
+        # 트리거가 없던 동안 바뀐 게시글까지 반영
+        cursor.execute(f"DELETE FROM {TRADE_FTS_TABLE}")
+        cursor.execute(SQLITE_POPULATE_SQL)
+    return True
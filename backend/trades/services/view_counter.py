@@ -0,0 +1,191 @@
+"""
+trades/services/view_counter.py
+
+중고거래 상세 조회수(Trade.view_count) 집계
+
+정책 요약:
+- 상세 조회 때마다 trade 행을 UPDATE 하지 않고 메모리에 조회수를 모아 둠
+- 일정 시간(FLUSH_INTERVAL) 또는 일정 개수(FLUSH_THRESHOLD)가 쌓이면 한 번에 반영
+  - 시간 기준은 첫 조회 때 타이머 스레드를 걸어 둠 → 이후 조회가 없어도 FLUSH_INTERVAL 뒤 반영
+  → UPDATE trade SET view_count = view_count + n WHERE id IN (...)
+  → 같은 증가량(n)끼리 묶어서 UPDATE 1번 (DB 값 기준으로 더하므로 동시 요청에도 유실 없음)
+  → QuerySet.update() 라 updated_at(auto_now) 은 바뀌지 않음
+- DEDUPE_WINDOW(초) 를 주면 같은 사용자(비로그인은 IP)의 반복 조회는 그 시간 동안 1번만 집계
+  (Django cache.add 사용, 0 이면 끔)
+  - 비로그인 IP 는 REMOTE_ADDR 기준, X-Forwarded-For 는 REMOTE_ADDR 가 TRUSTED_PROXIES 일 때만 사용
+    (클라이언트가 임의로 보낸 헤더로 중복 집계를 피해 가지 못하도록)
+- 반영 중 DB 오류가 나면 로그만 남기고 조회수를 버퍼에 되돌림 (다음 주기에 다시 반영)
+- 프로세스 종료 시 남은 조회수 반영 (atexit)
+
+주의:
+- 버퍼는 프로세스마다 따로 존재함 → 반영 전까지 다른 워커의 응답에는 조회수가 늦게 보임
+- 프로세스가 비정상 종료되면 마지막 FLUSH_INTERVAL 동안의 조회수는 유실될 수 있음
+"""
+
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+from django.db.models import F
+
+from trades.models import Trade
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "BUFFERED": True,          # False 면 조회마다 바로 F() UPDATE
+    "FLUSH_INTERVAL": 10,      # 초
+    "FLUSH_THRESHOLD": 500,    # 쌓인 조회수 합계
+    "DEDUPE_WINDOW": 0,        # 초 (0 이면 중복 조회도 모두 집계)
+    "TRUSTED_PROXIES": (),     # X-Forwarded-For 를 믿을 프록시 IP (REMOTE_ADDR 기준)
+}
+
+
+def get_view_count_settings() -> dict:
+    return {**DEFAULTS, **getattr(settings, "TRADE_VIEW_COUNT", {})}
+
+
+def client_ip(request, trusted_proxies=()) -> str:
+    """
+    요청한 클라이언트 IP
+    - REMOTE_ADDR 가 믿는 프록시일 때만 X-Forwarded-For 를 오른쪽부터 읽어서
+      믿는 프록시가 아닌 첫 주소 사용 (왼쪽 값은 클라이언트가 마음대로 넣을 수 있음)
+    """
+    ip = request.META.get("REMOTE_ADDR", "")
+    if ip not in trusted_proxies:
+        return ip
+    forwarded = [value.strip() for value in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",") if value.strip()]
+    for hop in reversed(forwarded):
+        if hop not in trusted_proxies:
+            return hop
+    return forwarded[0] if forwarded else ip
+
+
+def _viewer_key(request, trusted_proxies=()) -> str:
+    """중복 조회 판단 기준 (로그인 사용자 id, 비로그인은 IP)"""
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return f"u{user.pk}"
+    return f"ip{client_ip(request, trusted_proxies)}"
+
+
+class TradeViewCounter:
+    """조회수 버퍼 (스레드 안전)"""
+
+    def __init__(self):
+        self._pending = defaultdict(int)
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._timer = None
+
+    # ─────────────────────────────
+    # 조회 기록
+    # ─────────────────────────────
+    def hit(self, trade_id: int, request=None) -> bool:
+        """
+        조회 1번 기록
+        :return: 집계했으면 True (중복 조회로 건너뛰면 False)
+        """
+        conf = get_view_count_settings()
+
+        window = conf["DEDUPE_WINDOW"]
+        if window and request is not None:
+            # 키가 이미 있으면 add 가 False → 같은 사람의 반복 조회
+            viewer = _viewer_key(request, conf["TRUSTED_PROXIES"])
+            if not cache.add(f"trade:view:{trade_id}:{viewer}", 1, window):
+                return False
+
+        if not conf["BUFFERED"]:
+            Trade.objects.filter(id=trade_id).update(view_count=F("view_count") + 1)
+            return True
+
+        with self._lock:
+            self._pending[trade_id] += 1
+            due = (
+                sum(self._pending.values()) >= conf["FLUSH_THRESHOLD"]
+                or time.monotonic() - self._last_flush >= conf["FLUSH_INTERVAL"]
+            )
+            if not due and self._timer is None:
+                # 이후 조회가 없어도 FLUSH_INTERVAL 뒤에 반영
+                self._timer = threading.Timer(conf["FLUSH_INTERVAL"], self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+        if due:
+            self.flush()
+        return True
+
+    def pending(self, trade_id: int) -> int:
+        """아직 DB 에 반영되지 않은 조회수 (응답에 더해서 보여주기용)"""
+        with self._lock:
+            return self._pending.get(trade_id, 0)
+
+    # ─────────────────────────────
+    # DB 반영
+    # ─────────────────────────────
+    def flush(self) -> int:
+        """
+        쌓인 조회수를 DB 에 반영
+        :return: 실행한 UPDATE 수
+        """
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(int)
+            self._last_flush = time.monotonic()
+        if not pending:
+            return 0
+
+        # 증가량이 같은 글끼리 묶기 → {3: [1, 7], 1: [2, 5, 9]}
+        groups = defaultdict(list)
+        for trade_id, count in pending.items():
+            groups[count].append(trade_id)
+
+        remaining = list(groups.items())
+        while remaining:
+            count, trade_ids = remaining[0]
+            try:
+                Trade.objects.filter(id__in=trade_ids).update(view_count=F("view_count") + count)
+            except DatabaseError:
+                # 아직 반영하지 못한 묶음만 버퍼에 되돌림 (앞에서 반영한 묶음은 그대로)
+                logger.exception("조회수 반영 실패 (%d개 묶음, 다음 주기에 다시 반영)", len(remaining))
+                with self._lock:
+                    for count, trade_ids in remaining:
+                        for trade_id in trade_ids:
+                            self._pending[trade_id] += count
+                return len(groups) - len(remaining)
+            remaining.pop(0)
+        return len(groups)
+
+    def _flush_from_timer(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        finally:
+            # 타이머 스레드 전용 DB 연결 정리
+            connection.close()
+
+    def discard(self):
+        """반영하지 않고 버림 (테스트용, 다음 주기 flush 시점도 지금부터 다시 계산)"""
+        with self._lock:
+            self._pending.clear()
+            self._last_flush = time.monotonic()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+
+# 전역 인스턴스
+trade_view_counter = TradeViewCounter()
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        trade_view_counter.flush()
+    except Exception:
+        logger.exception("종료 전 조회수 반영 실패")
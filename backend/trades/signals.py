@@ -0,0 +1,52 @@
+"""
+중고거래 비트맵 인덱스 Signal
+Trade가 생성/수정/삭제될 때 메모리 비트맵 인덱스(services/bitmap_index.py) 증분 갱신
+Book.adult 가 바뀌면 그 도서의 게시글 성인 여부 비트 이동
+
+중고거래 검색(FTS) 트리거 복구 Signal
+migrate 후 SQLite trade / book 테이블 재생성으로 사라진 FTS 동기화 트리거 재생성
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, post_migrate
+from django.dispatch import receiver
+
+from books.models import Book
+from .models import Trade
+from .services.bitmap_index import trade_bitmap_index
+from .services.search_index import ensure_trade_search_index
+
+
+@receiver(post_save, sender=Trade)
+def update_bitmap_index_on_save(sender, instance, **kwargs):
+    """게시글 생성/수정 시 비트맵 갱신 (커밋된 뒤에만 반영)"""
+    transaction.on_commit(lambda: trade_bitmap_index.add(instance))
+
+
+@receiver(post_delete, sender=Trade)
+def update_bitmap_index_on_delete(sender, instance, **kwargs):
+    """게시글 삭제 시 비트맵에서 제거"""
+    trade_id = instance.pk
+    transaction.on_commit(lambda: trade_bitmap_index.remove(trade_id))
+
+
+@receiver(post_save, sender=Book)
+def update_bitmap_index_on_book_save(sender, instance, update_fields=None, raw=False, **kwargs):
+    """도서 성인 여부가 바뀌었을 수 있으면 그 도서 게시글 비트 이동 (인덱스 적재 전이면 쿼리하지 않음)"""
+    if raw or not trade_bitmap_index.built:
+        return
+    if update_fields is not None and "adult" not in update_fields:
+        return
+
+    def apply():
+        trade_ids = Trade.objects.filter(book_id=instance.pk).values_list("id", flat=True)
+        trade_bitmap_index.set_adult(list(trade_ids), instance.adult)
+
+    transaction.on_commit(apply)
+
+
+@receiver(post_migrate)
+def restore_trade_search_triggers(sender, using, **kwargs):
+    """AddField 등으로 trade / book 테이블이 재생성되면 FTS 트리거도 같이 사라지므로 다시 생성"""
+    if sender.label not in ('trades', 'books'):
+        return
+    ensure_trade_search_index(using)
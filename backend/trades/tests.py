@@ -1,3 +1,663 @@
-from django.test import TestCase
+import io
+import json
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.http import QueryDict
+from django.test import TestCase, override_settings, tag
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from bookmarket.perf import EndpointBudgetMixin, seed_catalog
+
+from books.models import Book
+from books.services.catalog_cache import bump_index_version
+
+from .models import Trade, TradeSearchShape
+from .services.bitmap_index import TradeBitmapIndex, trade_bitmap_index
+from .services.facets import PRICE_BUCKETS, facet_counts
+from .services.query_shapes import shape_queryset, trade_query_shapes, trade_search_shape
+from .services.search_index import search_trades
+from .services.view_counter import trade_view_counter
+
+
+# 비트맵 인덱스 적재를 요청 스레드에서 바로 (TestCase 트랜잭션 안의 데이터는 다른 스레드에서 안 보임)
+sync_bitmap_index = override_settings(TRADE_BITMAP_INDEX={"ENABLED": True, "BACKGROUND": False})
+
+
+@tag("perf")
+@sync_bitmap_index
+class TradeEndpointBudgetTest(EndpointBudgetMixin, APITestCase):
+    """
+    trades 엔드포인트 쿼리 수 / 응답 시간 예산 (bookmarket/perf.py)
+    - 쿼리 수에는 JWT 인증의 사용자 조회 1번이 포함됨
+    """
+    report_title = "trades"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.catalog = seed_catalog()
+        cls.trade = Trade.objects.select_related("user").order_by("id").first()
+        cls.seller = cls.trade.user
+        cls.book = cls.catalog["books"][0]
+
+    def setUp(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.seller)}")
+        # 상세 조회수 반영 타이머 정리
+        self.addCleanup(trade_view_counter.discard)
+
+    def test_trade_search(self):
+        # 전문 검색 (services/search_index.py) - FTS 테이블 확인은 프로세스당 1번이라 먼저 한 번 호출
+        params = {"search": "팝니다", "region": ["seoul", "busan"], "status": "available", "size": 20}
+        self.client.get("/api/trades/search/", params)
+        self.measure("GET trades/search/", self.client.get, "/api/trades/search/", params,
+                     max_queries=3, max_ms=300)
+
+    def test_trade_search_all(self):
+        params = {"search": "팝니다", "searchType": "all", "size": 20}
+        self.client.get("/api/trades/search/", params)
+        self.measure("GET trades/search/?searchType=all", self.client.get, "/api/trades/search/", params,
+                     max_queries=3, max_ms=300)
+
+    def test_trade_search_facets(self):
+        # 패싯은 집계 쿼리 1번만 추가 (가격 조건이 있으면 비트맵 대신 DB 집계)
+        self.measure("GET trades/search/?facets=true", self.client.get, "/api/trades/search/",
+                     {"region": ["seoul", "busan"], "status": "available", "min_price": 1000, "size": 20,
+                      "facets": "true"},
+                     max_queries=4, max_ms=400)
+
+    def test_trade_search_bitmap(self):
+        # enum 조건만 있으면 개수 / 패싯은 메모리 비트맵, DB 는 페이지 id__in 조회 1번
+        trade_bitmap_index.rebuild()
+        self.measure("GET trades/search/ (bitmap)", self.client.get, "/api/trades/search/",
+                     {"region": ["seoul", "busan"], "status": "available", "size": 20, "facets": "true"},
+                     max_queries=2, max_ms=150)
+
+    def test_trade_search_cursor_deep_page(self):
+        # 키셋 방식은 몇 번째 페이지든 비용이 같음 (COUNT / OFFSET 없음)
+        url = "/api/trades/search/?cursor=&size=100&ordering=price"
+        for _ in range(20):
+            url = self.client.get(url).json()["next"]
+        self.measure("GET trades/search/?cursor= (21p)", self.client.get, url, max_queries=2, max_ms=150)
+
+    def test_trade_search_cursor_matches_ordering(self):
+        self.client.credentials()   # 비로그인 → 성인 도서 제외
+        for ordering, order_by in (("price", ("price", "id")), ("-created_at", ("-created_at", "-id"))):
+            expected = list(
+                Trade.objects.filter(book__adult=False, status="sold", region="jeju")
+                .order_by(*order_by).values_list("id", flat=True)
+            )
+            ids = []
+            url = f"/api/trades/search/?cursor=&size=17&status=sold&region=jeju&ordering={ordering}"
+            while url:
+                data = self.client.get(url).json()
+                ids += [trade["id"] for trade in data["results"]]
+                url = data["next"]
+            self.assertEqual(ids, expected, ordering)
+
+    def test_trade_list(self):
+        # 페이지 단위 (COUNT + 페이지 조회)
+        self.measure("GET trades/", self.client.get, "/api/trades/", max_queries=3, max_ms=150)
+
+    def test_trade_list_cursor_deep_page(self):
+        url = "/api/trades/?cursor=&size=100"
+        for _ in range(20):
+            url = self.client.get(url).json()["next"]
+        self.measure("GET trades/?cursor= (21p)", self.client.get, url, max_queries=2, max_ms=150)
+
+    def test_trade_list_stream(self):
+        # 전체 목록 내보내기 (청크 단위로 읽고 바로 씀)
+        self.measure("GET trades/?stream=true", self.client.get, "/api/trades/", {"stream": "true"},
+                     max_queries=2, max_ms=5000)
+
+    def test_trade_create(self):
+        url = f"/api/trades/create/{self.book.id}/"
+        data = {"title": "새 책 팝니다", "content": "깨끗해요", "price": 5000, "region": "seoul"}
+        self.measure("POST trades/create/<book_pk>/", self.client.post, url, data, format="json",
+                     max_queries=4, max_ms=200, expected_status=201)
+
+    def test_trade_detail(self):
+        url = f"/api/trades/{self.trade.id}/"
+        self.measure("GET trades/<id>/", self.client.get, url, max_queries=3, max_ms=150)
+
+    def test_trade_update(self):
+        url = f"/api/trades/{self.trade.id}/"
+        self.measure("PATCH trades/<id>/", self.client.patch, url, {"price": 3000}, format="json",
+                     max_queries=3, max_ms=150)
+
+    def test_trade_delete(self):
+        url = f"/api/trades/{self.trade.id}/"
+        self.measure("DELETE trades/<id>/", self.client.delete, url, max_queries=3, max_ms=150,
+                     expected_status=204)
+
+
+class TradeViewCounterTest(APITestCase):
+    """상세 조회수 버퍼 (services/view_counter.py)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        seller = get_user_model().objects.create_user(username="viewseller", password="pw12345!", nickname="판매자")
+        book = Book.objects.create(isbn="9795500000001", title="조회수", author="저자", publisher="출판사")
+        cls.trades = Trade.objects.bulk_create([
+            Trade(user=seller, book=book, title=f"팝니다 {i}", content="내용", sale_type="sale",
+                  price=1000, region="seoul")
+            for i in range(3)
+        ])
+
+    def setUp(self):
+        cache.clear()
+        trade_view_counter.discard()
+        self.addCleanup(trade_view_counter.discard)
+
+    def test_views_are_buffered_then_flushed(self):
+        trade = self.trades[0]
+        url = f"/api/trades/{trade.id}/"
+
+        # 조회 요청에서는 trade 행을 UPDATE 하지 않음 (SELECT 1번)
+        with self.assertNumQueries(1):
+            self.client.get(url)
+        counts = [self.client.get(url).json()["viewCount"] for _ in range(2)]
+
+        self.assertEqual(counts, [2, 3])
+        trade.refresh_from_db()
+        self.assertEqual(trade.view_count, 0)
+
+        with self.assertNumQueries(1):
+            trade_view_counter.flush()
+        before = trade.updated_at
+        trade.refresh_from_db()
+        self.assertEqual(trade.view_count, 3)
+        self.assertEqual(trade.updated_at, before)
+
+    def test_flush_groups_same_increment(self):
+        a, b, c = self.trades
+        for trade_id in (a.id, a.id, b.id, b.id, c.id):
+            trade_view_counter.hit(trade_id)
+
+        # 증가량 2 (a, b) / 1 (c) → UPDATE 2번
+        with self.assertNumQueries(2):
+            self.assertEqual(trade_view_counter.flush(), 2)
+        self.assertEqual(
+            list(Trade.objects.order_by("id").values_list("view_count", flat=True)), [2, 2, 1]
+        )
+
+    @override_settings(TRADE_VIEW_COUNT={"FLUSH_THRESHOLD": 2})
+    def test_threshold_triggers_flush(self):
+        trade = self.trades[0]
+        trade_view_counter.hit(trade.id)
+        trade_view_counter.hit(trade.id)
+
+        trade.refresh_from_db()
+        self.assertEqual(trade.view_count, 2)
+        self.assertEqual(trade_view_counter.pending(trade.id), 0)
+
+    @override_settings(TRADE_VIEW_COUNT={"DEDUPE_WINDOW": 60})
+    def test_dedupe_window(self):
+        url = f"/api/trades/{self.trades[0].id}/"
+        self.client.get(url, REMOTE_ADDR="10.0.0.1")
+        self.client.get(url, REMOTE_ADDR="10.0.0.1")
+        self.client.get(url, REMOTE_ADDR="10.0.0.2")
+
+        self.assertEqual(trade_view_counter.pending(self.trades[0].id), 2)
+
+    @override_settings(TRADE_VIEW_COUNT={"DEDUPE_WINDOW": 60, "TRUSTED_PROXIES": ("10.0.0.1",)})
+    def test_forwarded_for_only_from_trusted_proxy(self):
+        url = f"/api/trades/{self.trades[0].id}/"
+        # 프록시 뒤의 서로 다른 클라이언트 (왼쪽에 끼워 넣은 값은 무시)
+        self.client.get(url, REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR="203.0.113.5")
+        self.client.get(url, REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR="1.2.3.4, 203.0.113.5")
+        self.client.get(url, REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR="203.0.113.6")
+        # 프록시가 아닌 곳에서 보낸 헤더는 믿지 않음 → REMOTE_ADDR 기준
+        self.client.get(url, REMOTE_ADDR="198.51.100.7", HTTP_X_FORWARDED_FOR="1.1.1.1")
+        self.client.get(url, REMOTE_ADDR="198.51.100.7", HTTP_X_FORWARDED_FOR="2.2.2.2")
+
+        self.assertEqual(trade_view_counter.pending(self.trades[0].id), 3)
+
+    def test_failed_flush_keeps_counts(self):
+        trade = self.trades[0]
+        trade_view_counter.hit(trade.id)
+        trade_view_counter.hit(trade.id)
+        with mock.patch.object(Trade.objects, "filter", side_effect=DatabaseError("locked")), \
+                self.assertLogs("trades.services.view_counter", "ERROR"):
+            self.assertEqual(trade_view_counter.flush(), 0)
+        self.assertEqual(trade_view_counter.pending(trade.id), 2)
+
+        trade_view_counter.hit(trade.id)
+        trade_view_counter.flush()
+        trade.refresh_from_db()
+        self.assertEqual(trade.view_count, 3)
+
+    @override_settings(TRADE_VIEW_COUNT={"FLUSH_INTERVAL": 5})
+    def test_timer_flushes_without_further_views(self):
+        trade = self.trades[0]
+        with mock.patch("trades.services.view_counter.threading.Timer") as timer:
+            trade_view_counter.hit(trade.id)
+            trade_view_counter.hit(trade.id)
+        # 타이머는 한 번만 (5초 뒤 반영)
+        timer.assert_called_once_with(5, trade_view_counter._flush_from_timer)
+        timer.return_value.start.assert_called_once()
+
+        with mock.patch("trades.services.view_counter.connection"):
+            trade_view_counter._flush_from_timer()
+        trade.refresh_from_db()
+        self.assertEqual(trade.view_count, 2)
+
+
+class TradeListTest(APITestCase):
+    """GET /api/trades/ 페이지 / cursor / 스트리밍"""
+
+    @classmethod
+    def setUpTestData(cls):
+        seller = get_user_model().objects.create_user(username="listseller", password="pw12345!", nickname="판매자")
+        book = Book.objects.create(isbn="9795500000002", title="목록", author="저자", publisher="출판사")
+        Trade.objects.bulk_create([
+            Trade(user=seller, book=book, title=f"팝니다 {i}", content="긴 본문" * 100, sale_type="sale",
+                  price=1000 * (i % 7), region="seoul")
+            for i in range(45)
+        ])
+        cls.ids = list(Trade.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+
+    def test_page_is_slim_and_capped(self):
+        data = self.client.get("/api/trades/").json()
+        self.assertEqual((data["count"], data["totalPages"], len(data["results"])), (45, 3, 20))
+        trade = data["results"][0]
+        self.assertNotIn("content", trade)
+        self.assertNotIn("kakaoChatUrl", trade)
+        self.assertEqual(trade["user"]["nickname"], "판매자")
+        self.assertEqual(trade["book"]["title"], "목록")
+        # size 는 최대 100
+        self.assertEqual(len(self.client.get("/api/trades/", {"size": 1000}).json()["results"]), 45)
+
+    def test_cursor_walks_all_trades(self):
+        for ordering, order_by in (("-created_at", ("-created_at", "-id")), ("price", ("price", "id"))):
+            ids, url = [], f"/api/trades/?cursor=&size=7&ordering={ordering}"
+            while url:
+                data = self.client.get(url).json()
+                ids += [trade["id"] for trade in data["results"]]
+                url = data["next"]
+            self.assertEqual(ids, list(Trade.objects.order_by(*order_by).values_list("id", flat=True)))
+
+    def test_stream_returns_json_array(self):
+        with mock.patch("trades.views.TRADE_LIST_STREAM_CHUNK_SIZE", 10):
+            response = self.client.get("/api/trades/", {"stream": "true"})
+            body = b"".join(response.streaming_content)
+        trades = json.loads(body)
+        self.assertEqual([trade["id"] for trade in trades], self.ids)
+        self.assertNotIn("content", trades[0])
+
+        with mock.patch("trades.views.TRADE_LIST_STREAM_MAX_ROWS", 5):
+            response = self.client.get("/api/trades/", {"stream": "true"})
+            self.assertEqual(len(json.loads(b"".join(response.streaming_content))), 5)
+
+    def test_empty_stream(self):
+        Trade.objects.all().delete()
+        response = self.client.get("/api/trades/", {"stream": "true"})
+        self.assertEqual(json.loads(b"".join(response.streaming_content)), [])
+        self.assertEqual(self.client.get("/api/trades/").json()["results"], [])
+
+
+@sync_bitmap_index
+class TradeQueryShapeTest(APITestCase):
+    """검색 필터 / 정렬 조합 집계 (services/query_shapes.py)"""
+
+    def setUp(self):
+        trade_query_shapes.discard()
+        trade_bitmap_index.clear()
+        self.addCleanup(trade_query_shapes.discard)
+
+    def test_shape_ignores_values(self):
+        shape = trade_search_shape(QueryDict("search=해리&status=sold&region=seoul&region=busan&min_price=1000"))
+        self.assertEqual(shape, "search=title|adult|status=sold|region:2|min_price|order=relevance")
+        self.assertEqual(
+            trade_search_shape(QueryDict("search=다른검색어&status=sold&region=jeju&region=ulsan&min_price=5")),
+            shape,
+        )
+        self.assertEqual(trade_search_shape(QueryDict("ordering=price&cursor=")), "adult|order=price|cursor")
+
+    def test_search_requests_are_recorded_then_flushed(self):
+        for _ in range(3):
+            self.client.get("/api/trades/search/", {"status": "available", "region": "seoul"})
+        self.client.get("/api/trades/search/", {"ordering": "price", "min_price": 1000})
+
+        self.assertFalse(TradeSearchShape.objects.exists())
+        trade_query_shapes.flush()
+        self.client.get("/api/trades/search/", {"status": "available", "region": "busan"})
+        trade_query_shapes.flush()
+
+        hits = dict(TradeSearchShape.objects.values_list("signature", "hits"))
+        self.assertEqual(hits, {
+            "adult|status=available|region:1|order=-created_at": 4,
+            "adult|min_price|order=price": 1,
+        })
+
+        out = io.StringIO()
+        call_command("trade_query_shapes", explain=True, stdout=out)
+        self.assertIn("80.0%", out.getvalue())
+        self.assertIn("idx_trade_st_region_created", out.getvalue())
+
+    def test_failed_flush_keeps_pending_counts(self):
+        self.client.get("/api/trades/search/", {"status": "sold"})
+        with mock.patch.object(TradeSearchShape.objects, "filter", side_effect=DatabaseError("locked")), \
+                self.assertLogs("trades.services.query_shapes", "ERROR"), \
+                override_settings(TRADE_QUERY_SHAPES={"FLUSH_INTERVAL": 0}):
+            # 요청 안에서 반영하다 실패해도 검색 응답은 그대로
+            self.assertEqual(self.client.get("/api/trades/search/", {"status": "sold"}).status_code, 200)
+        self.assertFalse(TradeSearchShape.objects.exists())
+
+        self.assertEqual(trade_query_shapes.flush(), 1)
+        self.assertEqual(TradeSearchShape.objects.get().hits, 2)
+
+    @override_settings(TRADE_QUERY_SHAPES={"RECORD": False})
+    def test_recording_can_be_disabled(self):
+        self.client.get("/api/trades/search/")
+        self.assertEqual(trade_query_shapes.pending(), {})
+
+    def test_shape_queryset_uses_composite_indexes(self):
+        for signature, index in (
+            ("adult|status=sold|region:1|order=-created_at", "idx_trade_st_region_created"),
+            ("adult|status=available|min_price|max_price|order=price", "idx_trade_status_price"),
+        ):
+            self.assertIn(index, shape_queryset(signature).explain(), signature)
+
+    def test_available_partial_index_only_on_postgres(self):
+        with connection.cursor() as cursor:
+            names = set(connection.introspection.get_constraints(cursor, Trade._meta.db_table))
+        # SQLite 3.40 은 스키마 변경 뒤 다시 준비된 'status = ?' 문장이 부분 인덱스 때문에 다른 status 에서 0건 (migrations/0005)
+        self.assertEqual("idx_trade_available_created" in names, connection.vendor == "postgresql")
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+            plan = shape_queryset("adult|status=available|order=-created_at").explain()
+            self.assertIn("idx_trade_available_created", plan)
+
+
+class TradeIndexBenchmarkTest(TestCase):
+    def test_benchmark_runs_and_rolls_back(self):
+        out = io.StringIO()
+        call_command("bench_trade_indexes", rows=500, repeat=1, stdout=out)
+        self.assertIn("[adult|status=available|order=-created_at]", out.getvalue())
+        self.assertFalse(Trade.objects.exists())
+
+
+@sync_bitmap_index
+class TradeFacetTest(APITestCase):
+    """검색 패싯 (services/facets.py) - 조건마다 COUNT 한 결과와 같은지"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.catalog = seed_catalog(books=200, trades=600, ratings=0, bookmarks=0, users=20)
+
+    def setUp(self):
+        trade_query_shapes.discard()
+        trade_bitmap_index.clear()
+        self.addCleanup(trade_query_shapes.discard)
+
+    def expected(self, field, value, regions=None, status=None, sale_types=None, min_price=None):
+        queryset = Trade.objects.filter(book__adult=False)
+        filters = {"region__in": regions, "status": status, "sale_type__in": sale_types, "price__gte": min_price}
+        for lookup, condition in filters.items():
+            # 자기 필드 조건은 빼고 셈
+            if condition is not None and not lookup.startswith(field):
+                queryset = queryset.filter(**{lookup: condition})
+        return queryset.filter(**value).count()
+
+    def test_facets_match_separate_counts(self):
+        params = {"region": ["seoul", "busan"], "status": "available", "saleType": "sale", "min_price": 5000,
+                  "facets": "true"}
+        with self.assertNumQueries(3):   # 개수 + 페이지 + 패싯
+            data = self.client.get("/api/trades/search/", params).json()
+        facets = data["facets"]
+        conditions = dict(regions=["seoul", "busan"], status="available", sale_types=["sale"], min_price=5000)
+
+        self.assertEqual(facets["total"], data["count"])
+        for region in ("seoul", "busan", "jeju"):
+            self.assertEqual(facets["region"][region], self.expected("region", {"region": region}, **conditions))
+        for status in ("available", "sold"):
+            self.assertEqual(facets["status"][status], self.expected("status", {"status": status}, **conditions))
+        self.assertEqual(facets["saleType"]["free"], self.expected("sale_type", {"sale_type": "free"}, **conditions))
+
+        buckets = [bucket["count"] for bucket in facets["price"]]
+        expected = [
+            self.expected("price", {"price__gte": low, **({"price__lt": high} if high else {})}, **conditions)
+            for low, high in PRICE_BUCKETS
+        ]
+        self.assertEqual(buckets, expected)
+        self.assertTrue(all(facets["region"][region] for region in ("seoul", "busan")) and any(buckets))
+
+    def test_facets_are_opt_in(self):
+        self.assertNotIn("facets", self.client.get("/api/trades/search/").json())
+
+
+@sync_bitmap_index
+class TradeBitmapIndexTest(APITestCase):
+    """검색 비트맵 인덱스 (services/bitmap_index.py) - DB 조회 결과와 같은지 / 증분 갱신"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.catalog = seed_catalog(books=200, trades=600, ratings=0, bookmarks=0, users=20)
+
+    def setUp(self):
+        trade_query_shapes.discard()
+        trade_bitmap_index.clear()
+        self.addCleanup(trade_query_shapes.discard)
+        self.addCleanup(trade_bitmap_index.clear)
+
+    def search_ids(self, params, **settings):
+        with override_settings(TRADE_BITMAP_INDEX={"ENABLED": True, "BACKGROUND": False, **settings}):
+            data = self.client.get("/api/trades/search/", {"size": 17, **params}).json()
+        return data["count"], [trade["id"] for trade in data["results"]]
+
+    def test_pages_match_database(self):
+        cases = [
+            {},
+            {"status": "sold", "region": "jeju"},
+            {"region": ["seoul", "busan"], "saleType": "free"},
+            {"status": "available", "ordering": "created_at", "page": 3},
+            {"region": "nowhere"},
+        ]
+        for params in cases:
+            trade_bitmap_index.clear()
+            self.assertEqual(self.search_ids(params), self.search_ids(params, ENABLED=False), params)
+
+    def test_count_without_query(self):
+        with self.assertNumQueries(2):  # 최초 적재 + 페이지 id__in
+            self.search_ids({"status": "sold"})
+        with self.assertNumQueries(1):  # 적재 후에는 페이지 조회만 (COUNT 없음)
+            self.search_ids({"status": "sold"})
+
+    def test_facets_match_database(self):
+        params = {"region": ["seoul", "busan"], "status": "available", "saleType": "sale"}
+        trade_bitmap_index.rebuild()
+        facets = trade_bitmap_index.facet_counts({"adult": [False], "region": params["region"],
+                                                  "status": [params["status"]], "sale_type": [params["saleType"]]})
+        from django.db.models import Q
+        expected = facet_counts(
+            Trade.objects.filter(book__adult=False),
+            {"region": Q(region__in=params["region"]), "status": Q(status="available"), "sale_type": Q(sale_type="sale")},
+        )
+        self.assertEqual(facets, expected)
+
+    def test_incremental_updates(self):
+        trade_bitmap_index.rebuild()
+        book = self.catalog["books"][0]
+        user = get_user_model().objects.first()
+
+        def assert_matches():
+            for status in ("available", "sold"):
+                bitmap = trade_bitmap_index.match({"status": [status], "region": ["jeju"], "adult": [False]})
+                expected = Trade.objects.filter(status=status, region="jeju", book__adult=False)
+                self.assertEqual(bitmap.bit_count(), expected.count())
+                self.assertEqual(TradeBitmapIndex.page_ids(bitmap, 0, 1000), list(expected.order_by("-id").values_list("id", flat=True)))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            trade = Trade.objects.create(user=user, book=book, title="새 글", content="내용", price=1000, region="jeju")
+        assert_matches()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            trade.status = "sold"
+            trade.save()
+        assert_matches()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            book.adult = not book.adult
+            book.save()
+        assert_matches()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            trade.delete()
+        assert_matches()
+
+    def test_first_request_does_not_wait_for_rebuild(self):
+        # 백그라운드 적재: 적재 전 요청은 DB 조회로 응답하고 적재 스레드만 시작
+        with mock.patch("trades.services.bitmap_index.threading.Thread") as thread:
+            self.assertEqual(self.search_ids({"status": "sold"}, BACKGROUND=True),
+                             self.search_ids({"status": "sold"}, ENABLED=False))
+            thread.assert_called_once()
+            thread.return_value.start.assert_called_once()
+            # 적재가 끝나기 전 요청은 스레드를 또 만들지 않음
+            self.search_ids({"status": "sold"}, BACKGROUND=True)
+            thread.assert_called_once()
+        self.assertFalse(trade_bitmap_index.built)
+
+        self.assertEqual(thread.call_args.kwargs["target"], trade_bitmap_index._rebuild_in_background)
+        trade_bitmap_index.rebuild()    # 스레드가 할 일 (적재 후 DB 연결 정리만 추가)
+        self.assertEqual(self.search_ids({"status": "sold"}, BACKGROUND=True),
+                         self.search_ids({"status": "sold"}, ENABLED=False))
+
+    def test_changes_during_rebuild_are_replayed(self):
+        trade = Trade.objects.filter(book__adult=False).order_by("id").first()
+        load = trade_bitmap_index._load
+
+        def load_then_change():
+            # 적재 쿼리가 끝난 뒤 커밋된 변경 (시그널은 적재 중인 인덱스에 도착)
+            state = load()
+            trade_bitmap_index.remove(trade.pk)
+            return state
+
+        with mock.patch.object(trade_bitmap_index, "_load", load_then_change):
+            trade_bitmap_index.rebuild()
+        self.assertFalse(trade_bitmap_index.match({}) >> trade.pk & 1)
+
+    def test_stale_bitmap_is_filtered_by_database(self):
+        # 시그널을 타지 않는 일괄 변경 → 비트맵은 그대로지만 페이지는 SQL 조건으로 다시 걸러짐
+        params = {"status": "available", "region": "seoul", "size": 100}
+        count, ids = self.search_ids(params)
+        Trade.objects.filter(pk=ids[0]).update(status="sold")
+
+        with mock.patch.object(trade_bitmap_index, "schedule_rebuild") as schedule_rebuild:
+            stale_count, stale_ids = self.search_ids(params)
+        self.assertEqual(stale_count, count)
+        self.assertEqual(stale_ids, ids[1:])
+        schedule_rebuild.assert_called_once()
+
+        trade_bitmap_index.rebuild()
+        self.assertEqual(self.search_ids(params), self.search_ids(params, ENABLED=False))
+
+    def test_index_version_triggers_rebuild(self):
+        # 적재 커멘드 / 다른 워커에서 성인 여부를 바꾸고 인덱스 버전만 올린 경우 (이 프로세스 시그널 없음)
+        params = {"status": "available"}
+        self.search_ids(params)
+        book = Trade.objects.filter(book__adult=False, status="available").values_list("book", flat=True).first()
+        Book.objects.filter(pk=book).update(adult=True)
+        bump_index_version()
+
+        self.assertEqual(self.search_ids(params), self.search_ids(params, ENABLED=False))
+
+    def test_page_ids_across_chunks(self):
+        ids = sorted({7, 8, 4096 * 8 - 1, 4096 * 8, 4096 * 8 + 5, 3 * 4096 * 8 + 1, 100_000})
+        bitmap = sum(1 << trade_id for trade_id in ids)
+        for start in range(len(ids) + 1):
+            self.assertEqual(TradeBitmapIndex.page_ids(bitmap, start, start + 3), ids[::-1][start:start + 3])
+            self.assertEqual(TradeBitmapIndex.page_ids(bitmap, start, start + 3, descending=False), ids[start:start + 3])
+
+
+class TradeFullTextSearchTest(APITestCase):
+    """중고거래 전문 검색 (services/search_index.py) - 제목 / 내용 / 도서명 / 전체 + 관련도 순"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="fts_seller", password="pw", nickname="판매자")
+        cls.book = Book.objects.create(isbn="9790000000101", title="파친코 1", author="이민진", publisher="문학사상")
+        cls.other_book = Book.objects.create(isbn="9790000000102", title="채식주의자", author="한강", publisher="창비")
+
+        def trade(title, content, book):
+            return Trade.objects.create(user=cls.user, book=book, title=title, content=content, price=1000,
+                                        region="seoul")
+
+        cls.in_title = trade("파친코 팝니다", "깨끗해요", cls.other_book)
+        cls.in_content = trade("소설 팝니다", "파친코 1권도 같이 드려요", cls.other_book)
+        cls.in_book = trade("책 정리합니다", "밑줄 없음", cls.book)
+
+    def setUp(self):
+        trade_query_shapes.discard()
+        self.addCleanup(trade_query_shapes.discard)
+
+    def search_ids(self, search, search_type, **params):
+        data = self.client.get("/api/trades/search/", {"search": search, "searchType": search_type, **params}).json()
+        return [trade["id"] for trade in data["results"]]
+
+    def test_search_types(self):
+        self.assertEqual(self.search_ids("파친코", "title"), [self.in_title.id])
+        self.assertEqual(self.search_ids("파친코", "content"), [self.in_content.id])
+        self.assertEqual(self.search_ids("파친코", "book"), [self.in_book.id])
+        self.assertEqual(self.search_ids("9790000000101", "isbn"), [self.in_book.id])
+
+    def test_all_is_ranked_by_relevance(self):
+        # 제목 > 도서명 > 내용 가중치
+        ids = self.search_ids("파친코", "all", size=10)
+        self.assertEqual(ids, [self.in_title.id, self.in_book.id, self.in_content.id])
+        # 정렬을 지정하면 관련도 대신 그 정렬
+        self.assertEqual(self.search_ids("파친코", "all", size=10, ordering="created_at"),
+                         [self.in_title.id, self.in_content.id, self.in_book.id])
+
+    def test_index_follows_trade_and_book_changes(self):
+        self.in_title.title = "소설책 팝니다"
+        self.in_title.save()
+        self.book.title = "작별하지 않는다"
+        self.book.save()
+        self.in_content.delete()
+
+        self.assertEqual(self.search_ids("파친코", "all", size=10), [])
+        self.assertEqual(self.search_ids("작별하지", "book"), [self.in_book.id])
+        self.assertEqual(self.search_ids("소설책", "title"), [self.in_title.id])
+
+        call_command("rebuild_trade_search_index", stdout=io.StringIO())
+        self.assertEqual(self.search_ids("작별하지", "all"), [self.in_book.id])
+
+    def test_short_search_falls_back_to_icontains(self):
+        # trigram 은 3글자부터 → 2글자는 icontains (최신순)
+        self.assertEqual(self.search_ids("정리", "all"), [self.in_book.id])
+        self.assertEqual(self.search_ids("소설", "all", size=10), [self.in_content.id])
+
+    def test_substring_inside_word(self):
+        # 띄어쓰기 없이 붙은 글자의 중간 부분도 검색 (접두어 검색만으로는 안 잡힘)
+        self.assertEqual(self.search_ids("리합니", "title"), [self.in_book.id])
+        self.assertEqual(set(self.search_ids("식주의", "book", size=10)), {self.in_title.id, self.in_content.id})
+
+    @skipUnless(connection.vendor == "sqlite", "SQLite FTS5")
+    def test_sqlite_search_uses_fts_index(self):
+        plan = search_trades(Trade.objects.all(), "파친코", "all").explain()
+        self.assertIn("trade_fts VIRTUAL TABLE INDEX", plan)
+        self.assertNotIn("SCAN trade ", plan)
+
+    @skipUnless(connection.vendor == "postgresql", "PostgreSQL GIN 인덱스")
+    def test_postgres_search_uses_gin_indexes(self):
+        # 게시글 몇 개로는 순차 스캔이 더 싸므로 끄고, 인덱스 표현식과 조회 표현식이 맞는지만 확인
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        for search_type, table, field in (("title", "trade", "title"), ("content", "trade", "content"),
+                                          ("book", "book", "title")):
+            plan = search_trades(Trade.objects.all(), "파친코 팝니다", search_type).explain()
+            self.assertIn(f"idx_{table}_{field}_fts", plan, search_type)
+            self.assertIn(f"idx_{table}_{field}_trgm", plan, search_type)
+
+    def test_facets_with_search(self):
+        params = {"search": "파친코", "searchType": "all", "facets": "true"}
+        self.client.get("/api/trades/search/", params)   # FTS 테이블 확인 (프로세스당 1번)
+        with self.assertNumQueries(3):   # 개수 + 페이지 + 패싯
+            data = self.client.get("/api/trades/search/", params).json()
+        self.assertEqual(data["facets"]["total"], 3)
+        self.assertEqual(data["facets"]["region"]["seoul"], 3)
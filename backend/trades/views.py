@@ -5,13 +5,23 @@ from rest_framework.pagination import PageNumberPagination
 from rest_framework.generics import RetrieveUpdateDestroyAPIView
 from rest_framework import status
 
+from django.conf import settings
 from django.db.models import Q
+from django.http import StreamingHttpResponse
+from bookmarket.renderers import render_camel_json
+from bookmarket.pagination import CachedCountPaginationMixin, KeysetPagination, wants_cached_count
 from .models import Trade
-from .serializers import TradeSerializer, TradeDetailSerializer, TradeSearchSerializer
+from .serializers import TradeSerializer, TradeDetailSerializer, TradeListSerializer, TradeSearchSerializer
+from .services.bitmap_index import BitmapPage, get_bitmap_index_settings, trade_bitmap_index
+from .services.facets import facet_counts
+from .services.search_index import search_trades
+from .services.query_shapes import default_ordering, trade_query_shapes
+from .services.view_counter import trade_view_counter
 from .permissions import IsOwnerOrReadOnly  # 1. 권한 가져오기 (게시글 삭제를 위함)
 from math import ceil
+from itertools import islice
 
-from django.shortcuts import get_object_or_404, get_list_or_404
+from django.shortcuts import get_object_or_404
 
 # DRF 할건 해야제..
 from books.models import Book
@@ -25,7 +35,7 @@ from rest_framework.permissions import IsAuthenticated
 # DRF-spectacular
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 
-class TradePagination(PageNumberPagination):
+class TradePagination(CachedCountPaginationMixin, PageNumberPagination):
     page_size = 2                   # 한 페이지당 개수 (size를 요청 안 했을 경우, 한 페이지당 개수)
     page_query_param = "page"         # ?page=1
     page_size_query_param = "size"    # ?size=20 (size 요청이 왔을 경우, 한 페이지당 개수)
@@ -53,22 +63,39 @@ class TradePagination(PageNumberPagination):
         })
 
 
+# 정렬 → 키셋 컬럼 (id 로 동점 정리)
+KEYSET_ORDERINGS = {
+    "-created_at": ("-created_at", "-id"),
+    "created_at": ("created_at", "id"),
+    "price": ("price", "id"),
+    "-price": ("-price", "-id"),
+}
+
+
 class TradeSearchAPIView(APIView):
     @extend_schema(
         parameters=[
             OpenApiParameter("search", str, required=False),
-            OpenApiParameter("searchType", str, required=False, enum=["title", "content", "book", "isbn"]),
+            OpenApiParameter("searchType", str, required=False, enum=["title", "content", "book", "isbn", "all"]),
             OpenApiParameter("adult", bool, required=False),
             OpenApiParameter("saleTypes", str, required=False),
             OpenApiParameter("status", str, required=False),
             OpenApiParameter("regions", str, many=True, required=False, enum=["all", "seoul", "busan", "daegu", "incheon", "gwangju", "daejeon", "ulsan", "sejong", "gyeonggi", "gangwon", "chungbuk", "chungnam", "jeonbuk", "jeonnam", "gyeongbuk", "gyeongnam", "jeju"]),
             OpenApiParameter("min_price", int, required=False),
             OpenApiParameter("max_price", int, required=False),
+            OpenApiParameter("ordering", str, required=False, enum=["-created_at", "created_at", "price", "-price", "relevance"],
+                             description="기본값: 검색어가 있으면 relevance(관련도 순), 없으면 -created_at"),
+            OpenApiParameter("cursor", str, required=False, description="키셋 페이지네이션 (첫 페이지는 빈 값)"),
+            OpenApiParameter("count", str, required=False, enum=["cached"], description="전체 개수 캐시 사용"),
+            OpenApiParameter("facets", bool, required=False, description="지역 / 판매 유형 / 상태 / 가격대별 게시글 수 함께 반환"),
         ],
         responses=TradeSearchSerializer,
         summary="중고 도서 검색"
     )
     def get(self, request):
+        # 필터 / 정렬 조합 집계 (인덱스 설계용, services/query_shapes.py)
+        trade_query_shapes.record(request.query_params, request.user)
+
         queryset = Trade.objects.select_related('book', 'user')
 
         # =====================
@@ -78,14 +105,12 @@ class TradeSearchAPIView(APIView):
         searchType = request.query_params.get("searchType", "title")
 
         if search:
-            if searchType == "title":
-                queryset = queryset.filter(title__icontains=search)     # icontains -> 대소문자 구분없이 값이 포함되어있는가?
-            elif searchType == "content":
-                queryset = queryset.filter(content__icontains=search)
-            elif searchType == "book":
-                queryset = queryset.filter(book__title__icontains=search)
-            elif searchType == "isbn":  # 특정도서 검색 대신 isbn(유니크 키) 대체
+            if searchType == "isbn":  # 특정도서 검색 대신 isbn(유니크 키) 대체
                 queryset = queryset.filter(book__isbn__icontains=search)
+            else:
+                # 제목 / 내용 / 도서명 / 전체(all) → 전문 검색 인덱스 + 관련도 정렬
+                # (LIKE '%검색어%' 전체 스캔 대신 인덱스 사용 → services/search_index.py)
+                queryset = search_trades(queryset, search, searchType)
 
         # =====================
         # 🔞 성인 도서 필터
@@ -105,6 +130,9 @@ class TradeSearchAPIView(APIView):
         # if exclude_adult:   # 성인 도서 제외가 필요한 경우
         #     queryset = queryset.filter(book__adult=False)
 
+        # 비트맵 인덱스(services/bitmap_index.py) 에 넘길 enum 조건 (필드 → 값 목록)
+        bitmap_filters = {}
+
         # 1. 로그인 여부부터 확인하고..
         if user.is_authenticated:
             # 2. 나이가 존재하고 20살이 넘어가면..
@@ -116,23 +144,33 @@ class TradeSearchAPIView(APIView):
                         # book 필드에 있는 adult를 가져와야 함
                         # 현재 테이블에는 book_adult 인스턴스 객체가 존재함 (search할 때 받아오는 값)
                         queryset = queryset.filter(book__adult=True)
+                        bitmap_filters["adult"] = [True]
                     # 3. 성인 도서를 필터 하지 않았으면 성인 도서는 안보임
                     elif adult_param in ("false", 0, "False"):
                         queryset = queryset.filter(book__adult=False)
+                        bitmap_filters["adult"] = [False]
             # 2-1. 20살이 넘지 않았거나, 나이를 입력하지 않았기에 성인 도서 못봄
             else:
                 queryset = queryset.filter(book__adult=False)
+                bitmap_filters["adult"] = [False]
         # 1-1. 로그인 안했으면 성인도서 못봄
         else:
             queryset = queryset.filter(book__adult=False)
+            bitmap_filters["adult"] = [False]
         
 
+        # 패싯(?facets=true) 은 아래 판매 유형 / 상태 / 지역 / 가격 조건을 따로 모아서 계산 (services/facets.py)
+        facet_base = queryset
+        facet_filters = {}
+
         # =====================
         # 🏷 판매 유형
         # =====================
         saleTypes = request.query_params.getlist("saleType")
         if saleTypes:
-            queryset = queryset.filter(sale_type__in=saleTypes)
+            facet_filters["sale_type"] = Q(sale_type__in=saleTypes)
+            bitmap_filters["sale_type"] = saleTypes
+            queryset = queryset.filter(facet_filters["sale_type"])
 
         # =====================
         # 📦 거래 상태 (기본: 판매중)
@@ -140,7 +178,9 @@ class TradeSearchAPIView(APIView):
         # 거래 상태 필터링
         status = request.query_params.get("status")
         if status:
-            queryset = queryset.filter(status=status)
+            facet_filters["status"] = Q(status=status)
+            bitmap_filters["status"] = [status]
+            queryset = queryset.filter(facet_filters["status"])
 
         # =====================
         # 📍 거래 지역
@@ -148,7 +188,9 @@ class TradeSearchAPIView(APIView):
         regions = request.query_params.getlist("region")
 
         if regions:
-            queryset = queryset.filter(region__in=regions)
+            facet_filters["region"] = Q(region__in=regions)
+            bitmap_filters["region"] = regions
+            queryset = queryset.filter(facet_filters["region"])
 
 
         # =====================
@@ -157,22 +199,28 @@ class TradeSearchAPIView(APIView):
         min_price = request.query_params.get("min_price")
         max_price = request.query_params.get("max_price")
 
+        price_filter = Q()
         if min_price:   # min_price가 있다면
             try:
-                queryset = queryset.filter(price__gte=int(min_price))
+                price_filter &= Q(price__gte=int(min_price))
             except (ValueError, TypeError):
                 pass
 
         if max_price:   # max_price가 있다면
             try:
-                queryset = queryset.filter(price__lte=int(max_price))
+                price_filter &= Q(price__lte=int(max_price))
             except (ValueError, TypeError):
                 pass
+
+        if price_filter:
+            facet_filters["price"] = price_filter
+            queryset = queryset.filter(price_filter)
             
         # =====================
         # 🔃 정렬
         # =====================
-        ordering = request.query_params.get("ordering", "-created_at")
+        # 정렬을 지정하지 않은 전문 검색은 관련도 순 그대로 (search_trades 에서 정렬됨)
+        ordering = request.query_params.get("ordering", default_ordering(request.query_params))
         if ordering in ["created_at", "-created_at", "price", "-price"]:
             queryset = queryset.order_by(ordering)
 
@@ -180,31 +228,119 @@ class TradeSearchAPIView(APIView):
         # =====================
         # 📄 페이지네이션
         # =====================
+        # ?cursor= → (정렬 컬럼, id) 키셋 페이지네이션 (깊은 페이지도 OFFSET 없이 조회)
         paginator = TradePagination()
+        if ordering in KEYSET_ORDERINGS:
+            keyset = KeysetPagination(ordering=KEYSET_ORDERINGS[ordering], page_size=TradePagination.page_size)
+            if keyset.is_requested(request):
+                paginator = keyset
+
+        # 검색어 / 가격 조건 없이 enum 조건만 있으면 메모리 비트맵으로 개수 / 페이지 id 계산
+        # (COUNT(*) 쿼리 없이 현재 페이지 id 만 조회, services/bitmap_index.py)
+        # 비트맵 적재 전이면 ready() 가 백그라운드 적재만 걸어 두고 False → 이번 요청은 DB 조회
+        use_bitmap = (
+            get_bitmap_index_settings()["ENABLED"]
+            and not search and "price" not in facet_filters
+            and isinstance(paginator, TradePagination) and not wants_cached_count(request)
+            and trade_bitmap_index.ready()
+        )
+        if use_bitmap and ordering in ("-created_at", "created_at"):
+            bitmap = trade_bitmap_index.match(bitmap_filters)
+            if trade_bitmap_index.ordered_by_id:    # 최신순 = id 내림차순 일 때만
+                # 필터가 걸린 queryset 으로 조회 → 비트맵이 어긋난 글은 SQL 조건에서 다시 걸러짐
+                queryset = BitmapPage(bitmap, queryset, descending=ordering == "-created_at")
+
         page = paginator.paginate_queryset(queryset, request)    # 쿼리셋을 페이지네이션 적용 (현재 페이지에 해당하는 데이터만 반환)
         serializer = TradeSearchSerializer(page, many=True)      # 페이지네이션된 데이터를 직렬화 (BookSearchSerializer 사용)
-        return paginator.get_paginated_response(serializer.data) # 페이지네이션된 응답 반환
+        response = paginator.get_paginated_response(serializer.data) # 페이지네이션된 응답 반환
+
+        # =====================
+        # 📊 패싯 (필터별 게시글 수, 집계 쿼리 1번 / 비트맵이면 쿼리 없음)
+        # =====================
+        if request.query_params.get("facets") in ("true", "1", "True"):
+            if use_bitmap:
+                response.data["facets"] = trade_bitmap_index.facet_counts(bitmap_filters)
+            else:
+                response.data["facets"] = facet_counts(facet_base, facet_filters)
+        return response
+
+
+class TradeListPagination(TradePagination):
+    page_size = 20                    # 목록은 기본 20개씩 (최대 max_page_size 100개)
+
+
+# ?stream=true 로 한 번에 내려줄 수 있는 최대 게시글 수 (그 이상은 cursor 로 나눠서 조회)
+TRADE_LIST_STREAM_MAX_ROWS = getattr(settings, "TRADE_LIST_STREAM_MAX_ROWS", 10000)
+# 스트리밍 시 DB 에서 한 번에 읽어서 직렬화하는 게시글 수
+TRADE_LIST_STREAM_CHUNK_SIZE = 500
+
+
+def _stream_trades(queryset):
+    """
+    JSON 배열을 CHUNK_SIZE 개씩 직렬화해서 바로 내보냄
+    → 전체 목록을 메모리에 올리지 않음 (서버 메모리는 청크 1개 분량)
+    """
+    rows = queryset[:TRADE_LIST_STREAM_MAX_ROWS].iterator(chunk_size=TRADE_LIST_STREAM_CHUNK_SIZE)
+
+    def generate():
+        yield b"["
+        separator = b""
+        while chunk := list(islice(rows, TRADE_LIST_STREAM_CHUNK_SIZE)):
+            # '[...]' 로 렌더링된 청크에서 괄호만 떼고 이어 붙임
+            body = render_camel_json(TradeListSerializer(chunk, many=True).data)
+            yield separator + body[1:-1]
+            separator = b","
+        yield b"]"
+
+    return StreamingHttpResponse(generate(), content_type="application/json")
 
 
 # 중고거래 게시글 목록 조회
+@extend_schema(
+    parameters=[
+        OpenApiParameter("page", int, required=False),
+        OpenApiParameter("size", int, required=False, description="페이지당 개수 (기본 20, 최대 100)"),
+        OpenApiParameter("ordering", str, required=False, enum=list(KEYSET_ORDERINGS)),
+        OpenApiParameter("cursor", str, required=False, description="키셋 페이지네이션 (첫 페이지는 빈 값)"),
+        OpenApiParameter("count", str, required=False, enum=["cached"], description="전체 개수 캐시 사용"),
+        OpenApiParameter("stream", bool, required=False,
+                         description=f"true 면 페이지 없이 JSON 배열로 스트리밍 (최대 {TRADE_LIST_STREAM_MAX_ROWS}개)"),
+    ],
+    responses=TradeListSerializer(many=True),
+    summary="중고거래 게시글 목록"
+)
 @api_view(['GET'])
 @permission_classes([IsAuthenticatedOrReadOnly])
 def trade_list(request):
     """
     GET /api/trades/
     중고거래 게시글 목록 조회
+    - 기본: page 번호 방식 (?page=&size=), ?cursor= 면 키셋 방식
+    - ?stream=true: 페이지 없이 전체 목록을 JSON 배열로 스트리밍 (내보내기용, 최대 TRADE_LIST_STREAM_MAX_ROWS 개)
     """
     # select_related => ORM 최적화 가능
     # 외래키로 연결된 객체를 JOIN으로 한 번에 가져오기
-    # ManyToMany Field는 역참조 관계로 가져올 수 없음
-    trades = get_list_or_404(
+    # 목록에서 안 쓰는 본문(content) 등은 .only() 로 조회하지 않음
+    ordering = request.query_params.get("ordering", "-created_at")
+    if ordering not in KEYSET_ORDERINGS:
+        ordering = "-created_at"
+    queryset = (
         Trade.objects
         .select_related('user', 'book', 'book__category')
-        .order_by('-created_at')
+        .only(*TradeListSerializer.only_fields)
+        .order_by(*KEYSET_ORDERINGS[ordering])
     )
 
-    serializer = TradeSerializer(trades, many=True)
-    return Response(serializer.data)
+    if request.query_params.get("stream") in ("true", "1", "True"):
+        return _stream_trades(queryset)
+
+    paginator = TradeListPagination()
+    keyset = KeysetPagination(ordering=KEYSET_ORDERINGS[ordering], page_size=TradeListPagination.page_size)
+    if keyset.is_requested(request):
+        paginator = keyset
+    page = paginator.paginate_queryset(queryset, request)
+    serializer = TradeListSerializer(page, many=True)
+    return paginator.get_paginated_response(serializer.data)
 
 
 # 중고거래 게시글 생성 - 특정 책으로 생성
@@ -239,7 +375,8 @@ def trade_create(request, book_pk):
 class TradeDetailView(RetrieveUpdateDestroyAPIView):
     """게시글 상세 조회, 수정, 삭제"""
     # GET, PUT, PATCH, DELETE 요청 받을 수 있음 (POST X)
-    queryset = Trade.objects.all()
+    # 판매자 / 도서 / 도서 카테고리까지 중첩 시리얼라이저에서 쓰므로 JOIN 으로 한 번에 (N+1 방지)
+    queryset = Trade.objects.select_related('user', 'book', 'book__category')
     serializer_class = TradeDetailSerializer
     # permission_classes = [IsAuthenticatedOrReadOnly]
     # 2. 권한 변경: 로그인 여부만 체크하는 게 아니라 "본인 확인"까지 함
@@ -260,9 +397,11 @@ class TradeDetailView(RetrieveUpdateDestroyAPIView):
     def retrieve(self, request, *args, **kwargs):
         # 1. URL의 id값으로 게시글 객체를 가져옵니다.
         instance = self.get_object()
-        # 2. 조회수를 1 증가시키고 저장합니다.
-        instance.view_count += 1
-        instance.save()
+        # 2. 조회수를 1 증가시킵니다.
+        # 행 전체를 save() 하지 않고 메모리에 모았다가 F() UPDATE 로 한 번에 반영 (services/view_counter.py)
+        trade_view_counter.hit(instance.id, request)
+        # 아직 반영 전인 조회수까지 더해서 응답
+        instance.view_count += trade_view_counter.pending(instance.id)
         
         # 3. 상세 페이지용 시리얼라이저에 객체를 넣어 데이터를 만듭니다.
         serializer = self.get_serializer(instance)